@@ -17,13 +17,17 @@ def _():
     from de_electricity_meteo.config.paths import (
         ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE,
     )
+    from de_electricity_meteo.table_cache import cached_table
 
-    return (ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE,)
+    return ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE, cached_table
 
 
 @app.cell
-def _(ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE, pl):
-    df = pl.scan_parquet(source=ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE).collect()
+def _(ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE, cached_table):
+    # memory-mapped, shared with the other notebooks reading the same table
+    df = cached_table(
+        "odre_registre_national", ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE
+    )
     return (df,)
 
 
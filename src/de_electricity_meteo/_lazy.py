@@ -0,0 +1,45 @@
+"""
+Lazy imports of the heavy dependencies (polars, aiohttp, psycopg...).
+
+`lazy_import` returns the module right away but only executes it on the first
+attribute access, so importing a module of the package that uses polars or aiohttp
+in its functions only does not pay for their import (CLI startup, test collection,
+notebook reruns). Annotations need the real module for type checkers:
+
+    if TYPE_CHECKING:
+        import aiohttp
+    else:
+        aiohttp = lazy_import("aiohttp")
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Imports a module on the first access to one of its attributes.
+
+    Args:
+        name (str): Absolute name of the module.
+
+    Returns:
+        ModuleType: The module, loaded already if it was imported before.
+
+    Raises:
+        ModuleNotFoundError: If the module is not installed (checked eagerly).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
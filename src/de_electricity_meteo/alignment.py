@@ -0,0 +1,314 @@
+"""
+Alignment of the hourly weather observations on the half-hourly eco2mix grid.
+
+Station observations are first aggregated per region with station weights, the
+capacity of the registry installations spread over their nearest stations
+(inverse-distance weighting), so a region's weather is the weather where its
+production is. The regional series is then brought onto the eco2mix timestamps,
+either with a sorted as-of join (last observation, within a tolerance) or by time
+interpolation. The full history is processed one (year, region) partition at a
+time, only the parquet files of that partition being read.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Sequence
+from zoneinfo import ZoneInfo
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import (
+    ECO2MIX_METEO_GOLD,
+    ECO2MIX_SILVER,
+    METEO_HORAIRE_SILVER,
+)
+from de_electricity_meteo.electricity.eco2mix import (
+    LOCAL_TIME_ZONE,
+    PARTITION_KEYS,
+    scan_silver,
+)
+from de_electricity_meteo.enums import AlignMethod
+from de_electricity_meteo.geo.nearest_station import (
+    COORDINATES,
+    StationGridIndex,
+    nearest_stations,
+)
+from de_electricity_meteo.instrumentation import span
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.meteo.climatology import scan_hourly
+from de_electricity_meteo.meteo.stations import code_departement
+from de_electricity_meteo.profiling import collect
+
+# temperature, wind, radiation, precipitation and cloud cover
+DEFAULT_MEASURES = ("t", "ff", "glo", "rr1", "n")
+
+# an installation next to a station must not take an infinite weight
+MIN_DISTANCE_KM = 1.0
+
+KEYS = ["code_region", "date_heure"]
+
+
+@dataclass(frozen=True)
+class AlignSpec:
+    """
+    Sources and parameters of an alignment.
+
+    Attributes:
+        measures (tuple[str, ...]): Weather measures to align.
+        method (AlignMethod): `asof` takes the last observation at most
+            `tolerance` old, `interpolate` interpolates linearly in time between two
+            observations at most `tolerance` apart.
+        tolerance (timedelta): See `method`.
+        eco2mix_dir (Path): Root of the partitioned eco2mix series.
+        hourly_dir (Path): Root of the partitioned hourly weather.
+    """
+
+    measures: tuple[str, ...] = DEFAULT_MEASURES
+    method: AlignMethod = AlignMethod.ASOF
+    tolerance: timedelta = timedelta(hours=1)
+    eco2mix_dir: Path = ECO2MIX_SILVER
+    hourly_dir: Path = METEO_HORAIRE_SILVER
+
+
+def station_weights(
+    installations: pl.DataFrame,
+    index: StationGridIndex,
+    k: int = 3,
+    capacity: str = "puismaxinstallee",
+) -> pl.DataFrame:
+    """
+    Weights of the stations in the weather of each region.
+
+    The capacity of every installation is split between its k nearest stations
+    inversely to their distance, then summed and normalized per region.
+
+    Args:
+        installations (pl.DataFrame): Geolocated registry (`code_region`,
+            `latitude`, `longitude` and the capacity column).
+        index (StationGridIndex): Index of the candidate stations.
+        k (int): Number of stations per installation.
+        capacity (str): Column weighting the installations.
+
+    Returns:
+        pl.DataFrame: `code_region`, `id_station` and `poids` (summing to 1 per
+            region).
+    """
+    inverse_distance = 1 / pl.col("distance_km").clip(lower_bound=MIN_DISTANCE_KM)
+
+    return (
+        nearest_stations(
+            installations.select("code_region", capacity, *COORDINATES)
+            .drop_nulls("code_region")
+            .with_row_index("_installation"),
+            index,
+            k=k,
+        )
+        .drop_nulls("id_station")
+        .with_columns(
+            (
+                pl.col(capacity).fill_null(0)
+                * inverse_distance
+                / inverse_distance.sum().over("_installation")
+            ).alias("poids")
+        )
+        .group_by("code_region", "id_station")
+        .agg(pl.col("poids").sum())
+        .filter(pl.col("poids") > 0)
+        .with_columns(pl.col("poids") / pl.col("poids").sum().over("code_region"))
+        .sort("code_region", "id_station")
+    )
+
+
+def regional_weather(
+    hourly: pl.LazyFrame,
+    weights: pl.DataFrame,
+    measures: Sequence[str] = DEFAULT_MEASURES,
+) -> pl.LazyFrame:
+    """
+    Weighted mean of the station observations per region and hour.
+
+    A station missing a measure at an hour is left out of that mean, the weights of
+    the stations that reported it are renormalized.
+
+    Args:
+        hourly (pl.LazyFrame): Hourly observations, see `scan_hourly`.
+        weights (pl.DataFrame): Station weights, see `station_weights`.
+        measures (Sequence[str]): Measures to aggregate.
+
+    Returns:
+        pl.LazyFrame: `code_region`, `date_heure` and the measures, sorted.
+    """
+    weighted = {}
+    for measure in measures:
+        reported = pl.col("poids").filter(pl.col(measure).is_not_null()).sum()
+        weighted[measure] = (
+            pl.when(reported > 0)
+            .then((pl.col(measure) * pl.col("poids")).sum() / reported)
+            .alias(measure)
+        )
+
+    return (
+        hourly.select("num_poste", "date_heure", *measures)
+        .join(
+            weights.lazy().select(
+                "code_region", pl.col("id_station").alias("num_poste"), "poids"
+            ),
+            on="num_poste",
+        )
+        .group_by(KEYS)
+        .agg(weighted.values())
+        .sort(KEYS)
+    )
+
+
+def align(
+    eco2mix: pl.LazyFrame, weather: pl.LazyFrame, spec: AlignSpec = AlignSpec()
+) -> pl.LazyFrame:
+    """
+    Brings a regional weather series onto the eco2mix timestamps.
+
+    Args:
+        eco2mix (pl.LazyFrame): eco2mix series (`code_region`, `date_heure`...).
+        weather (pl.LazyFrame): Regional weather, see `regional_weather`.
+        spec (AlignSpec): Measures, method and tolerance of the alignment.
+
+    Returns:
+        pl.LazyFrame: The eco2mix series with the weather measures, sorted on
+            (`code_region`, `date_heure`).
+    """
+    measures, tolerance = spec.measures, spec.tolerance
+    weather = weather.select(*KEYS, *measures)
+
+    if spec.method == AlignMethod.ASOF:
+        return (
+            eco2mix.sort("date_heure")
+            .join_asof(
+                weather.sort("date_heure"),
+                on="date_heure",
+                by="code_region",
+                strategy="backward",
+                tolerance=tolerance,
+                # sorted on date_heure, polars cannot check it within groups
+                check_sortedness=False,
+            )
+            .sort(KEYS)
+        )
+
+    observed = pl.col("_observation")
+    interpolated = (
+        eco2mix.select(KEYS)
+        .with_columns(pl.lit(True).alias("_grid"))
+        .join(
+            weather.with_columns(pl.col("date_heure").alias("_observation")),
+            on=KEYS,
+            how="full",
+            coalesce=True,
+        )
+        .sort(KEYS)
+        .with_columns(
+            (
+                observed.backward_fill().over("code_region")
+                - observed.forward_fill().over("code_region")
+            ).alias("_span"),
+            *[
+                pl.col(measure).interpolate_by("date_heure").over("code_region")
+                for measure in measures
+            ],
+        )
+        .filter(pl.col("_grid"))
+        .select(
+            *KEYS,
+            *[
+                pl.when(pl.col("_span") <= tolerance)
+                .then(pl.col(measure))
+                .alias(measure)
+                for measure in measures
+            ],
+        )
+    )
+
+    return eco2mix.join(interpolated, on=KEYS, how="left").sort(KEYS)
+
+
+@span("alignment.align", dataset="eco2mix_meteo")
+def align_partitions(
+    years: Sequence[int],
+    weights: pl.DataFrame,
+    spec: AlignSpec = AlignSpec(),
+    regions: Sequence[str] | None = None,
+    output_dir: Path = ECO2MIX_METEO_GOLD,
+) -> int:
+    """
+    Aligns eco2mix and the regional weather one (year, region) partition at a time.
+
+    Only the eco2mix partition and the weather files of the départements of the
+    weighted stations, for the year and its boundaries, are read.
+
+    Args:
+        years (Sequence[int]): Years (eco2mix local years) to align.
+        weights (pl.DataFrame): Station weights, see `station_weights`.
+        spec (AlignSpec): Sources and parameters of the alignment.
+        regions (Sequence[str] | None): Region codes, those of `weights` when None.
+        output_dir (Path): Root of the aligned partitions.
+
+    Returns:
+        int: Number of partitions written.
+    """
+    if regions is None:
+        regions = weights["code_region"].unique().sort().to_list()
+
+    local = ZoneInfo(LOCAL_TIME_ZONE)
+    written = 0
+    for year in years:
+        start = datetime(year, 1, 1, tzinfo=local) - spec.tolerance
+        end = datetime(year + 1, 1, 1, tzinfo=local) + spec.tolerance
+
+        for code_region in regions:
+            region_weights = weights.filter(pl.col("code_region") == code_region)
+            departements = (
+                region_weights.select(code_departement(pl.col("id_station")))
+                .to_series()
+                .unique()
+                .to_list()
+            )
+            hourly = scan_hourly(spec.hourly_dir).filter(
+                pl.col("departement").is_in(departements),
+                pl.col("annee").is_between(year - 1, year + 1),
+                pl.col("date_heure").is_between(
+                    start.astimezone(UTC), end.astimezone(UTC)
+                ),
+            )
+            eco2mix = scan_silver(spec.eco2mix_dir).filter(
+                pl.col("annee") == year, pl.col("code_region") == code_region
+            )
+
+            aligned = collect(
+                align(
+                    eco2mix,
+                    regional_weather(hourly, region_weights, spec.measures),
+                    spec,
+                ),
+                stage="alignment.align",
+            )
+            if aligned.is_empty():
+                continue
+
+            path = output_dir / f"annee={year}" / f"code_region={code_region}"
+            path.mkdir(parents=True, exist_ok=True)
+            aligned.drop(PARTITION_KEYS).write_parquet(path / "0.tmp")
+            os.replace(path / "0.tmp", path / "0.parquet")
+            written += 1
+
+    logger.info(
+        "eco2mix and weather aligned",
+        extra={
+            "path": output_dir,
+            "years": list(years),
+            "method": spec.method.value,
+            "partitions": written,
+        },
+    )
+
+    return written
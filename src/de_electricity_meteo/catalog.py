@@ -0,0 +1,213 @@
+"""
+Named datasets of the silver and gold layers, for notebooks and analyses.
+
+Every dataset is returned as a LazyFrame over its storage (see `config/paths.py`),
+so nothing is read until it is collected. The selection arguments are pushed
+down to the scans:
+    - regions, départements and years prune the hive partitions, only the files
+      of the selected partitions are opened;
+    - time ranges also bound the year partitions, then skip the row groups whose
+      `date_heure` statistics are out of range (partitions are sorted by time);
+    - columns are projected, only their column chunks are read.
+
+Filters added by the caller on the returned LazyFrame are pushed down the same way,
+e.g. `catalog.eco2mix(regions=["84"], start=datetime(2024, 1, 1)).collect()` reads
+the 2024 files of one region.
+"""
+
+from datetime import UTC, date, datetime, timedelta
+from typing import Sequence
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import (
+    ECO2MIX_METEO_GOLD,
+    ECO2MIX_SILVER,
+    METEO_HORAIRE_SILVER,
+    METEO_STATIONS_SILVER,
+    ODRE_REGISTRE_GEOLOCATED_SILVER,
+    ODRE_REGISTRE_VERSIONS_SILVER,
+)
+from de_electricity_meteo.electricity.eco2mix import scan_silver
+from de_electricity_meteo.electricity.odre_registre_versions import as_of
+from de_electricity_meteo.meteo.climatology import scan_hourly
+
+TIME_COLUMN = "date_heure"
+
+# partitions are by local (eco2mix) or UTC (weather) year, a day of margin covers
+# both around new year
+YEAR_MARGIN = timedelta(days=1)
+
+
+def _utc(value: datetime) -> datetime:
+    # naive datetimes are taken as UTC, like the stored timestamps
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+def _select(
+    lf: pl.LazyFrame,
+    filters: dict[str, Sequence[str] | Sequence[int] | None],
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: Sequence[str] | None = None,
+) -> pl.LazyFrame:
+    """
+    Applies the selection of a dataset: value lists, time range [start, end) and
+    projection, the filters first so that they can use unprojected columns.
+    """
+    predicates = [
+        pl.col(column).is_in(list(values))
+        for column, values in filters.items()
+        if values is not None
+    ]
+    if start is not None:
+        predicates += [
+            pl.col("annee") >= (start - YEAR_MARGIN).year,
+            pl.col(TIME_COLUMN) >= _utc(start),
+        ]
+    if end is not None:
+        predicates += [
+            pl.col("annee") <= (end + YEAR_MARGIN).year,
+            pl.col(TIME_COLUMN) < _utc(end),
+        ]
+
+    if predicates:
+        lf = lf.filter(*predicates)
+    if columns is not None:
+        lf = lf.select(columns)
+    return lf
+
+
+def registry(
+    regions: Sequence[str] | None = None,
+    columns: Sequence[str] | None = None,
+    as_of_date: date | None = None,
+) -> pl.LazyFrame:
+    """
+    Installations of the national registry.
+
+    Args:
+        regions (Sequence[str] | None): Codes of the regions kept, all when None.
+        columns (Sequence[str] | None): Columns kept, all when None.
+        as_of_date (date | None): Registry as published at that date, rebuilt from
+            the versioned store (bronze columns); the latest geolocated registry
+            when None.
+
+    Returns:
+        pl.LazyFrame: One row per installation.
+    """
+    if as_of_date is None:
+        lf = pl.scan_parquet(ODRE_REGISTRE_GEOLOCATED_SILVER)
+        region_column = "code_region"
+    else:
+        lf = as_of(as_of_date, store=ODRE_REGISTRE_VERSIONS_SILVER)
+        region_column = "coderegion"
+
+    return _select(lf, {region_column: regions}, columns=columns)
+
+
+def eco2mix(
+    regions: Sequence[str] | None = None,
+    years: Sequence[int] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: Sequence[str] | None = None,
+) -> pl.LazyFrame:
+    """
+    Unified half-hourly eco2mix series, partitioned by year and region.
+
+    Args:
+        regions (Sequence[str] | None): Codes of the regions kept (`FR` for the
+            national perimeter), all when None.
+        years (Sequence[int] | None): Years (local time) kept, all when None.
+        start (datetime | None): First timestamp kept, naive datetimes are UTC.
+        end (datetime | None): Timestamp after the last one kept.
+        columns (Sequence[str] | None): Columns kept, all when None.
+
+    Returns:
+        pl.LazyFrame: One row per region and half hour, its most final publication
+            (see `eco2mix.unify`).
+    """
+    return _select(
+        scan_silver(ECO2MIX_SILVER),
+        {"code_region": regions, "annee": years},
+        start,
+        end,
+        columns,
+    )
+
+
+def eco2mix_meteo(
+    regions: Sequence[str] | None = None,
+    years: Sequence[int] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: Sequence[str] | None = None,
+) -> pl.LazyFrame:
+    """
+    eco2mix series aligned with the regional weather (see `alignment`), partitioned
+    like `eco2mix` with the same arguments.
+    """
+    return _select(
+        # same layout as the eco2mix series
+        scan_silver(ECO2MIX_METEO_GOLD),
+        {"code_region": regions, "annee": years},
+        start,
+        end,
+        columns,
+    )
+
+
+def stations(
+    departements: Sequence[str] | None = None,
+    columns: Sequence[str] | None = None,
+) -> pl.LazyFrame:
+    """
+    Météo-France stations.
+
+    Args:
+        departements (Sequence[str] | None): Codes of the départements kept, all
+            when None.
+        columns (Sequence[str] | None): Columns kept, all when None.
+
+    Returns:
+        pl.LazyFrame: One row per station, see `stations.station_schema`.
+    """
+    return _select(
+        pl.scan_parquet(METEO_STATIONS_SILVER),
+        {"code_departement": departements},
+        columns=columns,
+    )
+
+
+def weather(
+    departements: Sequence[str] | None = None,
+    postes: Sequence[str] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: Sequence[str] | None = None,
+) -> pl.LazyFrame:
+    """
+    Hourly station observations, partitioned by département and year (UTC).
+
+    Args:
+        departements (Sequence[str] | None): Codes of the départements kept, all
+            when None.
+        postes (Sequence[str] | None): Identifiers (`num_poste`) of the stations
+            kept, all when None.
+        start (datetime | None): First timestamp kept, naive datetimes are UTC.
+        end (datetime | None): Timestamp after the last one kept.
+        columns (Sequence[str] | None): Columns kept, all when None.
+
+    Returns:
+        pl.LazyFrame: One row per station and hour, see `climatology.SCHEMA`.
+    """
+    return _select(
+        scan_hourly(METEO_HORAIRE_SILVER),
+        {"departement": departements, "num_poste": postes},
+        start,
+        end,
+        columns,
+    )
@@ -4,10 +4,42 @@ ROOT_DIR = Path(__file__).parent.parent.parent.parent
 
 DATA = ROOT_DIR / Path("data")
 DATA_BRONZE = DATA / Path("bronze")
+DATA_SILVER = DATA / Path("silver")
+DATA_GOLD = DATA / Path("gold")
+# uncompressed Arrow IPC copies of silver/gold tables, memory-mapped by readers
+DATA_CACHE = DATA / Path("cache")
 
 ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE = (
     DATA_BRONZE / "odre_registre_national_installations"
 )
+ODRE_REGISTRE_VERSIONS_SILVER = DATA_SILVER / "odre_registre_versions"
+ODRE_REGISTRE_GEOLOCATED_SILVER = DATA_SILVER / "odre_registre_geolocalise.parquet"
+# identifier -> row offsets in the geolocated registry
+ODRE_REGISTRE_LOOKUP_SILVER = DATA_SILVER / "odre_registre_geolocalise_index.parquet"
+ODRE_REGISTRE_CAPACITY_CUBE_GOLD = DATA_GOLD / "odre_registre_capacity_cube.parquet"
+
+ECO2MIX_BRONZE = DATA_BRONZE / "eco2mix"
+ECO2MIX_TEMPS_REEL_BRONZE = ECO2MIX_BRONZE / "temps_reel"
+ECO2MIX_SILVER = DATA_SILVER / "eco2mix"
+ECO2MIX_GAPS_SILVER = DATA_SILVER / "eco2mix_gaps.parquet"
+
+ROLLUPS_GOLD = DATA_GOLD / "rollups"
+ECO2MIX_METEO_GOLD = DATA_GOLD / "eco2mix_meteo"
+METEO_FEATURES_GOLD = DATA_GOLD / "meteo_features"
+
+# mirror of the Météo-France bucket, keys are kept as relative paths
+METEO_BRONZE = DATA_BRONZE / "meteofrance"
+METEO_STATIONS_SILVER = DATA_SILVER / "meteo_stations.parquet"
+METEO_STATIONS_GRID_SILVER = DATA_SILVER / "meteo_stations_grid.parquet"
+METEO_HORAIRE_SILVER = DATA_SILVER / "meteo_horaire"
+
+GEO_API_COMMUNES_BRONZE = DATA_BRONZE / "geo_api_communes.json"
+TERRITORIAL_INDEX_SILVER = DATA_SILVER / "referentiel_territorial.parquet"
+
+# Prometheus textfile of the pipeline stage metrics
+METRICS_PROM = DATA / "metrics" / "pipeline.prom"
+# one directory of profiling artifacts per run
+PROFILES = DATA / "profiles"
 
 CONFIG = ROOT_DIR / Path("src/de_electricity_meteo/config")
 LOGGER_CONFIG = CONFIG / "logger.yaml"
@@ -1,38 +1,59 @@
-import psycopg
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from de_electricity_meteo._lazy import lazy_import
+
+if TYPE_CHECKING:
+    import psycopg
+else:
+    psycopg = lazy_import("psycopg")
 
 conn_string = (
     "dbname=postgres user=my_db_root_username password=my_db_root_password "
     "host=localhost port=5432"
 )
 
-with psycopg.connect(conn_string) as conn:
-    # Open a cursor to perform database operations
-    with conn.cursor() as cur:
-        # Execute a command: this creates a new table
-        cur.execute("""
-            CREATE TABLE test (
-                id serial PRIMARY KEY,
-                num integer,
-                data text)
-            """)
-
-        # Pass data to fill a query placeholders and let Psycopg perform
-        # the correct conversion (no SQL injections!)
-        cur.execute("INSERT INTO test (num, data) VALUES (%s, %s)", (100, "abc'def"))
-
-        # Query the database and obtain data as Python objects.
-        cur.execute("SELECT * FROM test")
-        print(cur.fetchone())
-        # will print (1, 100, "abc'def")
-
-        # You can use `cur.executemany()` to perform an operation in batch
-        cur.executemany("INSERT INTO test (num) values (%s)", [(33,), (66,), (99,)])
-
-        # You can use `cur.fetchmany()`, `cur.fetchall()` to return a list
-        # of several records, or even iterate on the cursor
-        cur.execute("SELECT id, num FROM test order by num")
-        for record in cur:
-            print(record)
-
-        # Make the changes to the database persistent
-        conn.commit()
+
+def connect() -> psycopg.Connection:
+    return psycopg.connect(conn_string)
+
+
+def main() -> None:
+    with connect() as conn:
+        # Open a cursor to perform database operations
+        with conn.cursor() as cur:
+            # Execute a command: this creates a new table
+            cur.execute("""
+                CREATE TABLE test (
+                    id serial PRIMARY KEY,
+                    num integer,
+                    data text)
+                """)
+
+            # Pass data to fill a query placeholders and let Psycopg perform
+            # the correct conversion (no SQL injections!)
+            cur.execute(
+                "INSERT INTO test (num, data) VALUES (%s, %s)", (100, "abc'def")
+            )
+
+            # Query the database and obtain data as Python objects.
+            cur.execute("SELECT * FROM test")
+            print(cur.fetchone())
+            # will print (1, 100, "abc'def")
+
+            # You can use `cur.executemany()` to perform an operation in batch
+            cur.executemany("INSERT INTO test (num) values (%s)", [(33,), (66,), (99,)])
+
+            # You can use `cur.fetchmany()`, `cur.fetchall()` to return a list
+            # of several records, or even iterate on the cursor
+            cur.execute("SELECT id, num FROM test order by num")
+            for record in cur:
+                print(record)
+
+            # Make the changes to the database persistent
+            conn.commit()
+
+
+if __name__ == "__main__":
+    main()
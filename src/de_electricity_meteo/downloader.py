@@ -1,14 +1,26 @@
+from __future__ import annotations
+
 import asyncio
 import io
+import logging
 from functools import wraps
 from pathlib import Path
-from typing import Any, Callable
-
-import aiofiles
-import aiohttp
+from typing import TYPE_CHECKING, Any, Callable
 
+from de_electricity_meteo._lazy import lazy_import
+from de_electricity_meteo.instrumentation import span
 from de_electricity_meteo.logger import logger
 
+if TYPE_CHECKING:
+    import aiofiles
+    import aiohttp
+else:
+    aiofiles = lazy_import("aiofiles")
+    aiohttp = lazy_import("aiohttp")
+
+# metric label of the downloads of callers that do not name their dataset
+DOWNLOAD_DATASET = "other"
+
 
 def stream_retry(
     max_retries: int = 3, start_delay: float = 1.0, backoff_factor: float = 2.0
@@ -71,15 +83,41 @@ def stream_retry(
 
 
 @stream_retry(max_retries=3)
-async def save_file(response: aiohttp.ClientResponse, path: Path, buffer_size: int):
-    """Téléchargement asynchrone pur : Réseau (aiohttp) -> Disque (aiofiles)."""
+async def save_file(
+    response: aiohttp.ClientResponse,
+    path: Path,
+    buffer_size: int,
+    dataset: str = DOWNLOAD_DATASET,
+):
+    """
+    Téléchargement asynchrone pur : Réseau (aiohttp) -> Disque (aiofiles).
+
+    `dataset` labels the metrics of the download, a stable name (not the file name,
+    which holds periods or timestamps).
+    """
     total_bytes_written = 0
 
     # Utilisation de aiofiles pour ne pas bloquer l'event loop
-    async with aiofiles.open(path, mode="wb") as f:
+    async with (
+        span("download", dataset=dataset) as stats,
+        aiofiles.open(path, mode="wb") as f,
+    ):
+        # checked once: no record is built per chunk unless debugging, the
+        # sampling of `download.chunk` then bounds the records kept
+        debug = logger.isEnabledFor(logging.DEBUG)
         async for chunk in response.content.iter_chunked(buffer_size):
             await f.write(chunk)
             total_bytes_written += len(chunk)
+            if debug:
+                logger.debug(
+                    "Chunk written",
+                    extra={
+                        "log_key": "download.chunk",
+                        "path": path,
+                        "bytes": len(chunk),
+                    },
+                )
+        stats.record(bytes_in=total_bytes_written, bytes_out=total_bytes_written)
 
     logger.info(
         "Téléchargement terminé",
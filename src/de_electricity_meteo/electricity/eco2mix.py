@@ -0,0 +1,276 @@
+"""
+Unified eco2mix half-hourly time series (regional and national).
+
+eco2mix is published in three regimes: définitives (2013–2023), consolidées (2024)
+and temps réel (current year). The regional and national exports of every regime are
+normalized into one typed schema, overlapping periods are resolved by source
+precedence with a single sort-and-dedup pass, and the result is written as parquet
+partitioned by year and region (`annee=YYYY/code_region=XX/`).
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import ECO2MIX_BRONZE, ECO2MIX_SILVER
+from de_electricity_meteo.downloader import save_file
+from de_electricity_meteo.enums import Eco2mixNature
+from de_electricity_meteo.instrumentation import record, span
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.loop_monitor import LoopMonitor
+from de_electricity_meteo.profiling import collect
+from de_electricity_meteo.schemas import check_parquet
+
+DATASETS = [
+    "eco2mix-regional-cons-def",
+    "eco2mix-regional-tr",
+    "eco2mix-national-cons-def",
+    "eco2mix-national-tr",
+]
+
+DOWNLOAD_URL = (
+    "https://odre.opendatasoft.com/api/explore/v2.1/catalog/datasets/"
+    "{dataset}/exports/parquet?lang=fr&timezone=UTC"
+)
+
+# code used as region for the national perimeter
+NATIONAL_CODE_REGION = "FR"
+
+# eco2mix publishes the local date and time, the year partitions follow it
+LOCAL_TIME_ZONE = "Europe/Paris"
+
+NATURE_DTYPE = pl.Enum([nature.value for nature in Eco2mixNature])
+
+PARTITION_SCHEMA = {"annee": pl.Int32, "code_region": pl.String}
+PARTITION_KEYS = list(PARTITION_SCHEMA)
+
+# power (MW) except taux_co2 (g/kWh), the national exports detail the fossil fuels
+MEASURES = [
+    "consommation",
+    "thermique",
+    "fioul",
+    "charbon",
+    "gaz",
+    "nucleaire",
+    "eolien",
+    "eolien_terrestre",
+    "eolien_offshore",
+    "solaire",
+    "hydraulique",
+    "pompage",
+    "bioenergies",
+    "ech_physiques",
+    "stockage_batterie",
+    "destockage_batterie",
+    "taux_co2",
+]
+
+
+def bronze_path(dataset: str) -> Path:
+    return ECO2MIX_BRONZE / f"{dataset}.parquet"
+
+
+def schema_source(path: Path) -> str:
+    """
+    Source of an export in `schemas`, from its dataset name.
+    """
+    return "eco2mix_regional" if "regional" in path.name else "eco2mix_national"
+
+
+async def download(datasets: Sequence[str] = DATASETS) -> None:
+    async def download_dataset(dataset: str) -> None:
+        url = DOWNLOAD_URL.format(dataset=dataset)
+        try:
+            await save_file(url=url, path=bronze_path(dataset), dataset="eco2mix")
+        except Exception as e:
+            logger.error(f"Failed to download {url}. Error: {e}")
+
+    ECO2MIX_BRONZE.mkdir(parents=True, exist_ok=True)
+    async with LoopMonitor("eco2mix.download"):
+        await asyncio.gather(*[download_dataset(dataset) for dataset in datasets])
+
+
+def _date_heure_utc(dtype: pl.DataType) -> pl.Expr:
+    """
+    Converts `date_heure` to UTC whatever the type it was exported with.
+    """
+    date_heure = pl.col("date_heure")
+    if dtype == pl.String:
+        return date_heure.str.to_datetime(time_zone="UTC")
+    if isinstance(dtype, pl.Datetime) and dtype.time_zone is None:
+        return date_heure.dt.replace_time_zone("UTC")
+    return date_heure.dt.convert_time_zone("UTC")
+
+
+def normalize(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Maps a regional or national eco2mix export onto the unified typed schema.
+
+    Columns outside the schema (such as the stray `column_30` of the définitives
+    export) are dropped, missing measures are null.
+
+    Args:
+        lf (pl.LazyFrame): Raw eco2mix export.
+
+    Returns:
+        pl.LazyFrame: `code_region`, `perimetre`, `nature`, `date_heure` (UTC),
+            `annee` and the measures as Float64.
+    """
+    schema = lf.collect_schema()
+
+    if "code_insee_region" in schema:
+        code_region = pl.col("code_insee_region").cast(pl.String)
+        perimetre = pl.col("libelle_region")
+    else:
+        code_region = pl.lit(NATIONAL_CODE_REGION)
+        perimetre = pl.col("perimetre")
+
+    measures = {
+        measure: pl.col(measure).cast(pl.Float64)
+        if measure in schema
+        else pl.lit(None, dtype=pl.Float64)
+        for measure in MEASURES
+    }
+    fuels = [fuel for fuel in ("fioul", "charbon", "gaz") if fuel in schema]
+    if "thermique" not in schema and fuels:
+        measures["thermique"] = pl.sum_horizontal(fuels).cast(pl.Float64)
+
+    return (
+        lf.select(
+            code_region.alias("code_region"),
+            perimetre.cast(pl.String).alias("perimetre"),
+            pl.col("nature").cast(NATURE_DTYPE),
+            _date_heure_utc(schema["date_heure"]).alias("date_heure"),
+            *[expression.alias(measure) for measure, expression in measures.items()],
+        )
+        .filter(pl.col("date_heure").is_not_null())
+        .with_columns(
+            pl.col("date_heure")
+            .dt.convert_time_zone(LOCAL_TIME_ZONE)
+            .dt.year()
+            .alias("annee"),
+        )
+    )
+
+
+def unify(sources: Iterable[pl.LazyFrame]) -> pl.LazyFrame:
+    """
+    Merges normalized sources, keeping the most final publication of each period.
+
+    Args:
+        sources (Iterable[pl.LazyFrame]): Normalized eco2mix sources.
+
+    Returns:
+        pl.LazyFrame: One row per (code_region, date_heure), sorted on both.
+    """
+    return (
+        pl.concat(sources, how="diagonal_relaxed")
+        # the Enum physical order is the precedence order
+        .sort("code_region", "date_heure", pl.col("nature").to_physical())
+        .unique(subset=["code_region", "date_heure"], keep="first", maintain_order=True)
+    )
+
+
+def _write_atomic(df: pl.DataFrame, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    df.write_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    record(rows_out=len(df), bytes_out=path.stat().st_size)
+
+
+def write_partitions(df: pl.DataFrame, output_dir: Path = ECO2MIX_SILVER) -> int:
+    """
+    Writes (and replaces) the year/region partitions present in a frame.
+
+    Partitions absent from the frame are left untouched.
+
+    Args:
+        df (pl.DataFrame): Unified eco2mix rows.
+        output_dir (Path): Root of the partitioned dataset.
+
+    Returns:
+        int: Number of partitions written.
+    """
+    partitions = df.partition_by(PARTITION_KEYS, as_dict=True, include_key=False)
+    for (annee, code_region), partition in partitions.items():
+        _write_atomic(
+            partition.sort("date_heure"),
+            output_dir / f"annee={annee}" / f"code_region={code_region}" / "0.parquet",
+        )
+
+    logger.info(
+        "eco2mix partitions written",
+        extra={"path": output_dir, "partitions": len(partitions), "rows": len(df)},
+    )
+
+    return len(partitions)
+
+
+def scan_silver(output_dir: Path = ECO2MIX_SILVER) -> pl.LazyFrame:
+    """
+    Scans the partitioned series, filters on `annee` and `code_region` prune files.
+
+    Args:
+        output_dir (Path): Root of the partitioned dataset.
+
+    Returns:
+        pl.LazyFrame: The unified eco2mix series.
+    """
+    return pl.scan_parquet(
+        output_dir / "**/*.parquet",
+        hive_partitioning=True,
+        hive_schema=PARTITION_SCHEMA,
+    )
+
+
+def build(
+    paths: Sequence[Path],
+    output_dir: Path = ECO2MIX_SILVER,
+    years: Sequence[int] | None = None,
+) -> int:
+    """
+    Builds the unified series from the bronze exports and writes its partitions.
+
+    Args:
+        paths (Sequence[Path]): eco2mix exports, any regime and perimeter.
+        output_dir (Path): Root of the partitioned dataset.
+        years (Sequence[int] | None): Only rebuild these years, all when None.
+
+    Returns:
+        int: Number of partitions written.
+    """
+    with span("eco2mix.build", dataset="eco2mix") as stats:
+        stats.record(bytes_in=sum(path.stat().st_size for path in paths))
+        for path in paths:
+            # from the footers, before reading any data
+            check_parquet(schema_source(path), path)
+        sources = [normalize(pl.scan_parquet(path)) for path in paths]
+        if years is not None:
+            sources = [
+                source.filter(pl.col("annee").is_in(years)) for source in sources
+            ]
+
+        df = collect(unify(sources), stage="eco2mix.build")
+        stats.record(rows_in=len(df))
+        return write_partitions(df, output_dir=output_dir)
+
+
+@span("eco2mix.pipeline", dataset="eco2mix", export=True)
+async def pipeline(years: Sequence[int] | None = None) -> None:
+    await download()
+    build(
+        paths=[
+            bronze_path(dataset)
+            for dataset in DATASETS
+            if bronze_path(dataset).exists()
+        ],
+        years=years,
+    )
+
+
+if __name__ == "__main__":
+    print([DOWNLOAD_URL.format(dataset=dataset) for dataset in DATASETS])
@@ -0,0 +1,215 @@
+"""
+Completeness checks of the unified eco2mix series.
+
+The expected (region, timestamp) grid is built lazily in UTC, where every day of the
+series has the same number of half-hours; DST days only differ once converted to
+Europe/Paris (46 or 50 half-hours). The grid is anti-joined against the data and the
+missing timestamps are run-length encoded into gap intervals, persisted as the gap
+index used to backfill exactly the holes.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import ECO2MIX_GAPS_SILVER, ECO2MIX_SILVER
+from de_electricity_meteo.electricity.eco2mix import LOCAL_TIME_ZONE, scan_silver
+from de_electricity_meteo.logger import logger
+
+KEYS = ["code_region", "date_heure"]
+
+GAP_INDEX_SCHEMA = {
+    "code_region": pl.String,
+    "debut": pl.Datetime("us", "UTC"),
+    "fin": pl.Datetime("us", "UTC"),
+    "nb_manquants": pl.UInt32,
+}
+
+
+@dataclass(frozen=True)
+class CompletenessReport:
+    """
+    Anomalies found in an eco2mix series.
+
+    Attributes:
+        gaps (pl.DataFrame): Missing intervals (`code_region`, `debut`, `fin`,
+            `nb_manquants`), bounds included.
+        duplicates (pl.DataFrame): Timestamps published more than once per region.
+        off_grid (pl.DataFrame): Timestamps not aligned on the expected step.
+    """
+
+    gaps: pl.DataFrame
+    duplicates: pl.DataFrame
+    off_grid: pl.DataFrame
+
+
+def _as_utc(value: datetime) -> datetime:
+    """
+    Converts a bound to UTC, naive datetimes are considered as UTC already.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+def expected_grid(
+    series: pl.LazyFrame,
+    step: timedelta = timedelta(minutes=30),
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> pl.LazyFrame:
+    """
+    Builds the expected (code_region, date_heure) grid.
+
+    Args:
+        series (pl.LazyFrame): eco2mix series with `code_region` and `date_heure`.
+        step (timedelta): Expected time step of the series.
+        start (datetime | None): First expected timestamp (UTC), first timestamp
+            of each region when None.
+        end (datetime | None): Last expected timestamp (UTC), last timestamp of
+            each region when None.
+
+    Returns:
+        pl.LazyFrame: One row per expected timestamp and region.
+    """
+    bounds = series.group_by("code_region").agg(
+        pl.col("date_heure").min().dt.truncate(step).alias("debut"),
+        pl.col("date_heure").max().alias("fin"),
+    )
+    if start is not None:
+        bounds = bounds.with_columns(pl.lit(_as_utc(start)).alias("debut"))
+    if end is not None:
+        bounds = bounds.with_columns(pl.lit(_as_utc(end)).alias("fin"))
+
+    return bounds.select(
+        "code_region",
+        pl.datetime_ranges("debut", "fin", interval=step, time_zone="UTC").alias(
+            "date_heure"
+        ),
+    ).explode("date_heure")
+
+
+def encode_gaps(missing: pl.LazyFrame, step: timedelta) -> pl.LazyFrame:
+    """
+    Run-length encodes missing timestamps into intervals.
+
+    Args:
+        missing (pl.LazyFrame): Missing (code_region, date_heure) pairs.
+        step (timedelta): Time step of the series.
+
+    Returns:
+        pl.LazyFrame: One row per gap, see `GAP_INDEX_SCHEMA`.
+    """
+    return (
+        missing.sort(KEYS)
+        .with_columns(
+            (pl.col("date_heure").diff().over("code_region") != step)
+            .fill_null(True)
+            .cum_sum()
+            .alias("_gap")
+        )
+        .group_by("code_region", "_gap")
+        .agg(
+            pl.col("date_heure").min().alias("debut"),
+            pl.col("date_heure").max().alias("fin"),
+            pl.len().alias("nb_manquants"),
+        )
+        .select(pl.col(name).cast(dtype) for name, dtype in GAP_INDEX_SCHEMA.items())
+        .sort("code_region", "debut")
+    )
+
+
+def check_completeness(
+    series: pl.LazyFrame,
+    step: timedelta = timedelta(minutes=30),
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> CompletenessReport:
+    """
+    Detects the gaps, duplicates and off-grid timestamps of a series.
+
+    All checks are collected together, so the series is scanned only once.
+
+    Args:
+        series (pl.LazyFrame): eco2mix series with `code_region` and `date_heure`.
+        step (timedelta): Expected time step of the series.
+        start (datetime | None): First expected timestamp, see `expected_grid`.
+        end (datetime | None): Last expected timestamp, see `expected_grid`.
+
+    Returns:
+        CompletenessReport: The anomalies found.
+    """
+    keys = series.select(KEYS)
+    on_grid = pl.col("date_heure") == pl.col("date_heure").dt.truncate(step)
+    local_time = pl.col("date_heure").dt.convert_time_zone(LOCAL_TIME_ZONE)
+
+    missing = expected_grid(keys, step=step, start=start, end=end).join(
+        keys, on=KEYS, how="anti"
+    )
+    duplicates = (
+        keys.group_by(KEYS)
+        .agg(pl.len().alias("nb_occurrences"))
+        .filter(pl.col("nb_occurrences") > 1)
+        .sort(KEYS)
+    )
+    off_grid = keys.filter(~on_grid).with_columns(local_time.alias("heure_locale"))
+
+    gaps, duplicates, off_grid = pl.collect_all(
+        [encode_gaps(missing, step=step), duplicates, off_grid.sort(KEYS)]
+    )
+
+    logger.info(
+        "eco2mix completeness checked",
+        extra={
+            "gaps": len(gaps),
+            "missing": int(gaps["nb_manquants"].sum()),
+            "duplicates": len(duplicates),
+            "off_grid": len(off_grid),
+        },
+    )
+
+    return CompletenessReport(gaps=gaps, duplicates=duplicates, off_grid=off_grid)
+
+
+def update_gap_index(
+    dataset_dir: Path = ECO2MIX_SILVER,
+    path: Path = ECO2MIX_GAPS_SILVER,
+    end: datetime | None = None,
+) -> CompletenessReport:
+    """
+    Checks the partitioned eco2mix series and persists its gap index.
+
+    Args:
+        dataset_dir (Path): Root of the partitioned eco2mix series.
+        path (Path): Destination of the gap index.
+        end (datetime | None): Last expected timestamp, see `expected_grid`.
+
+    Returns:
+        CompletenessReport: The anomalies found.
+    """
+    report = check_completeness(scan_silver(dataset_dir), end=end)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    report.gaps.write_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+    return report
+
+
+def load_gap_index(path: Path = ECO2MIX_GAPS_SILVER) -> pl.DataFrame:
+    """
+    Reads the persisted gap index, empty when it was never computed.
+
+    Args:
+        path (Path): Location of the gap index.
+
+    Returns:
+        pl.DataFrame: One row per gap, see `GAP_INDEX_SCHEMA`.
+    """
+    if not path.exists():
+        return pl.DataFrame(schema=GAP_INDEX_SCHEMA)
+    return pl.read_parquet(path)
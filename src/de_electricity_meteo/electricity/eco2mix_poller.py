@@ -0,0 +1,312 @@
+"""
+Incremental poller of the eco2mix real-time datasets.
+
+A high-water mark (last `date_heure` received) is persisted per perimeter, each poll
+only requests the newer records through an Opendatasoft `where` clause and stores
+them as a small sorted parquet fragment. `compact` periodically merges the fragments
+into the partitions of the unified series (see `eco2mix.py`), and `backfill_gaps`
+requests exactly the holes listed in the gap index.
+"""
+
+import asyncio
+import json
+import os
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Sequence
+from urllib.parse import urlencode
+from zoneinfo import ZoneInfo
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import (
+    ECO2MIX_SILVER,
+    ECO2MIX_TEMPS_REEL_BRONZE,
+)
+from de_electricity_meteo.downloader import save_file
+from de_electricity_meteo.electricity.eco2mix import (
+    LOCAL_TIME_ZONE,
+    NATIONAL_CODE_REGION,
+    normalize,
+    scan_silver,
+    unify,
+    write_partitions,
+)
+from de_electricity_meteo.electricity.eco2mix_completeness import load_gap_index
+from de_electricity_meteo.logger import logger
+
+EXPORT_URL = (
+    "https://odre.opendatasoft.com/api/explore/v2.1/catalog/datasets/"
+    "{dataset}/exports/parquet"
+)
+
+# metropolitan regions published by eco2mix (Corse excluded)
+REGION_CODES = ["11", "24", "27", "28", "32", "44", "52", "53", "75", "76", "84", "93"]
+PERIMETERS = [*REGION_CODES, NATIONAL_CODE_REGION]
+
+WATERMARKS = ECO2MIX_TEMPS_REEL_BRONZE / "watermarks.json"
+FRAGMENTS = ECO2MIX_TEMPS_REEL_BRONZE / "fragments"
+
+
+def _odsql_datetime(value: datetime) -> str:
+    return f"date'{value.astimezone(UTC).isoformat()}'"
+
+
+def export_url(code_region: str, where: str, temps_reel: bool = True) -> str:
+    """
+    Builds the parquet export URL of one perimeter, restricted by a `where` clause.
+
+    Args:
+        code_region (str): INSEE code of the region, or `NATIONAL_CODE_REGION`.
+        where (str): ODSQL condition on the records.
+        temps_reel (bool): Whether to query the real-time dataset or the
+            définitives/consolidées one.
+
+    Returns:
+        str: The export URL.
+    """
+    perimeter = "national" if code_region == NATIONAL_CODE_REGION else "regional"
+    regime = "tr" if temps_reel else "cons-def"
+
+    # the real-time datasets also hold the (empty) rest of the current day
+    clauses = [where, "consommation is not null"]
+    if code_region != NATIONAL_CODE_REGION:
+        clauses.insert(0, f'code_insee_region = "{code_region}"')
+
+    query = urlencode(
+        {"where": " and ".join(clauses), "order_by": "date_heure", "timezone": "UTC"}
+    )
+    return f"{EXPORT_URL.format(dataset=f'eco2mix-{perimeter}-{regime}')}?{query}"
+
+
+def load_watermarks(path: Path = WATERMARKS) -> dict[str, datetime]:
+    """
+    Reads the high-water mark of every perimeter.
+
+    Args:
+        path (Path): Location of the persisted watermarks.
+
+    Returns:
+        dict[str, datetime]: Last `date_heure` received per perimeter.
+    """
+    if not path.exists():
+        return {}
+    with path.open(mode="rt", encoding="utf-8") as f:
+        return {
+            code: datetime.fromisoformat(mark) for code, mark in json.load(f).items()
+        }
+
+
+def save_watermarks(watermarks: dict[str, datetime], path: Path = WATERMARKS) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open(mode="wt", encoding="utf-8") as f:
+        json.dump({code: mark.isoformat() for code, mark in watermarks.items()}, f)
+    os.replace(tmp_path, path)
+
+
+def initial_watermark(code_region: str, silver_dir: Path = ECO2MIX_SILVER) -> datetime:
+    """
+    Watermark of a perimeter never polled: the end of the unified series, or the
+    start of the current (local) year when the series was never built.
+    """
+    if any(silver_dir.glob(f"*/code_region={code_region}/*.parquet")):
+        latest = (
+            scan_silver(silver_dir)
+            .filter(pl.col("code_region") == code_region)
+            .select(pl.col("date_heure").max())
+            .collect()
+            .item()
+        )
+        if latest is not None:
+            return latest
+
+    now = datetime.now(ZoneInfo(LOCAL_TIME_ZONE))
+    return datetime(now.year, 1, 1, tzinfo=ZoneInfo(LOCAL_TIME_ZONE))
+
+
+async def fetch_fragment(url: str, path: Path) -> pl.DataFrame | None:
+    """
+    Downloads records into a fragment sorted on `date_heure`.
+
+    Args:
+        url (str): Export URL (see `export_url`).
+        path (Path): Destination of the fragment.
+
+    Returns:
+        pl.DataFrame | None: The records, None (and no fragment) when empty.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    await save_file(url=url, path=path, dataset="eco2mix")
+
+    fragment = pl.read_parquet(path)
+    if fragment.is_empty():
+        path.unlink()
+        return None
+
+    if not fragment["date_heure"].is_sorted():
+        fragment = fragment.sort("date_heure")
+        fragment.write_parquet(path)
+
+    return fragment
+
+
+async def poll(
+    perimeters: Sequence[str] = PERIMETERS,
+    watermarks_path: Path = WATERMARKS,
+    fragments_dir: Path = FRAGMENTS,
+    silver_dir: Path = ECO2MIX_SILVER,
+) -> dict[str, int]:
+    """
+    Fetches the records newer than the watermark of every perimeter.
+
+    Args:
+        perimeters (Sequence[str]): Region codes (and/or `NATIONAL_CODE_REGION`).
+        watermarks_path (Path): Location of the persisted watermarks.
+        fragments_dir (Path): Root directory of the fragments.
+        silver_dir (Path): Unified series, the initial watermarks are its end.
+
+    Returns:
+        dict[str, int]: Number of new records per perimeter.
+    """
+    watermarks = load_watermarks(watermarks_path)
+
+    async def poll_perimeter(code_region: str) -> int:
+        watermark = watermarks.get(code_region) or initial_watermark(
+            code_region, silver_dir
+        )
+        fragment = await fetch_fragment(
+            url=export_url(code_region, f"date_heure > {_odsql_datetime(watermark)}"),
+            path=fragments_dir
+            / f"code_region={code_region}"
+            / f"{watermark.astimezone(UTC):%Y%m%dT%H%M%S}.parquet",
+        )
+        if fragment is None:
+            return 0
+
+        # `date_heure` may be exported as a string, compared once in UTC
+        watermarks[code_region] = (
+            normalize(fragment.lazy())
+            .select(pl.col("date_heure").max())
+            .collect()
+            .item()
+        )
+        return len(fragment)
+
+    results = await asyncio.gather(
+        *[poll_perimeter(code_region) for code_region in perimeters],
+        return_exceptions=True,
+    )
+
+    new_records = {}
+    for code_region, result in zip(perimeters, results):
+        if isinstance(result, BaseException):
+            logger.error(
+                "eco2mix poll failed",
+                extra={"code_region": code_region, "error": str(result)},
+            )
+        else:
+            new_records[code_region] = result
+
+    # only the perimeters that succeeded moved their watermark
+    save_watermarks(watermarks, watermarks_path)
+    logger.info("eco2mix polled", extra={"new_records": new_records})
+
+    return new_records
+
+
+async def backfill_gaps(
+    gaps: pl.DataFrame | None = None, fragments_dir: Path = FRAGMENTS
+) -> int:
+    """
+    Requests exactly the intervals listed in the gap index.
+
+    Args:
+        gaps (pl.DataFrame | None): Gaps to fill, the persisted gap index when None.
+        fragments_dir (Path): Root directory of the fragments.
+
+    Returns:
+        int: Number of records fetched.
+    """
+    if gaps is None:
+        gaps = load_gap_index()
+
+    current_year = datetime.now(ZoneInfo(LOCAL_TIME_ZONE)).year
+
+    async def backfill_gap(code_region: str, debut: datetime, fin: datetime) -> int:
+        where = (
+            f"date_heure >= {_odsql_datetime(debut)} "
+            f"and date_heure <= {_odsql_datetime(fin)}"
+        )
+        fragment = await fetch_fragment(
+            url=export_url(
+                code_region,
+                where,
+                temps_reel=debut.astimezone(ZoneInfo(LOCAL_TIME_ZONE)).year
+                >= current_year,
+            ),
+            path=fragments_dir
+            / f"code_region={code_region}"
+            / f"backfill-{debut.astimezone(UTC):%Y%m%dT%H%M%S}.parquet",
+        )
+        return 0 if fragment is None else len(fragment)
+
+    fetched = await asyncio.gather(
+        *[
+            backfill_gap(code_region, debut, fin)
+            for code_region, debut, fin in gaps.select(
+                "code_region", "debut", "fin"
+            ).iter_rows()
+        ]
+    )
+
+    logger.info(
+        "eco2mix gaps backfilled", extra={"gaps": len(gaps), "records": sum(fetched)}
+    )
+
+    return sum(fetched)
+
+
+def compact(fragments_dir: Path = FRAGMENTS, output_dir: Path = ECO2MIX_SILVER) -> int:
+    """
+    Merges the fragments into the partitions of the unified series.
+
+    Only the partitions touched by the fragments are rewritten, source precedence
+    is preserved (a real-time record never replaces a consolidated one).
+
+    Args:
+        fragments_dir (Path): Root directory of the fragments.
+        output_dir (Path): Root of the partitioned unified series.
+
+    Returns:
+        int: Number of fragments merged.
+    """
+    fragments = sorted(fragments_dir.rglob("*.parquet"))
+    if not fragments:
+        return 0
+
+    new_rows = unify(normalize(pl.scan_parquet(path)) for path in fragments).collect()
+    sources = [new_rows.lazy()]
+
+    if any(output_dir.rglob("*.parquet")):
+        sources.append(
+            scan_silver(output_dir).filter(
+                pl.col("annee").is_in(new_rows["annee"].unique().to_list())
+                & pl.col("code_region").is_in(
+                    new_rows["code_region"].unique().to_list()
+                )
+            )
+        )
+
+    write_partitions(unify(sources).collect(), output_dir=output_dir)
+    for path in fragments:
+        path.unlink()
+
+    logger.info("eco2mix fragments compacted", extra={"fragments": len(fragments)})
+
+    return len(fragments)
+
+
+if __name__ == "__main__":
+    asyncio.run(poll())
+    compact()
@@ -0,0 +1,228 @@
+"""
+Reconciliation of the ODRE registry against the capacity published by RTE.
+
+Metrics are declared as (measure, filter, grouping) and compiled into a single lazy
+query made of conditional aggregations: every metric sharing the same grouping is
+computed by the same aggregation, and all aggregations share one scan of the
+registry thanks to common subplan elimination.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+import polars as pl
+
+from de_electricity_meteo.electricity.odre_registre_cube import DOM_REGIONS
+from de_electricity_meteo.logger import logger
+
+# https://www.rte-france.com/donnees-publications/eco2mix-donnees-temps-reel/chiffres-cles-electricite#parc-France
+RTE_PARC_FRANCE_MW = {
+    "charbon": 1810,
+    "bioenergies": 2277,
+    "fioul": 2623,
+    "gaz": 12462,
+    "eolien": 25512,
+    "hydraulique": 25524,
+    "solaire": 28761,
+    "nucleaire": 62990,
+}
+
+
+@dataclass(frozen=True)
+class Metric:
+    """
+    Declaration of a figure computed on the registry.
+
+    Attributes:
+        name (str): Unique name of the metric, used to match reference values.
+        measure (str): Column summed by the metric.
+        where (pl.Expr | None): Rows kept for the metric, all rows when None.
+        by (str | None): Column the metric is grouped on, grand total when None.
+    """
+
+    name: str
+    measure: str
+    where: pl.Expr | None = None
+    by: str | None = None
+
+    def expression(self) -> pl.Expr:
+        """
+        Returns the conditional aggregation computing the metric.
+        """
+        measure = pl.col(self.measure)
+        if self.where is not None:
+            measure = measure.filter(self.where)
+        return measure.sum().alias(self.name)
+
+
+@dataclass(frozen=True)
+class ReconciliationReport:
+    """
+    Result of a reconciliation run.
+
+    Attributes:
+        figures (pl.DataFrame): One row per metric (and group for grouped metrics)
+            with the computed value, the reference and the deltas.
+        runtime_s (float): Wall time spent computing the figures, in seconds.
+    """
+
+    figures: pl.DataFrame
+    runtime_s: float
+
+
+def compile_metrics(
+    registry: pl.LazyFrame, metrics: Sequence[Metric]
+) -> list[pl.LazyFrame]:
+    """
+    Compiles metrics into one aggregation query per grouping.
+
+    Every query is in long format (metric, group, value) and derives from the same
+    registry plan, so collecting them together scans the registry once.
+
+    Args:
+        registry (pl.LazyFrame): Registry snapshot (bronze columns).
+        metrics (Sequence[Metric]): Metrics to compute.
+
+    Returns:
+        list[pl.LazyFrame]: Queries to collect together with `pl.collect_all`.
+
+    Raises:
+        ValueError: If two metrics share the same name.
+    """
+    names = [metric.name for metric in metrics]
+    duplicated_names = {name for name in names if names.count(name) > 1}
+    if duplicated_names:
+        raise ValueError(f"Metric names must be unique, got {duplicated_names} twice")
+
+    metrics_by_grouping: dict[str | None, list[Metric]] = {}
+    for metric in metrics:
+        metrics_by_grouping.setdefault(metric.by, []).append(metric)
+
+    queries = []
+    for by, grouped_metrics in metrics_by_grouping.items():
+        expressions = [metric.expression() for metric in grouped_metrics]
+        if by is None:
+            query = registry.select(expressions).with_columns(
+                pl.lit(None, dtype=pl.String).alias("group")
+            )
+        else:
+            query = registry.group_by(pl.col(by).cast(pl.String).alias("group")).agg(
+                expressions
+            )
+
+        queries.append(
+            query.unpivot(
+                index="group",
+                on=[metric.name for metric in grouped_metrics],
+                variable_name="metric",
+                value_name="value",
+            ).select(
+                pl.col("metric"),
+                pl.col("group"),
+                pl.col("value").cast(pl.Float64),
+            )
+        )
+
+    return queries
+
+
+def reconcile(
+    registry: pl.LazyFrame,
+    metrics: Sequence[Metric],
+    references: Mapping[str, float | Mapping[str, float]] | None = None,
+) -> ReconciliationReport:
+    """
+    Computes all metrics in one scan and compares them with reference values.
+
+    Args:
+        registry (pl.LazyFrame): Registry snapshot (bronze columns).
+        metrics (Sequence[Metric]): Metrics to compute.
+        references (Mapping[str, float | Mapping[str, float]] | None): Reference value
+            per metric name, or per group value for grouped metrics.
+
+    Returns:
+        ReconciliationReport: Computed figures, deltas and runtime.
+    """
+    start = time.perf_counter()
+    figures = pl.concat(pl.collect_all(compile_metrics(registry, metrics)))
+    runtime_s = time.perf_counter() - start
+
+    reference_rows = []
+    for name, reference in (references or {}).items():
+        if isinstance(reference, (int, float)):
+            reference_rows.append((name, None, float(reference)))
+        else:
+            reference_rows += [
+                (name, str(group), float(value)) for group, value in reference.items()
+            ]
+
+    reference_df = pl.DataFrame(
+        reference_rows,
+        schema={"metric": pl.String, "group": pl.String, "reference": pl.Float64},
+        orient="row",
+    )
+
+    figures = figures.join(
+        reference_df, on=["metric", "group"], how="left", nulls_equal=True
+    ).with_columns(
+        (pl.col("value") - pl.col("reference")).alias("delta"),
+        ((pl.col("value") / pl.col("reference") - 1) * 100).round(2).alias("delta_pct"),
+    )
+
+    logger.info(
+        "Registry reconciled",
+        extra={"metrics": len(metrics), "runtime_s": round(runtime_s, 4)},
+    )
+
+    return ReconciliationReport(figures=figures, runtime_s=runtime_s)
+
+
+def rte_parc_metrics(commissioning_year: int = 2025) -> list[Metric]:
+    """
+    Metrics used to reconcile the registry with the capacity published by RTE.
+
+    Args:
+        commissioning_year (int): Year of the commissioning metric, the capacity
+            commissioned during the current year is not published by RTE yet.
+
+    Returns:
+        list[Metric]: Capacity metrics on metropolitan France (kW).
+    """
+    hors_dom = ~pl.col("region").is_in(DOM_REGIONS)
+    is_aggregate = pl.col("codeeicresourceobject").fill_null("") == ""
+
+    return [
+        Metric("puismaxinstallee_hors_dom", "puismaxinstallee", hors_dom),
+        Metric("puismaxcharge_hors_dom", "puismaxcharge", hors_dom),
+        Metric("puismaxraccharge_hors_dom", "puismaxraccharge", hors_dom),
+        Metric(
+            "puismaxinstallee_hors_dom_mise_en_service_annee",
+            "puismaxinstallee",
+            hors_dom
+            & (pl.col("datemiseenservice_date").dt.year() == commissioning_year),
+        ),
+        Metric(
+            "puismaxinstallee_hors_dom_en_retrait_provisoire",
+            "puismaxinstallee",
+            hors_dom & (pl.col("regime") == "En retrait provisoire"),
+        ),
+        Metric(
+            "puismaxinstallee_hors_dom_aggregations",
+            "puismaxinstallee",
+            hors_dom & is_aggregate,
+        ),
+        Metric(
+            "puismaxinstallee_hors_dom_par_filiere",
+            "puismaxinstallee",
+            hors_dom & ~is_aggregate,
+            by="filiere",
+        ),
+    ]
+
+
+def rte_parc_references() -> dict[str, float]:
+    """
+    Reference values matching `rte_parc_metrics`, converted from MW to kW.
+    """
+    return {"puismaxinstallee_hors_dom": sum(RTE_PARC_FRANCE_MW.values()) * 1000.0}
@@ -0,0 +1,252 @@
+"""
+Gold capacity cube built from the ODRE national registry.
+
+The cube pre-aggregates the registry measures on a small set of dimensions so that
+the usual rollups (by filière, region, technology, régime, with or without DOM and
+aggregated rows) are answered from a few thousand rows instead of the raw export.
+"""
+
+import os
+from pathlib import Path
+from typing import Sequence
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import ODRE_REGISTRE_CAPACITY_CUBE_GOLD
+from de_electricity_meteo.logger import logger
+
+# regions not included in the figures published by RTE
+DOM_REGIONS = ["Martinique", "Guadeloupe", "Guyane", "La Réunion"]
+
+CUBE_KEYS = [
+    "region",
+    "filiere",
+    "technologie",
+    "regime",
+    "mois_mise_en_service",
+    "is_aggregate",
+]
+
+CUBE_MEASURES = [
+    # capacity (kW)
+    "puismaxinstallee",
+    "puismaxcharge",
+    "puismaxraccharge",
+    "puismaxrac",
+    "puismaxinstalleedischarge",
+    # energy (MWh)
+    "energiestockable",
+    "energieannuelleglissanteinjectee",
+    "energieannuelleglissanteproduite",
+    "energieannuelleglissantesoutiree",
+    "energieannuelleglissantestockee",
+]
+
+CUBE_COUNTS = ["nbinstallations", "nb_lignes"]
+
+# multiplicity of a delta row, +1 opened and -1 closed
+SIGN = "_sign"
+
+
+def _cube_rows(registry: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Projects raw registry rows onto the cube dimensions and measures.
+
+    Rows without `codeeicresourceobject` are the aggregations of small installations
+    published by the registry, they are flagged with `is_aggregate`.
+    """
+    return registry.select(
+        pl.col("region"),
+        pl.col("filiere"),
+        pl.col("technologie"),
+        pl.col("regime"),
+        pl.col("datemiseenservice_date")
+        .cast(pl.Date)
+        .dt.truncate("1mo")
+        .alias("mois_mise_en_service"),
+        (pl.col("codeeicresourceobject").fill_null("") == "").alias("is_aggregate"),
+        *[pl.col(measure).cast(pl.Float64) for measure in CUBE_MEASURES],
+        pl.col("nbinstallations").cast(pl.Int64),
+    )
+
+
+def _aggregate(rows: pl.LazyFrame, sign: str | None = None) -> pl.LazyFrame:
+    """
+    Aggregates (optionally signed) registry rows on the cube keys.
+
+    Args:
+        rows (pl.LazyFrame): Rows projected with `_cube_rows`.
+        sign (str | None): Column of the multiplicity of each row, negative for
+            removed rows; every row counts once when None.
+
+    Returns:
+        pl.LazyFrame: One row per combination of cube keys.
+    """
+    if sign is None:
+        return rows.group_by(CUBE_KEYS).agg(
+            pl.col(*CUBE_MEASURES, "nbinstallations").sum(),
+            pl.len().cast(pl.Int64).alias("nb_lignes"),
+        )
+
+    return rows.group_by(CUBE_KEYS).agg(
+        *[(pl.col(measure) * pl.col(sign)).sum() for measure in CUBE_MEASURES],
+        (pl.col("nbinstallations") * pl.col(sign)).sum(),
+        pl.col(sign).sum().alias("nb_lignes"),
+    )
+
+
+def build_cube(registry: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Builds the full cube from a registry snapshot.
+
+    Args:
+        registry (pl.LazyFrame): Raw registry snapshot (bronze columns).
+
+    Returns:
+        pl.LazyFrame: The capacity cube, sorted on its keys.
+    """
+    return _aggregate(_cube_rows(registry)).sort(CUBE_KEYS, nulls_last=True)
+
+
+def registry_delta(opened: pl.LazyFrame, closed: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Computes the cube contribution of the rows changed by a snapshot.
+
+    The changed rows are the ones the versioned store recorded when the snapshot
+    was ingested (see `odre_registre_versions.snapshot_changes`), so the cost
+    follows the change volume instead of the size of the registry.
+
+    Args:
+        opened (pl.LazyFrame): Rows that appeared (or changed) in the snapshot.
+        closed (pl.LazyFrame): Rows that disappeared (or changed) in the snapshot.
+
+    Returns:
+        pl.LazyFrame: Signed aggregates to add to the cube, one row per touched key.
+    """
+    signed_rows: list[pl.LazyFrame] = [
+        _cube_rows(rows).with_columns(pl.lit(sign, dtype=pl.Int64).alias(SIGN))
+        for rows, sign in ((opened, 1), (closed, -1))
+    ]
+    return _aggregate(pl.concat(signed_rows, how="vertical_relaxed"), sign=SIGN)
+
+
+def apply_delta(cube: pl.LazyFrame, delta: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Merges a signed delta (see `registry_delta`) into an existing cube.
+
+    Cells left without any registry row are removed.
+
+    Args:
+        cube (pl.LazyFrame): Current cube.
+        delta (pl.LazyFrame): Signed aggregates computed from the registry delta.
+
+    Returns:
+        pl.LazyFrame: The updated cube, sorted on its keys.
+    """
+    return (
+        pl.concat([cube, delta], how="vertical_relaxed")
+        .group_by(CUBE_KEYS)
+        .agg(pl.col(*CUBE_MEASURES, *CUBE_COUNTS).sum())
+        .filter(pl.col("nb_lignes") > 0)
+        .sort(CUBE_KEYS, nulls_last=True)
+    )
+
+
+def update_cube(
+    current: pl.LazyFrame,
+    changes: tuple[pl.LazyFrame, pl.LazyFrame] | None = None,
+    path: Path = ODRE_REGISTRE_CAPACITY_CUBE_GOLD,
+) -> pl.DataFrame:
+    """
+    Updates the persisted cube with a new registry snapshot.
+
+    The cube is rebuilt from scratch only when it does not exist yet or when the
+    changes of the snapshot are unknown, otherwise only the changed rows are
+    aggregated.
+
+    Args:
+        current (pl.LazyFrame): New registry snapshot.
+        changes (tuple[pl.LazyFrame, pl.LazyFrame] | None): Rows opened and closed
+            by the snapshot since the one the persisted cube was built from.
+        path (Path): Location of the persisted cube.
+
+    Returns:
+        pl.DataFrame: The updated cube.
+    """
+    if changes is None or not path.exists():
+        cube = build_cube(current).collect()
+        logger.info("Capacity cube rebuilt", extra={"path": path, "rows": len(cube)})
+    else:
+        delta = registry_delta(*changes).collect()
+        cube = apply_delta(pl.scan_parquet(path), delta.lazy()).collect()
+        logger.info(
+            "Capacity cube updated",
+            extra={"path": path, "rows": len(cube), "delta_rows": len(delta)},
+        )
+
+    # write next to the target then rename, readers never see a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    cube.write_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+    return cube
+
+
+def load_cube(path: Path = ODRE_REGISTRE_CAPACITY_CUBE_GOLD) -> pl.DataFrame:
+    """
+    Reads the persisted cube.
+
+    Args:
+        path (Path): Location of the persisted cube.
+
+    Returns:
+        pl.DataFrame: The capacity cube.
+    """
+    return pl.read_parquet(path)
+
+
+def query_cube(
+    cube: pl.DataFrame,
+    by: Sequence[str] = (),
+    include_dom: bool = True,
+    include_aggregates: bool = True,
+    where: pl.Expr | None = None,
+) -> pl.DataFrame:
+    """
+    Answers a rollup of the registry measures from the cube.
+
+    Args:
+        cube (pl.DataFrame): Capacity cube (see `load_cube`).
+        by (Sequence[str]): Cube keys to group on, grand total when empty.
+        include_dom (bool): Whether to keep the overseas regions (see `DOM_REGIONS`).
+        include_aggregates (bool): Whether to keep the aggregated registry rows.
+        where (pl.Expr | None): Additional filter on the cube keys.
+
+    Returns:
+        pl.DataFrame: Summed measures per group, sorted by installed capacity.
+
+    Raises:
+        ValueError: If `by` contains a column that is not a cube key.
+    """
+    unknown_keys = set(by) - set(CUBE_KEYS)
+    if unknown_keys:
+        raise ValueError(
+            f"Cannot group the cube on {sorted(unknown_keys)}. Use some of: {CUBE_KEYS}"
+        )
+
+    lf = cube.lazy()
+    if not include_dom:
+        lf = lf.filter(~pl.col("region").is_in(DOM_REGIONS))
+    if not include_aggregates:
+        lf = lf.filter(~pl.col("is_aggregate"))
+    if where is not None:
+        lf = lf.filter(where)
+
+    measures = pl.col(*CUBE_MEASURES, *CUBE_COUNTS).sum()
+    if by:
+        lf = lf.group_by(by).agg(measures)
+    else:
+        lf = lf.select(measures)
+
+    return lf.sort("puismaxinstallee", descending=True).collect()
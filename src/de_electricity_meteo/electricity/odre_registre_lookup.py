@@ -0,0 +1,198 @@
+"""
+Point lookups of registry installations by identifier.
+
+The silver registry is written sorted on `idpeps` in small row groups, and a side
+index maps every value of the lookup keys (`idpeps`, `codeeicresourceobject`,
+`nominstallation`) to the offsets of its rows. The index is a parquet file sorted
+on (key, value) in small row groups too: a lookup filters it lazily, the row group
+statistics skip all but the row groups holding the value, then reads the row
+groups of the registry holding the rows found. Neither file is loaded in memory.
+
+The index records the fingerprint of the registry it was built from (see
+`table_cache.fingerprint`), it is rebuilt when the registry was rewritten since.
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import (
+    ODRE_REGISTRE_GEOLOCATED_SILVER,
+    ODRE_REGISTRE_LOOKUP_SILVER,
+)
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.table_cache import fingerprint
+
+LOOKUP_KEYS = ("idpeps", "codeeicresourceobject", "nominstallation")
+
+# the registry is sorted on it, its row group statistics prune filters too
+SORT_KEY = "idpeps"
+
+# small row groups, a lookup decodes the whole row group of a row
+ROW_GROUP_SIZE = 8_192
+
+ROW = "_row"
+VERSION = "registry_fingerprint"
+
+
+def build_index(
+    registry_path: Path = ODRE_REGISTRE_GEOLOCATED_SILVER,
+    index_path: Path = ODRE_REGISTRE_LOOKUP_SILVER,
+) -> int:
+    """
+    Builds and persists the index of the lookup keys of the registry.
+
+    Args:
+        registry_path (Path): Silver registry.
+        index_path (Path): Destination of the index.
+
+    Returns:
+        int: Number of (key, value) entries.
+    """
+    registry = pl.scan_parquet(registry_path)
+    keys = [key for key in LOOKUP_KEYS if key in registry.collect_schema()]
+
+    index = (
+        registry.with_row_index(ROW)
+        .select(ROW, *[pl.col(key).cast(pl.String) for key in keys])
+        .unpivot(index=ROW, on=keys, variable_name="key", value_name="value")
+        .filter(pl.col("value").is_not_null())
+        .sort("key", "value", ROW)
+        .collect()
+    )
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".tmp")
+    index.write_parquet(
+        tmp_path,
+        row_group_size=ROW_GROUP_SIZE,
+        metadata={VERSION: fingerprint(registry_path)},
+    )
+    os.replace(tmp_path, index_path)
+
+    logger.info(
+        "Registry lookup index written",
+        extra={"path": index_path, "keys": keys, "entries": len(index)},
+    )
+    return len(index)
+
+
+def write_registry(
+    df: pl.DataFrame,
+    path: Path = ODRE_REGISTRE_GEOLOCATED_SILVER,
+    index_path: Path = ODRE_REGISTRE_LOOKUP_SILVER,
+) -> None:
+    """
+    Writes the silver registry sorted on `SORT_KEY`, then its lookup index.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    df.sort(SORT_KEY, nulls_last=True).write_parquet(
+        tmp_path, row_group_size=ROW_GROUP_SIZE
+    )
+    os.replace(tmp_path, path)
+    build_index(path, index_path)
+
+
+def _ranges(rows: list[int]) -> list[tuple[int, int]]:
+    """
+    Sorted row offsets as (offset, length) runs of consecutive rows.
+    """
+    ranges: list[tuple[int, int]] = []
+    for row in rows:
+        if ranges and ranges[-1][0] + ranges[-1][1] == row:
+            ranges[-1] = (ranges[-1][0], ranges[-1][1] + 1)
+        else:
+            ranges.append((row, 1))
+    return ranges
+
+
+@dataclass
+class RegistryIndex:
+    """
+    Index of the lookup keys, searched on disk.
+
+    Attributes:
+        registry_path (Path): Silver registry it indexes.
+        index_path (Path): The sorted index.
+        version (str): Fingerprint of the registry it was built from.
+    """
+
+    registry_path: Path
+    index_path: Path
+    version: str
+
+    @classmethod
+    def load(
+        cls,
+        registry_path: Path = ODRE_REGISTRE_GEOLOCATED_SILVER,
+        index_path: Path = ODRE_REGISTRE_LOOKUP_SILVER,
+    ) -> "RegistryIndex":
+        """
+        Opens the index of the registry, rebuilding it if it is missing or stale.
+        Only the footer of the index is read.
+        """
+        version = fingerprint(registry_path)
+        if (
+            not index_path.exists()
+            or pl.read_parquet_metadata(index_path).get(VERSION) != version
+        ):
+            build_index(registry_path, index_path)
+        return cls(registry_path=registry_path, index_path=index_path, version=version)
+
+    def is_stale(self) -> bool:
+        return fingerprint(self.registry_path) != self.version
+
+    def rows(self, key: str, value: str) -> list[int]:
+        """
+        Sorted offsets of the rows of the registry whose key has a value.
+        """
+        return (
+            pl.scan_parquet(self.index_path)
+            .filter(pl.col("key") == key, pl.col("value") == value)
+            .select(ROW)
+            .collect()[ROW]
+            .to_list()
+        )
+
+    def lookup(self, key: str, value: str) -> pl.DataFrame:
+        """
+        Rows of the registry whose key has a value.
+
+        Args:
+            key (str): One of `LOOKUP_KEYS`.
+            value (str): Searched value.
+
+        Returns:
+            pl.DataFrame: The matching rows, empty when none.
+
+        Raises:
+            ValueError: If the key is not indexed.
+        """
+        if key not in LOOKUP_KEYS:
+            raise ValueError(f"Unknown lookup key {key}, use one of {LOOKUP_KEYS}")
+
+        registry = pl.scan_parquet(self.registry_path)
+        rows = self.rows(key, value)
+        if not rows:
+            return registry.head(0).collect()
+        # a slice only reads the row groups it spans
+        slices: list[pl.LazyFrame] = [
+            registry.slice(offset, length) for offset, length in _ranges(rows)
+        ]
+        return pl.concat(slices).collect()
+
+
+def lookup(
+    key: str,
+    value: str,
+    registry_path: Path = ODRE_REGISTRE_GEOLOCATED_SILVER,
+    index_path: Path = ODRE_REGISTRE_LOOKUP_SILVER,
+) -> pl.DataFrame:
+    """
+    Rows of the registry whose key has a value, through its index (rebuilt when
+    the registry changed), see `RegistryIndex.lookup`.
+    """
+    return RegistryIndex.load(registry_path, index_path).lookup(key, value)
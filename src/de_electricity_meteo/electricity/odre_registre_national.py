@@ -1,12 +1,21 @@
-from pathlib import Path
+from __future__ import annotations
 
-import polars as pl
+from pathlib import Path
+from typing import TYPE_CHECKING
 
+from de_electricity_meteo._lazy import lazy_import
 from de_electricity_meteo.config.paths import (
     ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE,
 )
 from de_electricity_meteo.downloader import save_file
+from de_electricity_meteo.instrumentation import span
 from de_electricity_meteo.logger import logger
+from de_electricity_meteo.schemas import get_schema
+
+if TYPE_CHECKING:
+    import polars as pl
+else:
+    pl = lazy_import("polars")
 
 DOWNLOAD_URL = (
     "https://odre.opendatasoft.com/api/explore/v2.1/catalog/datasets/"
@@ -15,13 +24,45 @@ DOWNLOAD_URL = (
 )
 
 
+# measured by the "download" span of `save_file`
 async def download(url: str, path: Path) -> None:
     try:
-        await save_file(url=url, path=path)
+        await save_file(url=url, path=path, dataset="odre_registre_national")
     except Exception as e:
         logger.error(f"Failed to download {DOWNLOAD_URL}. Error: {e}")
 
 
+def read_records(path: Path) -> pl.DataFrame:
+    """
+    Reads a JSON dump of the records API (`{"total_count": ..., "results": [...]}`)
+    typed by the `odre_registre` schema, in one pass without inference.
+
+    Args:
+        path (Path): The JSON dump.
+
+    Returns:
+        pl.DataFrame: One row per record, the columns of the schema (null when a
+            record lacks them).
+    """
+    schema = get_schema("odre_registre")
+    dump = pl.read_json(
+        path,
+        schema={
+            "total_count": pl.Int64,
+            "results": pl.List(pl.Struct(schema.json_dtypes())),
+        },
+    )
+    records = (
+        dump.lazy()
+        .select(pl.col("results").explode())
+        # an empty list explodes to a null
+        .drop_nulls("results")
+        .unnest("results")
+    )
+    return schema.cast(records).collect()
+
+
+@span("extract", dataset="odre_registre_national")
 async def extract(path: Path) -> pl.LazyFrame:
     df = pl.scan_parquet(path)
 
@@ -61,10 +102,12 @@ async def extract(path: Path) -> pl.LazyFrame:
     return df
 
 
+@span("load", dataset="odre_registre_national")
 async def load() -> None:
     return None
 
 
+@span("transform", dataset="odre_registre_national")
 async def transform() -> None:
     return None
 
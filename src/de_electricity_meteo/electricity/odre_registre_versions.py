@@ -0,0 +1,250 @@
+"""
+Versioned store of the ODRE registry snapshots.
+
+Each ingested snapshot is recorded as a delta against the previous state of the
+store: the rows that appeared are written as new versions (`valid_from`) and the
+rows that disappeared or changed are closed (`valid_to`). The registry at any date
+is rebuilt lazily from these deltas, so storage grows with the change volume only.
+
+Layout of the store:
+    versions/<snapshot date>.parquet: registry rows + `_version_id` + `valid_from`
+    closures/<snapshot date>.parquet: `_version_id` + `valid_to`
+"""
+
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import ODRE_REGISTRE_VERSIONS_SILVER
+from de_electricity_meteo.logger import logger
+
+VERSION_ID = "_version_id"
+OCCURRENCE = "_occurrence"
+
+
+def _files(store: Path, kind: str) -> list[Path]:
+    return sorted((store / kind).glob("*.parquet"))
+
+
+def snapshot_dates(store: Path = ODRE_REGISTRE_VERSIONS_SILVER) -> list[date]:
+    """
+    Lists the dates of the snapshots ingested in the store.
+
+    Args:
+        store (Path): Root directory of the store.
+
+    Returns:
+        list[date]: Snapshot dates, in chronological order.
+    """
+    return [date.fromisoformat(path.stem) for path in _files(store, "versions")]
+
+
+def _scan(store: Path, kind: str) -> pl.LazyFrame | None:
+    """
+    Scans every delta file of a kind, tolerating schema changes between snapshots.
+    """
+    files = _files(store, kind)
+    if not files:
+        return None
+    scans: list[pl.LazyFrame] = [pl.scan_parquet(path) for path in files]
+    return pl.concat(scans, how="diagonal_relaxed")
+
+
+def _state(store: Path, as_of_date: date) -> pl.LazyFrame | None:
+    """
+    Rows valid at a given date, with their version identifiers.
+    """
+    versions = _scan(store, "versions")
+    if versions is None:
+        return None
+
+    versions = versions.filter(pl.col("valid_from") <= as_of_date)
+    closures = _scan(store, "closures")
+    if closures is None:
+        return versions
+
+    return versions.join(
+        closures.filter(pl.col("valid_to") <= as_of_date).select(VERSION_ID),
+        on=VERSION_ID,
+        how="anti",
+    )
+
+
+def as_of(
+    as_of_date: date, store: Path = ODRE_REGISTRE_VERSIONS_SILVER
+) -> pl.LazyFrame:
+    """
+    Reconstructs the registry as it was published at a given date.
+
+    The result is lazy: filters and projections applied by the caller are pushed
+    down to the scans of the delta files.
+
+    Args:
+        as_of_date (date): Date of the requested registry.
+        store (Path): Root directory of the store.
+
+    Returns:
+        pl.LazyFrame: Registry rows valid at that date, with their `valid_from`.
+
+    Raises:
+        ValueError: If the store is empty.
+    """
+    state = _state(store, as_of_date)
+    if state is None:
+        raise ValueError(f"No registry snapshot ingested in {store}")
+    return state.drop(VERSION_ID)
+
+
+def history(store: Path = ODRE_REGISTRE_VERSIONS_SILVER) -> pl.LazyFrame:
+    """
+    Every version of every registry row with its validity interval.
+
+    Args:
+        store (Path): Root directory of the store.
+
+    Returns:
+        pl.LazyFrame: Registry rows with `valid_from` and `valid_to` (null when the
+            row is still valid).
+
+    Raises:
+        ValueError: If the store is empty.
+    """
+    versions = _scan(store, "versions")
+    if versions is None:
+        raise ValueError(f"No registry snapshot ingested in {store}")
+
+    closures = _scan(store, "closures")
+    if closures is None:
+        return versions.with_columns(pl.lit(None, dtype=pl.Date).alias("valid_to"))
+
+    return versions.join(closures, on=VERSION_ID, how="left")
+
+
+def snapshot_changes(
+    snapshot_date: date, store: Path = ODRE_REGISTRE_VERSIONS_SILVER
+) -> tuple[pl.LazyFrame, pl.LazyFrame]:
+    """
+    Rows opened and closed by an ingested snapshot, for the aggregates maintained
+    incrementally (see `odre_registre_cube.registry_delta`).
+
+    Args:
+        snapshot_date (date): Date of the ingested snapshot.
+        store (Path): Root directory of the store.
+
+    Returns:
+        tuple[pl.LazyFrame, pl.LazyFrame]: Registry rows that appeared and that
+            disappeared with the snapshot (a changed row is in both).
+
+    Raises:
+        ValueError: If the snapshot was not ingested.
+    """
+    name = f"{snapshot_date.isoformat()}.parquet"
+    versions = _scan(store, "versions")
+    if versions is None or not (store / "versions" / name).exists():
+        raise ValueError(f"Snapshot {snapshot_date} not ingested in {store}")
+
+    opened = pl.scan_parquet(store / "versions" / name)
+    closures = store / "closures" / name
+    if closures.exists():
+        # filtered by the (small) closures of the snapshot, nothing is aggregated
+        closed = versions.join(
+            pl.scan_parquet(closures).select(VERSION_ID), on=VERSION_ID, how="semi"
+        )
+    else:
+        closed = versions.head(0)
+
+    return opened.drop(VERSION_ID), closed.drop(VERSION_ID)
+
+
+def _with_occurrence(lf: pl.LazyFrame, columns: list[str]) -> pl.LazyFrame:
+    """
+    Numbers identical rows so that duplicates are matched one to one.
+    """
+    return lf.with_columns(pl.int_range(pl.len()).over(columns).alias(OCCURRENCE))
+
+
+def ingest_snapshot(
+    snapshot: pl.LazyFrame,
+    snapshot_date: date,
+    store: Path = ODRE_REGISTRE_VERSIONS_SILVER,
+) -> tuple[int, int]:
+    """
+    Records a registry snapshot as a delta against the latest state of the store.
+
+    Args:
+        snapshot (pl.LazyFrame): Registry snapshot (bronze columns).
+        snapshot_date (date): Publication date of the snapshot.
+        store (Path): Root directory of the store.
+
+    Returns:
+        tuple[int, int]: Number of versions opened and closed by the snapshot.
+
+    Raises:
+        ValueError: If the snapshot is not more recent than the ingested ones.
+    """
+    dates = snapshot_dates(store)
+    if dates and snapshot_date <= dates[-1]:
+        raise ValueError(
+            f"Snapshots must be ingested in order, {snapshot_date} is not after "
+            f"the latest ingested snapshot ({dates[-1]})"
+        )
+
+    columns = snapshot.collect_schema().names()
+    new_rows = _with_occurrence(snapshot, columns)
+    state = _state(store, dates[-1]) if dates else None
+
+    if state is None:
+        next_version_id = 0
+        opened = new_rows
+        closed = pl.LazyFrame(schema={VERSION_ID: pl.UInt64})
+    else:
+        state = state.collect()
+        next_version_id = int(state[VERSION_ID].max() or 0) + 1
+
+        # columns added by the new snapshot make every current row a new version
+        missing_columns = [
+            pl.lit(None).alias(column)
+            for column in columns
+            if column not in state.columns
+        ]
+        current_rows = _with_occurrence(
+            state.lazy()
+            .with_columns(missing_columns)
+            .cast(snapshot.collect_schema(), strict=False),
+            columns,
+        ).select(*columns, OCCURRENCE, VERSION_ID)
+
+        on = [*columns, OCCURRENCE]
+        opened = new_rows.join(current_rows, on=on, how="anti", nulls_equal=True)
+        closed = current_rows.join(
+            new_rows, on=on, how="anti", nulls_equal=True
+        ).select(VERSION_ID)
+
+    opened_df = (
+        opened.drop(OCCURRENCE)
+        .with_columns(
+            (pl.int_range(pl.len(), dtype=pl.UInt64) + next_version_id).alias(
+                VERSION_ID
+            ),
+            pl.lit(snapshot_date).alias("valid_from"),
+        )
+        .collect()
+    )
+    closed_df = closed.with_columns(pl.lit(snapshot_date).alias("valid_to")).collect()
+
+    # versions are written last: a snapshot only exists once its versions file does
+    for kind, df in (("closures", closed_df), ("versions", opened_df)):
+        (store / kind).mkdir(parents=True, exist_ok=True)
+        df.write_parquet(store / kind / f"{snapshot_date.isoformat()}.parquet")
+
+    logger.info(
+        "Registry snapshot ingested",
+        extra={
+            "snapshot_date": snapshot_date.isoformat(),
+            "opened": len(opened_df),
+            "closed": len(closed_df),
+        },
+    )
+
+    return len(opened_df), len(closed_df)
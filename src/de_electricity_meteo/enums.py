@@ -4,3 +4,33 @@ from enum import StrEnum
 class LoggerChoice(StrEnum):
     CONSOLE = "jsonConsoleLogger"
     FILE = "jsonFileLogger"
+
+
+class GeoLevel(StrEnum):
+    # ordered from the finest to the coarsest level
+    IRIS = "iris"
+    COMMUNE = "commune"
+    EPCI = "epci"
+    DEPARTEMENT = "departement"
+    REGION = "region"
+
+
+class Eco2mixNature(StrEnum):
+    # ordered by precedence, the first one wins when a period is published twice
+    DEFINITIVES = "Données définitives"
+    CONSOLIDEES = "Données consolidées"
+    TEMPS_REEL = "Données temps réel"
+
+
+class Resolution(StrEnum):
+    # ordered from the finest to the coarsest, values are polars durations
+    HOUR = "1h"
+    DAY = "1d"
+    WEEK = "1w"
+    MONTH = "1mo"
+
+
+class AlignMethod(StrEnum):
+    # how hourly weather is brought onto the half-hourly eco2mix grid
+    ASOF = "asof"
+    INTERPOLATE = "interpolate"
@@ -0,0 +1,302 @@
+"""
+Spatial index of the weather stations and batch k-nearest-station queries.
+
+The stations are bucketed on a regular latitude/longitude grid, persisted once in
+the silver layer. A batch query deduplicates the query coordinates (installations
+share their IRIS or commune centroid), joins each of them with the stations of the
+surrounding cells and keeps the k nearest by great-circle distance. A point is
+final once its k-th neighbour is closer than the radius the searched square is
+guaranteed to cover; the others are searched again in a square twice as wide.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Sequence
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import (
+    METEO_STATIONS_GRID_SILVER,
+    METEO_STATIONS_SILVER,
+)
+from de_electricity_meteo.logger import logger
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# about 28 km in latitude, a handful of stations per cell in metropolitan France
+DEFAULT_CELL_DEG = 0.25
+
+COORDINATES = ["latitude", "longitude"]
+CELLS = ["cellule_lat", "cellule_lon"]
+
+LINK_SCHEMA = {
+    "latitude": pl.Float64,
+    "longitude": pl.Float64,
+    "rang": pl.Int64,
+    "id_station": pl.String,
+    "distance_km": pl.Float64,
+}
+
+
+@dataclass(frozen=True)
+class StationGridIndex:
+    """
+    Stations bucketed on a latitude/longitude grid.
+
+    Attributes:
+        stations (pl.DataFrame): `id_station`, `latitude`, `longitude` and their
+            grid cell, sorted by cell.
+        cell_deg (float): Size of a cell in degrees.
+    """
+
+    stations: pl.DataFrame
+    cell_deg: float
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+
+def _cells(cell_deg: float) -> list[pl.Expr]:
+    return [
+        (pl.col(coordinate) / cell_deg).floor().cast(pl.Int32).alias(cell)
+        for coordinate, cell in zip(COORDINATES, CELLS)
+    ]
+
+
+def haversine_km(
+    lat_a: pl.Expr, lon_a: pl.Expr, lat_b: pl.Expr, lon_b: pl.Expr
+) -> pl.Expr:
+    """
+    Great-circle distance between two points given in degrees.
+    """
+    lat_a, lon_a, lat_b, lon_b = (
+        expression.radians() for expression in (lat_a, lon_a, lat_b, lon_b)
+    )
+    a = ((lat_b - lat_a) / 2).sin().pow(2) + lat_a.cos() * lat_b.cos() * (
+        (lon_b - lon_a) / 2
+    ).sin().pow(2)
+    return 2 * EARTH_RADIUS_KM * a.sqrt().arcsin()
+
+
+def build_station_index(
+    stations: pl.DataFrame,
+    ids: Sequence[str] | pl.Series | None = None,
+    cell_deg: float = DEFAULT_CELL_DEG,
+) -> StationGridIndex:
+    """
+    Buckets the stations on the grid.
+
+    Args:
+        stations (pl.DataFrame): Stations table (`id`, `latitude`, `longitude`).
+        ids (Sequence[str] | pl.Series | None): Only index these stations (active
+            at a date, measuring some parameters...), all when None.
+        cell_deg (float): Size of a cell in degrees.
+
+    Returns:
+        StationGridIndex: The index.
+    """
+    if ids is not None:
+        stations = stations.filter(pl.col("id").is_in(list(ids)))
+
+    indexed = (
+        stations.select(pl.col("id").alias("id_station"), *COORDINATES)
+        .drop_nulls(COORDINATES)
+        .with_columns(_cells(cell_deg))
+        .sort(*CELLS, "id_station")
+    )
+    return StationGridIndex(stations=indexed, cell_deg=cell_deg)
+
+
+def stations_measuring(
+    hourly: pl.LazyFrame, measures: Sequence[str], since: datetime | None = None
+) -> pl.Series:
+    """
+    Ids of the stations that reported every measure (since a date).
+
+    Args:
+        hourly (pl.LazyFrame): Hourly observations (`num_poste`, `date_heure` and
+            the measures), see `meteo.climatology.scan_hourly`.
+        measures (Sequence[str]): Measures the stations must report.
+        since (datetime | None): Only consider the observations after this date.
+
+    Returns:
+        pl.Series: Sorted station ids.
+    """
+    if since is not None:
+        hourly = hourly.filter(pl.col("date_heure") >= since)
+
+    return (
+        hourly.group_by("num_poste")
+        .agg(pl.col(measure).is_not_null().any() for measure in measures)
+        .filter(pl.all_horizontal(measures))
+        .select(pl.col("num_poste").sort())
+        .collect()
+        .to_series()
+    )
+
+
+def save_station_index(
+    index: StationGridIndex, path: Path = METEO_STATIONS_GRID_SILVER
+) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    index.stations.write_parquet(path, metadata={"cell_deg": str(index.cell_deg)})
+    logger.info(
+        "Station grid index written", extra={"path": path, "stations": len(index)}
+    )
+
+
+def load_station_index(path: Path = METEO_STATIONS_GRID_SILVER) -> StationGridIndex:
+    return StationGridIndex(
+        stations=pl.read_parquet(path),
+        cell_deg=float(pl.read_parquet_metadata(path)["cell_deg"]),
+    )
+
+
+def update_station_index(
+    stations_path: Path = METEO_STATIONS_SILVER,
+    index_path: Path = METEO_STATIONS_GRID_SILVER,
+) -> StationGridIndex:
+    """
+    Rebuilds and persists the index of the stations in service.
+    """
+    stations = pl.read_parquet(stations_path).filter(pl.col("date_fin").is_null())
+    index = build_station_index(stations)
+    save_station_index(index, index_path)
+    return index
+
+
+def _covered_km(latitude: pl.Expr, radius: int, cell_deg: float) -> pl.Expr:
+    """
+    Distance within which every station lies in the searched square.
+
+    The square spans `radius` cells on each side of the cell of the point, a
+    degree of longitude is shortest on the poleward edge of the square.
+    """
+    edge_latitude = (latitude.abs() + (radius + 1) * cell_deg).clip(upper_bound=90)
+    return radius * cell_deg * KM_PER_DEGREE * edge_latitude.radians().cos()
+
+
+def nearest_stations(
+    points: pl.DataFrame,
+    index: StationGridIndex,
+    k: int = 3,
+    max_distance_km: float | None = None,
+) -> pl.DataFrame:
+    """
+    Finds the k nearest stations of every point in one batch.
+
+    Args:
+        points (pl.DataFrame): Any frame with `latitude` and `longitude` columns
+            (such as the geolocated registry).
+        index (StationGridIndex): Index of the candidate stations.
+        k (int): Number of stations per point.
+        max_distance_km (float | None): Ignore the stations further than this.
+
+    Returns:
+        pl.DataFrame: The points, once per neighbour, with `rang` (1 for the
+            nearest), `id_station` and `distance_km`; points without coordinates
+            or neighbour have null ones.
+    """
+    pending = (
+        points.select(COORDINATES)
+        .drop_nulls()
+        .unique()
+        .with_columns(_cells(index.cell_deg))
+    )
+
+    # from this radius on, the square of any point covers every station
+    max_radius = max(
+        [
+            1,
+            *[
+                abs(point_bound - station_bound)
+                for cell in CELLS
+                for point_bound in (pending[cell].min(), pending[cell].max())
+                for station_bound in (
+                    index.stations[cell].min(),
+                    index.stations[cell].max(),
+                )
+                if isinstance(point_bound, int) and isinstance(station_bound, int)
+            ],
+        ]
+    )
+
+    resolved = [pl.DataFrame(schema=LINK_SCHEMA)]
+    radius = 1
+    while len(pending) and len(index):
+        offsets = pl.int_range(-radius, radius + 1, eager=True)
+        square = pl.DataFrame({"d_lat": offsets}).join(
+            pl.DataFrame({"d_lon": offsets}), how="cross"
+        )
+
+        candidates = (
+            pending.join(square, how="cross")
+            .select(
+                *COORDINATES,
+                (pl.col("cellule_lat") + pl.col("d_lat")).alias("cellule_lat"),
+                (pl.col("cellule_lon") + pl.col("d_lon")).alias("cellule_lon"),
+            )
+            .join(index.stations, on=CELLS, suffix="_station")
+            .with_columns(
+                haversine_km(
+                    pl.col("latitude"),
+                    pl.col("longitude"),
+                    pl.col("latitude_station"),
+                    pl.col("longitude_station"),
+                ).alias("distance_km")
+            )
+        )
+        if max_distance_km is not None:
+            candidates = candidates.filter(pl.col("distance_km") <= max_distance_km)
+
+        neighbours = (
+            candidates.sort("distance_km", "id_station")
+            .group_by(COORDINATES, maintain_order=True)
+            .head(k)
+            .with_columns(pl.int_range(1, pl.len() + 1).over(COORDINATES).alias("rang"))
+            .select(list(LINK_SCHEMA))
+        )
+
+        covered = _covered_km(pl.col("latitude"), radius, index.cell_deg)
+        if max_distance_km is not None:
+            # nothing can be found further, the point is final
+            covered = (
+                pl.when(covered >= max_distance_km)
+                .then(float("inf"))
+                .otherwise(covered)
+            )
+
+        status = pending.select(*COORDINATES, covered.alias("_covered")).join(
+            neighbours.group_by(COORDINATES).agg(
+                pl.len().alias("_found"), pl.col("distance_km").max().alias("_farthest")
+            ),
+            on=COORDINATES,
+            how="left",
+        )
+        if radius < max_radius:
+            status = status.filter(
+                ((pl.col("_found") == k) & (pl.col("_farthest") <= pl.col("_covered")))
+                | pl.col("_covered").is_infinite()
+            )
+        final = status.select(COORDINATES)
+
+        resolved.append(final.join(neighbours, on=COORDINATES, how="left"))
+        pending = pending.join(final, on=COORDINATES, how="anti")
+        radius *= 2
+
+    links = pl.concat(resolved)
+
+    logger.info(
+        "Nearest stations found",
+        extra={
+            "points": len(points),
+            "coordinates": links.select(COORDINATES).n_unique(),
+            "stations": links["id_station"].drop_nulls().n_unique(),
+            "k": k,
+        },
+    )
+
+    return points.join(links, on=COORDINATES, how="left")
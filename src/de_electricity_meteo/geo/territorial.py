@@ -0,0 +1,296 @@
+"""
+Territorial index (IRIS → commune → EPCI → département → region) and geolocation of
+the registry installations at the finest available level.
+
+The index is built once from the geo.api.gouv.fr communes and persisted in the silver
+layer, the resolution is then a handful of vectorized joins against small tables.
+"""
+
+from pathlib import Path
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import (
+    GEO_API_COMMUNES_BRONZE,
+    ODRE_REGISTRE_GEOLOCATED_SILVER,
+    ODRE_REGISTRE_LOOKUP_SILVER,
+    ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE,
+    TERRITORIAL_INDEX_SILVER,
+)
+from de_electricity_meteo.downloader import save_file
+from de_electricity_meteo.electricity.odre_registre_lookup import write_registry
+from de_electricity_meteo.enums import GeoLevel
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.schemas import check_parquet, get_schema
+
+DOWNLOAD_URL = (
+    "https://geo.api.gouv.fr/communes"
+    "?fields=code,nom,centre,codeEpci,codeDepartement,codeRegion&format=json"
+)
+
+GEO_LEVEL_DTYPE = pl.Enum([level.value for level in GeoLevel])
+
+INDEX_COLUMNS = [
+    "niveau",
+    "code",
+    "code_commune",
+    "code_epci",
+    "code_departement",
+    "code_region",
+    "latitude",
+    "longitude",
+]
+
+# registry column holding the code of each level, from the finest to the coarsest
+REGISTRY_LEVEL_COLUMNS = {
+    GeoLevel.IRIS: "codeiris",
+    GeoLevel.COMMUNE: "codeinseecommune",
+    GeoLevel.EPCI: "codeepci",
+    GeoLevel.DEPARTEMENT: "codedepartement",
+    GeoLevel.REGION: "coderegion",
+}
+
+# an IRIS code is the INSEE code of its commune followed by 4 digits
+IRIS_COMMUNE_PREFIX_LENGTH = 5
+
+
+async def download(url: str = DOWNLOAD_URL, path: Path = GEO_API_COMMUNES_BRONZE):
+    try:
+        await save_file(url=url, path=path, dataset="geo_api_communes")
+    except Exception as e:
+        logger.error(f"Failed to download {url}. Error: {e}")
+
+
+def read_geo_api_communes(path: Path = GEO_API_COMMUNES_BRONZE) -> pl.LazyFrame:
+    """
+    Reads the communes exported by geo.api.gouv.fr, with the declared schema (no
+    inference pass, unknown fields are skipped).
+
+    Args:
+        path (Path): JSON export of the `/communes` endpoint.
+
+    Returns:
+        pl.LazyFrame: One row per commune with its parent codes and centroid.
+    """
+    return (
+        pl.read_json(path, schema=get_schema("geo_api_communes").dtypes())
+        .lazy()
+        .select(
+            pl.col("code").alias("code_commune"),
+            pl.col("codeEpci").alias("code_epci"),
+            pl.col("codeDepartement").alias("code_departement"),
+            pl.col("codeRegion").alias("code_region"),
+            # GeoJSON points are (longitude, latitude)
+            pl.col("centre").struct.field("coordinates").list.get(1).alias("latitude"),
+            pl.col("centre").struct.field("coordinates").list.get(0).alias("longitude"),
+        )
+    )
+
+
+def _parent_level(
+    communes: pl.LazyFrame, level: GeoLevel, code: str, parents: list[str]
+) -> pl.LazyFrame:
+    """
+    Derives the rows of a level coarser than the commune.
+
+    The centroid is the mean of the commune centroids, parent codes are the most
+    frequent ones (an EPCI may span several départements).
+    """
+    return (
+        communes.filter(pl.col(code).is_not_null())
+        .group_by(code)
+        .agg(
+            *[pl.col(parent).drop_nulls().mode().first() for parent in parents],
+            pl.col("latitude").mean(),
+            pl.col("longitude").mean(),
+        )
+        .with_columns(
+            pl.lit(level.value).alias("niveau"),
+            pl.col(code).alias("code"),
+        )
+    )
+
+
+def build_territorial_index(
+    communes: pl.LazyFrame, iris: pl.LazyFrame | None = None
+) -> pl.LazyFrame:
+    """
+    Builds the territorial index from the communes (and optionally IRIS centroids).
+
+    Args:
+        communes (pl.LazyFrame): Communes as returned by `read_geo_api_communes`.
+        iris (pl.LazyFrame | None): IRIS centroids (`code_iris`, `latitude`,
+            `longitude`), IRIS are resolved to their commune centroid when None.
+
+    Returns:
+        pl.LazyFrame: One row per (niveau, code) with parent codes and centroid.
+    """
+    levels = [
+        communes.with_columns(
+            pl.lit(GeoLevel.COMMUNE.value).alias("niveau"),
+            pl.col("code_commune").alias("code"),
+        ),
+        _parent_level(
+            communes,
+            GeoLevel.EPCI,
+            code="code_epci",
+            parents=["code_departement", "code_region"],
+        ),
+        _parent_level(
+            communes,
+            GeoLevel.DEPARTEMENT,
+            code="code_departement",
+            parents=["code_region"],
+        ),
+        _parent_level(communes, GeoLevel.REGION, code="code_region", parents=[]),
+    ]
+
+    if iris is not None:
+        levels.append(
+            iris.with_columns(
+                pl.lit(GeoLevel.IRIS.value).alias("niveau"),
+                pl.col("code_iris").alias("code"),
+                pl.col("code_iris")
+                .str.slice(0, IRIS_COMMUNE_PREFIX_LENGTH)
+                .alias("code_commune"),
+            ).join(
+                communes.select(
+                    "code_commune", "code_epci", "code_departement", "code_region"
+                ),
+                on="code_commune",
+                how="left",
+            )
+        )
+
+    return (
+        pl.concat(levels, how="diagonal_relaxed")
+        .select(INDEX_COLUMNS)
+        .with_columns(pl.col("niveau").cast(GEO_LEVEL_DTYPE))
+    )
+
+
+def update_territorial_index(
+    communes_path: Path = GEO_API_COMMUNES_BRONZE,
+    index_path: Path = TERRITORIAL_INDEX_SILVER,
+) -> None:
+    """
+    Rebuilds and persists the territorial index from the communes export.
+
+    Args:
+        communes_path (Path): JSON export of geo.api.gouv.fr communes.
+        index_path (Path): Destination of the persisted index.
+    """
+    index = build_territorial_index(read_geo_api_communes(communes_path)).collect()
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    index.sort("niveau", "code").write_parquet(index_path)
+
+    logger.info(
+        "Territorial index written", extra={"path": index_path, "rows": len(index)}
+    )
+
+
+def resolve_geolocation(registry: pl.LazyFrame, index: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Resolves every installation to the finest level known by the index.
+
+    Missing parent codes are first filled from the commune (itself derived from the
+    IRIS code when missing), then each level is joined against its centroids and the
+    finest hit wins.
+
+    Args:
+        registry (pl.LazyFrame): Registry snapshot (bronze columns).
+        index (pl.LazyFrame): Territorial index (see `build_territorial_index`).
+
+    Returns:
+        pl.LazyFrame: The registry with `code_commune`, `code_epci`,
+            `code_departement`, `code_region`, `niveau_geo`, `latitude` and
+            `longitude` columns.
+    """
+    code_columns = {
+        level: f"code_{level.value}" for level in GeoLevel if level != GeoLevel.IRIS
+    }
+    commune_parents = index.filter(pl.col("niveau") == GeoLevel.COMMUNE.value).select(
+        pl.col("code").alias("code_commune"),
+        *[
+            pl.col(column).alias(f"_index_{column}")
+            for level, column in code_columns.items()
+            if level != GeoLevel.COMMUNE
+        ],
+    )
+
+    lf = (
+        registry.with_columns(
+            pl.col(REGISTRY_LEVEL_COLUMNS.values()).cast(pl.String),
+        )
+        .with_columns(
+            pl.coalesce(
+                "codeinseecommune",
+                pl.col("codeiris").str.slice(0, IRIS_COMMUNE_PREFIX_LENGTH),
+            ).alias("code_commune")
+        )
+        .join(commune_parents, on="code_commune", how="left")
+        .with_columns(
+            pl.coalesce(REGISTRY_LEVEL_COLUMNS[level], f"_index_{column}").alias(column)
+            for level, column in code_columns.items()
+            if level != GeoLevel.COMMUNE
+        )
+    )
+
+    level_columns = {GeoLevel.IRIS: "codeiris", **code_columns}
+    for level, column in level_columns.items():
+        centroids = index.filter(pl.col("niveau") == level.value).select(
+            pl.col("code").alias(column),
+            pl.col("latitude").alias(f"_latitude_{level.value}"),
+            pl.col("longitude").alias(f"_longitude_{level.value}"),
+        )
+        lf = lf.join(centroids, on=column, how="left")
+
+    niveau_geo = pl.lit(None, dtype=GEO_LEVEL_DTYPE)
+    for level in reversed(level_columns):
+        niveau_geo = (
+            pl.when(pl.col(f"_latitude_{level.value}").is_not_null())
+            .then(pl.lit(level.value, dtype=GEO_LEVEL_DTYPE))
+            .otherwise(niveau_geo)
+        )
+
+    return lf.with_columns(
+        niveau_geo.alias("niveau_geo"),
+        pl.coalesce(f"_latitude_{level.value}" for level in level_columns).alias(
+            "latitude"
+        ),
+        pl.coalesce(f"_longitude_{level.value}" for level in level_columns).alias(
+            "longitude"
+        ),
+    ).drop(pl.selectors.starts_with("_"))
+
+
+def geolocate_registry(
+    registry_path: Path = ODRE_REGISTRE_NATIONAL_INSTALLATIONS_BRONZE,
+    index_path: Path = TERRITORIAL_INDEX_SILVER,
+    output_path: Path = ODRE_REGISTRE_GEOLOCATED_SILVER,
+    lookup_path: Path = ODRE_REGISTRE_LOOKUP_SILVER,
+) -> None:
+    """
+    Geolocates the registry and persists it for the spatial joins, with its lookup
+    index (see `odre_registre_lookup`).
+
+    Args:
+        registry_path (Path): Registry snapshot (bronze).
+        index_path (Path): Persisted territorial index.
+        output_path (Path): Destination of the geolocated registry (silver).
+        lookup_path (Path): Destination of its lookup index.
+    """
+    check_parquet("odre_registre", registry_path)
+    registry = get_schema("odre_registre").cast(pl.scan_parquet(registry_path))
+    geolocated = resolve_geolocation(registry, pl.scan_parquet(index_path)).collect()
+
+    write_registry(geolocated, output_path, index_path=lookup_path)
+
+    logger.info(
+        "Registry geolocated",
+        extra={
+            "path": output_path,
+            "levels": dict(geolocated["niveau_geo"].value_counts().iter_rows()),
+        },
+    )
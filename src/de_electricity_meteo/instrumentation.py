@@ -0,0 +1,302 @@
+"""
+Timing spans of the pipeline stages and their export as metrics.
+
+`span` measures a stage (wall time, CPU time and growth of the peak RSS of the
+process, the memory the stage needed beyond the earlier stages) as a
+context manager (`with` or `async with`) or as a decorator of sync and async
+functions. The code of a stage reports its volumes with `record(rows_out=...)`,
+which adds them to the innermost open span of the current task (and does nothing
+outside of any span), so helpers such as `save_file` need no extra argument.
+
+Every finished span is logged as a structured record and added to counters per
+(stage, dataset). `write_metrics` writes them in the Prometheus text format, for
+the textfile collector of node_exporter, so throughput can be trended across runs.
+"""
+
+import functools
+import inspect
+import os
+import resource
+import sys
+import threading
+import time
+from contextvars import ContextVar, Token
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from de_electricity_meteo.config.paths import METRICS_PROM
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.profiling import start_profiling
+
+NAMESPACE = "de_electricity_meteo"
+METRIC_PREFIX = f"{NAMESPACE}_stage"
+
+# volumes a stage can report
+VOLUMES = ("rows_in", "rows_out", "bytes_in", "bytes_out")
+
+# metric: (type, help), aggregated over the spans of a (stage, dataset)
+METRICS = {
+    "runs_total": ("counter", "Finished spans."),
+    "errors_total": ("counter", "Spans finished by an exception."),
+    "wall_seconds_total": ("counter", "Wall time spent in the stage."),
+    "cpu_seconds_total": ("counter", "CPU time of the process during the stage."),
+    "rows_in_total": ("counter", "Rows read by the stage."),
+    "rows_out_total": ("counter", "Rows written by the stage."),
+    "bytes_in_total": ("counter", "Bytes read by the stage."),
+    "bytes_out_total": ("counter", "Bytes written by the stage."),
+    "peak_rss_growth_bytes": (
+        "gauge",
+        "Largest growth of the process peak resident set size during the stage.",
+    ),
+    "process_peak_rss_bytes": (
+        "gauge",
+        "Peak resident set size of the process, over every stage run so far.",
+    ),
+    "last_end_timestamp_seconds": ("gauge", "End of the last span."),
+}
+
+# ru_maxrss is in kilobytes on Linux, in bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+@dataclass
+class SpanStats:
+    """
+    Measures of one execution of a stage.
+    """
+
+    stage: str
+    dataset: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    # ru_maxrss never decreases: the growth is what this stage added to the peak
+    peak_rss_growth_bytes: int = 0
+    process_peak_rss_bytes: int = 0
+    rows_in: int = 0
+    rows_out: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    error: str | None = None
+
+    def record(self, **volumes: int) -> None:
+        """
+        Adds volumes (`rows_in`, `rows_out`, `bytes_in`, `bytes_out`) to the span.
+
+        Raises:
+            ValueError: If a volume is unknown.
+        """
+        for volume, value in volumes.items():
+            if volume not in VOLUMES:
+                raise ValueError(f"Unknown volume {volume}, use one of {VOLUMES}")
+            setattr(self, volume, getattr(self, volume) + value)
+
+
+_current: ContextVar[SpanStats | None] = ContextVar("span", default=None)
+
+_metrics: dict[tuple[str, str], dict[str, float]] = {}
+# other gauges: name -> (help, {labels: value})
+_gauges: dict[str, tuple[str, dict[tuple[tuple[str, str], ...], float]]] = {}
+_metrics_lock = threading.Lock()
+
+
+def current_span() -> SpanStats | None:
+    return _current.get()
+
+
+def record(**volumes: int) -> None:
+    """
+    Adds volumes to the innermost open span, if any (see `SpanStats.record`).
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.record(**volumes)
+
+
+def _peak_rss_bytes() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+def _aggregate(stats: SpanStats, end: float) -> None:
+    with _metrics_lock:
+        metrics = _metrics.setdefault(
+            (stats.stage, stats.dataset), dict.fromkeys(METRICS, 0.0)
+        )
+        metrics["runs_total"] += 1
+        metrics["errors_total"] += stats.error is not None
+        metrics["wall_seconds_total"] += stats.wall_s
+        metrics["cpu_seconds_total"] += stats.cpu_s
+        for volume in VOLUMES:
+            metrics[f"{volume}_total"] += getattr(stats, volume)
+        for gauge in ("peak_rss_growth_bytes", "process_peak_rss_bytes"):
+            metrics[gauge] = max(metrics[gauge], getattr(stats, gauge))
+        metrics["last_end_timestamp_seconds"] = end
+
+
+def take_metrics() -> dict[tuple[str, str], dict[str, float]]:
+    """
+    Removes and returns the metrics of the spans finished in this process, for a
+    worker process to hand them to its parent (see `merge_metrics`).
+    """
+    with _metrics_lock:
+        snapshot = {key: dict(metrics) for key, metrics in _metrics.items()}
+        _metrics.clear()
+    return snapshot
+
+
+def merge_metrics(snapshot: dict[tuple[str, str], dict[str, float]]) -> None:
+    """
+    Adds the metrics taken in another process (counters are summed, gauges keep
+    the maximum).
+    """
+    with _metrics_lock:
+        for key, values in snapshot.items():
+            metrics = _metrics.setdefault(key, dict.fromkeys(METRICS, 0.0))
+            for metric, value in values.items():
+                if METRICS[metric][0] == "counter":
+                    metrics[metric] += value
+                else:
+                    metrics[metric] = max(metrics[metric], value)
+
+
+def set_gauge(name: str, value: float, description: str, **labels: str) -> None:
+    """
+    Sets a gauge exported with the stage metrics (loop lag...).
+
+    Args:
+        name (str): Metric name, without the `de_electricity_meteo_` prefix.
+        value (float): Current value.
+        description (str): Help of the metric.
+        **labels (str): Labels of the series.
+    """
+    with _metrics_lock:
+        _, series = _gauges.setdefault(name, (description, {}))
+        series[tuple(sorted(labels.items()))] = value
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_metrics() -> str:
+    """
+    Counters of the finished spans in the Prometheus text exposition format.
+    """
+    with _metrics_lock:
+        snapshot = {key: dict(metrics) for key, metrics in _metrics.items()}
+        gauges = {
+            name: (description, dict(series))
+            for name, (description, series) in _gauges.items()
+        }
+
+    lines = []
+    for metric, (kind, description) in METRICS.items():
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        lines += [
+            f'{name}{{stage="{_label(stage)}",dataset="{_label(dataset)}"}} '
+            f"{metrics[metric]:g}"
+            for (stage, dataset), metrics in sorted(snapshot.items())
+        ]
+    for metric, (description, series) in sorted(gauges.items()):
+        name = f"{NAMESPACE}_{metric}"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+        for labels, value in sorted(series.items()):
+            rendered = ",".join(f'{key}="{_label(label)}"' for key, label in labels)
+            lines.append(f"{name}{{{rendered}}} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: Path = METRICS_PROM) -> None:
+    """
+    Writes the counters of the finished spans, replacing the file atomically (the
+    collector never reads a partial file).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(format_metrics(), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+class span:
+    """
+    Measures a stage of the pipeline.
+
+    Usable as `with span(...) as stats`, `async with span(...) as stats` or as a
+    decorator of a sync or async function (one span per call). Spans nest: volumes
+    are recorded in the innermost one. Stages selected for profiling run under
+    cProfile and tracemalloc (see `profiling`).
+
+    Args:
+        stage (str): Name of the stage (`download`, `eco2mix.build`...).
+        dataset (str): Dataset processed, to compare the throughput of datasets.
+        export (bool): Write the metrics file when the span finishes (for the
+            outermost span of a run).
+    """
+
+    def __init__(self, stage: str, dataset: str = "", export: bool = False):
+        self.stage = stage
+        self.dataset = dataset
+        self.export = export
+
+    def __enter__(self) -> SpanStats:
+        self._stats = SpanStats(stage=self.stage, dataset=self.dataset)
+        self._token: Token = _current.set(self._stats)
+        self._profiler = start_profiling(self.stage)
+        self._started = (time.perf_counter(), time.process_time(), _peak_rss_bytes())
+        return self._stats
+
+    def __exit__(self, exc_type: type | None, exc: BaseException | None, _) -> None:
+        wall_start, cpu_start, rss_start = self._started
+        stats = self._stats
+        try:
+            stats.wall_s = time.perf_counter() - wall_start
+            stats.cpu_s = time.process_time() - cpu_start
+            stats.process_peak_rss_bytes = _peak_rss_bytes()
+            stats.peak_rss_growth_bytes = stats.process_peak_rss_bytes - rss_start
+            if self._profiler is not None:
+                self._profiler.stop()
+            if exc_type is not None:
+                stats.error = f"{exc_type.__name__}: {exc}"
+        finally:
+            # the parent span is current again even if the measures fail
+            _current.reset(self._token)
+
+        _aggregate(stats, end=time.time())
+        logger.info(
+            "Stage finished",
+            extra={
+                **asdict(stats),
+                "status": "ok" if stats.error is None else "error",
+                "wall_s": round(stats.wall_s, 6),
+                "cpu_s": round(stats.cpu_s, 6),
+            },
+        )
+        if self.export:
+            write_metrics()
+
+    async def __aenter__(self) -> SpanStats:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type: type | None, exc: BaseException | None, tb):
+        self.__exit__(exc_type, exc, tb)
+
+    def _fresh(self) -> "span":
+        return span(self.stage, dataset=self.dataset, export=self.export)
+
+    def __call__(self, func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                async with self._fresh():
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            with self._fresh():
+                return func(*args, **kwargs)
+
+        return wrapper
@@ -0,0 +1,314 @@
+"""
+Logging handlers referenced by `logger.yaml`.
+
+`BoundedQueueHandler` only puts the records in a bounded queue, the formatting
+(JSON) and the I/O are done by a `DrainingQueueListener` thread, so logging from the
+event loop never waits on stdout or a file. The listener is started once the
+configuration is loaded and drains the queue when the handler is closed (at the
+latest by `logging.shutdown` at exit).
+
+`SamplingFilter` thins out high-frequency events (per chunk, page or batch): the
+records carrying a `log_key` with a rule are sampled (1 in N) and rate limited
+(token bucket), the suppressed ones are counted and aggregated in periodic summary
+records.
+"""
+
+import logging
+import logging.handlers
+import threading
+import time
+from dataclasses import dataclass, field
+from queue import Empty, Full, Queue
+from typing import Any
+
+# what to do with a record when the queue is full
+OVERFLOW_POLICIES = ("drop_new", "drop_oldest", "block")
+
+# extra attribute naming the event of a hot-path record, e.g.
+# logger.debug("Chunk written", extra={"log_key": "download.chunk", "bytes": n})
+LOG_KEY = "log_key"
+
+
+@dataclass(frozen=True)
+class SamplingRule:
+    """
+    Sampling and rate limiting of the records of a log key.
+
+    Attributes:
+        sample (int): Keep one record in `sample`.
+        rate (float | None): Records per second kept after sampling, unlimited
+            when None.
+        burst (int): Records that can be kept at once (token bucket capacity).
+        aggregate (tuple[str, ...]): Numeric extra fields summed, and their
+            min/max taken, over the suppressed records.
+    """
+
+    sample: int = 1
+    rate: float | None = None
+    burst: int = 1
+    aggregate: tuple[str, ...] = ()
+
+
+@dataclass
+class _KeyState:
+    logger: str
+    tokens: float
+    refilled_at: float
+    summarized_at: float
+    seen: int = 0
+    suppressed: int = 0
+    levelno: int = logging.NOTSET
+    totals: dict[str, tuple[float, float, float]] = field(default_factory=dict)
+
+    def suppress(self, record: logging.LogRecord, aggregate: tuple[str, ...]) -> None:
+        self.suppressed += 1
+        self.levelno = max(self.levelno, record.levelno)
+        for name in aggregate:
+            value = getattr(record, name, None)
+            if not isinstance(value, (int, float)):
+                continue
+            total, low, high = self.totals.get(name, (0, value, value))
+            self.totals[name] = (total + value, min(low, value), max(high, value))
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Sampling and token-bucket rate limiting of the records per log key.
+
+    Records without a `log_key`, or with a key without rule, always pass. A summary
+    record (`suppressed` count and `<field>_sum`, `_min`, `_max` of the aggregated
+    fields) is logged when a record of the key comes at least `summary_interval`
+    seconds after the previous summary, and for every key when the handler closes.
+
+    Args:
+        rules (dict[str, dict[str, Any]]): `SamplingRule` fields per log key.
+        summary_interval (float): Minimum delay between two summaries of a key.
+    """
+
+    def __init__(
+        self, rules: dict[str, dict[str, Any]], summary_interval: float = 60.0
+    ):
+        super().__init__()
+        self.rules = {
+            key: SamplingRule(
+                sample=rule.get("sample", 1),
+                rate=rule.get("rate"),
+                burst=rule.get("burst", 1),
+                aggregate=tuple(rule.get("aggregate", ())),
+            )
+            for key, rule in rules.items()
+        }
+        self.summary_interval = summary_interval
+        self._states: dict[str, _KeyState] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keep(state: _KeyState, rule: SamplingRule, now: float) -> bool:
+        state.seen += 1
+        if (state.seen - 1) % rule.sample:
+            return False
+        if rule.rate is None:
+            return True
+
+        state.tokens = min(
+            rule.burst, state.tokens + (now - state.refilled_at) * rule.rate
+        )
+        state.refilled_at = now
+        if state.tokens < 1:
+            return False
+        state.tokens -= 1
+        return True
+
+    @staticmethod
+    def _summary(key: str, state: _KeyState, now: float) -> logging.LogRecord | None:
+        if not state.suppressed:
+            return None
+
+        extra: dict[str, Any] = {
+            "summary_of": key,
+            "suppressed": state.suppressed,
+            "period_s": round(now - state.summarized_at, 3),
+        }
+        for name, (total, low, high) in state.totals.items():
+            extra |= {f"{name}_sum": total, f"{name}_min": low, f"{name}_max": high}
+
+        summary = logging.makeLogRecord(
+            {
+                "name": state.logger,
+                "levelno": state.levelno,
+                "levelname": logging.getLevelName(state.levelno),
+                "msg": "Log records suppressed by sampling",
+                **extra,
+            }
+        )
+        state.summarized_at = now
+        state.suppressed = 0
+        state.levelno = logging.NOTSET
+        state.totals = {}
+        return summary
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, LOG_KEY, None)
+        rule = self.rules.get(key) if isinstance(key, str) else None
+        if key is None or rule is None:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _KeyState(record.name, rule.burst, now, now)
+            keep = self._keep(state, rule, now)
+            if not keep:
+                state.suppress(record, rule.aggregate)
+            summary = None
+            if now - state.summarized_at >= self.summary_interval:
+                summary = self._summary(key, state, now)
+
+        if summary is not None:
+            # without log key, the summary passes this filter
+            logging.getLogger(state.logger).handle(summary)
+        return keep
+
+    def flush_summaries(self) -> list[logging.LogRecord]:
+        """
+        Summaries of the records suppressed since the last summary of every key.
+        """
+        now = time.monotonic()
+        with self._lock:
+            summaries = [
+                self._summary(key, state, now) for key, state in self._states.items()
+            ]
+        return [summary for summary in summaries if summary is not None]
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """
+    Queue listener that can be stopped while its queue is full, and flushes its
+    handlers once the queue is drained.
+    """
+
+    queue: Queue
+
+    @property
+    def is_alive(self) -> bool:
+        return self._thread is not None
+
+    def enqueue_sentinel(self) -> None:
+        # the sentinel of QueueListener, the thread is consuming so a full bounded
+        # queue frees up
+        self.queue.put(None)
+
+    def stop(self) -> None:
+        if not self.is_alive:
+            return
+        super().stop()
+        for handler in self.handlers:
+            handler.flush()
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler with an overflow policy.
+
+    Records dropped because the queue was full are counted and reported by a
+    warning record as soon as the queue accepts records again.
+
+    Args:
+        queue (Queue): Bounded queue shared with the listener.
+        overflow (str): `drop_new` drops the record logged, `drop_oldest` makes
+            room by dropping the oldest queued record, `block` waits up to
+            `block_timeout` seconds then drops the record.
+        block_timeout (float): Maximum wait of the `block` policy.
+
+    Raises:
+        ValueError: If the overflow policy is unknown.
+    """
+
+    queue: Queue
+    listener: DrainingQueueListener | None
+
+    def __init__(
+        self, queue: Queue, overflow: str = "drop_new", block_timeout: float = 0.1
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy {overflow}, use one of {OVERFLOW_POLICIES}"
+            )
+        super().__init__(queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._unreported = 0
+        self.listener = None
+
+    def _put(self, record: logging.LogRecord) -> bool:
+        try:
+            if self.overflow == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            return True
+        except Full:
+            pass
+
+        if self.overflow == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+                self._unreported += 1
+                self.queue.put_nowait(record)
+                return True
+            except (Empty, Full):
+                pass
+
+        self.dropped += 1
+        self._unreported += 1
+        return False
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._unreported and not self.queue.full():
+            unreported, self._unreported = self._unreported, 0
+            self._put(
+                logging.makeLogRecord(
+                    {
+                        "name": record.name,
+                        "levelno": logging.WARNING,
+                        "levelname": logging.getLevelName(logging.WARNING),
+                        "msg": "Log records dropped, the logging queue was full",
+                        "dropped": unreported,
+                        "overflow": self.overflow,
+                    }
+                )
+            )
+        self._put(record)
+
+    def start(self) -> None:
+        if self.listener is not None and not self.listener.is_alive:
+            self.listener.start()
+
+    def close(self) -> None:
+        for sampling in self.filters:
+            if isinstance(sampling, SamplingFilter):
+                for summary in sampling.flush_summaries():
+                    self.handle(summary)
+        if self.listener is not None:
+            self.listener.stop()
+        super().close()
+
+
+def start_queue_listeners() -> int:
+    """
+    Starts the listeners of the configured queue handlers.
+
+    Returns:
+        int: Number of queue handlers configured.
+    """
+    handlers = [
+        handler
+        for name in logging.getHandlerNames()
+        if isinstance(handler := logging.getHandlerByName(name), BoundedQueueHandler)
+    ]
+    for handler in handlers:
+        handler.start()
+    return len(handlers)
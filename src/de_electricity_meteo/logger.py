@@ -1,9 +1,15 @@
+"""
+Logging configuration of the package.
+
+The configuration (`logger.yaml`) is only loaded when the package logger is first
+used: `logger` is a stand-in resolving the configured logger on its first call, so
+importing a module costs neither the YAML parsing nor `dictConfig`.
+"""
+
 import logging
-import logging.config
 from functools import lru_cache
 from pathlib import Path
-
-import yaml
+from typing import Any, cast
 
 from de_electricity_meteo.config.paths import LOGGER_CONFIG
 from de_electricity_meteo.config.settings import LOGGER_NAME
@@ -15,6 +21,7 @@ def load_config(path: Path) -> None:
     """
     Loads the logging configuration from a YAML file.
     The @lru_cache decorator ensures the file is read and parsed only once.
+    The listeners of the queue handlers are started once configured.
 
     Args:
         path (Path): The filesystem path to the YAML configuration file.
@@ -30,10 +37,19 @@ def load_config(path: Path) -> None:
     if not path.exists():
         raise FileNotFoundError(f"Logging configuration file not found at: {path}")
 
+    import logging.config  # noqa: PLC0415
+
+    import yaml  # noqa: PLC0415
+
+    from de_electricity_meteo.log_handlers import (  # noqa: PLC0415
+        start_queue_listeners,
+    )
+
     try:
         with path.open(mode="rt", encoding="utf-8") as f:
             config = yaml.safe_load(f)
             logging.config.dictConfig(config)
+            start_queue_listeners()
     except yaml.YAMLError as yaml_error:
         raise ValueError(f"Invalid YAML configuration in file at {path}: {yaml_error}")
     except Exception as general_error:
@@ -90,14 +106,39 @@ def get_safe_logger(config_path: Path, name: LoggerChoice) -> logging.Logger:
     )
 
 
-# todo: should maybe move that to a function & improve default configuration
-try:
-    logger = get_safe_logger(config_path=LOGGER_CONFIG, name=LOGGER_NAME)
-except Exception as e:
-    logging.basicConfig(level=logging.DEBUG)
-    logger = logging.getLogger("fallback")
-    logger.error("Logging configuration failed, using fallback logger.")
-    logger.error(f"Error message was: {e}")
+@lru_cache(maxsize=1)
+def get_logger() -> logging.Logger:
+    """
+    Returns the package logger, configuring logging on the first call.
+
+    Falls back on a basic configuration if the YAML one cannot be loaded.
+
+    Returns:
+        logging.Logger: The configured logger, or the `fallback` one.
+    """
+    try:
+        return get_safe_logger(config_path=LOGGER_CONFIG, name=LOGGER_NAME)
+    except Exception as e:
+        logging.basicConfig(level=logging.DEBUG)
+        fallback = logging.getLogger("fallback")
+        fallback.error("Logging configuration failed, using fallback logger.")
+        fallback.error(f"Error message was: {e}")
+        return fallback
+
+
+class _LazyLogger:
+    """
+    Stand-in for the package logger, configured on first use.
+    """
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(get_logger(), attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy {get_logger()!r}>"
+
+
+logger = cast(logging.Logger, _LazyLogger())
 
 if __name__ == "__main__":
     extras = {"status": "working"}
@@ -0,0 +1,176 @@
+"""
+Health of the event loop while the asynchronous stages run.
+
+A heartbeat task sleeps `interval` seconds in a loop, its extra delay is the
+scheduling lag of the loop (how long ready callbacks wait). A watchdog thread
+notices when the heartbeat stops beating for more than `threshold` seconds, i.e.
+when a callback blocks the loop (parsing, hashing or polars work on the loop
+thread), and logs the task running it with the current stack of the loop thread.
+The lag percentiles of the last `MAX_SAMPLES` beats are logged and exported as
+gauges (see `instrumentation`) when the monitor stops, and every `report_every`
+seconds while it runs.
+"""
+
+import asyncio
+import math
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from de_electricity_meteo.instrumentation import set_gauge
+from de_electricity_meteo.logger import logger
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+# frames of the blocking stack kept in the log record
+STACK_LIMIT = 20
+
+# lag samples kept for the percentiles, the last ~3.5 minutes at 50 ms
+MAX_SAMPLES = 4096
+
+
+def percentile(values: list[float], quantile: float) -> float:
+    """
+    Nearest-rank percentile of sorted values (0 when empty).
+    """
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(quantile * len(values)) - 1)]
+
+
+class LoopMonitor:
+    """
+    Measures the lag of the running event loop and reports blocking callbacks.
+
+    Usage: `async with LoopMonitor("object_store.sync"): await asyncio.gather(...)`.
+
+    Args:
+        name (str): Name of the monitored section, label of the exported gauges.
+        interval (float): Period of the heartbeat, in seconds.
+        threshold (float): Blocking duration reported with a stack, in seconds.
+        report_every (float | None): Period of the percentile reports while
+            running, only at the end when None.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float = 0.05,
+        threshold: float = 0.25,
+        report_every: float | None = 60.0,
+    ):
+        self.name = name
+        self.interval = interval
+        self.threshold = threshold
+        self.report_every = report_every
+        # bounded, `report` sorts it on the loop thread
+        self.lags: deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.blocked = 0
+        self._beat = time.perf_counter()
+        self._reported_beat = 0.0
+        self._stopped = threading.Event()
+
+    async def _heartbeat(self) -> None:
+        last_report = time.perf_counter()
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._beat = time.perf_counter()
+            self.lags.append(max(0.0, self._beat - started - self.interval))
+
+            if (
+                self.report_every is not None
+                and self._beat - last_report >= self.report_every
+            ):
+                self.report()
+                last_report = self._beat
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            blocked_s = time.perf_counter() - beat - self.interval
+            if blocked_s > self.threshold and beat != self._reported_beat:
+                # once per blocking episode
+                self._reported_beat = beat
+                self.blocked += 1
+                self._report_blocked(blocked_s)
+
+    def _report_blocked(self, blocked_s: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame, limit=STACK_LIMIT) if frame else []
+        task = asyncio.current_task(self._loop)
+        coroutine = task.get_coro() if task else None
+        logger.warning(
+            "Event loop blocked",
+            extra={
+                "monitor": self.name,
+                "blocked_s": round(blocked_s, 3),
+                "task": task.get_name() if task else None,
+                "coroutine": getattr(coroutine, "__qualname__", None),
+                "stack": "".join(stack),
+            },
+        )
+
+    def report(self) -> dict[str, float]:
+        """
+        Logs and exports the lag percentiles measured so far.
+
+        Returns:
+            dict[str, float]: Lag (seconds) per quantile, and the maximum.
+        """
+        lags = sorted(self.lags)
+        summary = {f"p{round(q * 100)}": percentile(lags, q) for q in QUANTILES}
+        summary["max"] = lags[-1] if lags else 0.0
+
+        for quantile in QUANTILES:
+            set_gauge(
+                "loop_lag_seconds",
+                percentile(lags, quantile),
+                "Scheduling lag of the event loop.",
+                monitor=self.name,
+                quantile=str(quantile),
+            )
+        set_gauge(
+            "loop_blocked",
+            self.blocked,
+            "Callbacks that blocked the event loop beyond the threshold.",
+            monitor=self.name,
+        )
+        logger.info(
+            "Event loop lag",
+            extra={
+                "monitor": self.name,
+                "samples": len(lags),
+                "blocked": self.blocked,
+                **{key: round(value, 6) for key, value in summary.items()},
+            },
+        )
+        return summary
+
+    async def __aenter__(self) -> "LoopMonitor":
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-monitor")
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        # the last beat may be pending behind a blocking callback
+        overdue = time.perf_counter() - self._beat - self.interval
+        if overdue > 0:
+            self.lags.append(overdue)
+
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._watchdog.join()
+        self.report()
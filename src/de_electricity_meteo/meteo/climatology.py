@@ -0,0 +1,362 @@
+"""
+Backfill of the Météo-France hourly climatological data (`BASE/HOR`).
+
+The data is published as one gzipped CSV per département and period
+(`H_<departement>_<periode>.csv.gz`), tens of GB for all départements and decades.
+The files are discovered by listing the object store, downloaded with a bounded
+concurrency and parsed in a process pool (one single-threaded polars per core) into
+a fixed schema. The output is parquet partitioned by département and year, one file
+per source file, so that each source file can be (re)processed independently and an
+interrupted backfill restarts where it stopped.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import METEO_BRONZE, METEO_HORAIRE_SILVER
+from de_electricity_meteo.downloader import save_file
+from de_electricity_meteo.instrumentation import (
+    merge_metrics,
+    record,
+    span,
+    take_metrics,
+)
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.loop_monitor import LoopMonitor
+from de_electricity_meteo.meteo.object_store import (
+    SYNCHRO_FTP_PREFIX,
+    RemoteObject,
+    list_objects,
+)
+from de_electricity_meteo.profiling import add_profile_arguments, configure_profiling
+from de_electricity_meteo.schemas import check_header, get_schema
+
+HOURLY_PREFIX = f"{SYNCHRO_FTP_PREFIX}BASE/HOR/"
+
+FILE_PATTERN = re.compile(r"^H_(?P<departement>\w{2,3})_(?P<periode>[\w-]+)\.csv\.gz$")
+
+# columns of the source files, see `schemas`
+SOURCE_SCHEMA = get_schema("meteo_horaire")
+
+# quality codes (q*) are dropped, station metadata lives in the stations table
+MEASURES = {
+    name: dtype
+    for name, dtype in SOURCE_SCHEMA.dtypes().items()
+    if name not in SOURCE_SCHEMA.required
+}
+
+SCHEMA = {
+    "num_poste": pl.String,
+    "date_heure": pl.Datetime("us", "UTC"),
+    **MEASURES,
+}
+
+PARTITION_SCHEMA = {"departement": pl.String, "annee": pl.Int32}
+
+DONE_DIR = "_done"
+
+
+def _header(path: Path) -> list[str]:
+    with gzip.open(path, mode="rt", encoding="utf-8") as f:
+        return f.readline().rstrip("\r\n").split(";")
+
+
+def read_hourly(path: Path) -> pl.DataFrame:
+    """
+    Reads one hourly CSV into the fixed schema.
+
+    Only the needed columns are parsed, as strings (station ids have leading
+    zeros), then cast to the dtypes of `SOURCE_SCHEMA`; columns missing from old
+    files are null. `aaaammjjhh` is decoded to a UTC timestamp in a single
+    vectorized `strptime`. The header is checked for drift first.
+
+    Args:
+        path (Path): Gzipped CSV (`;` separated).
+
+    Returns:
+        pl.DataFrame: One row per station and hour, see `SCHEMA`.
+    """
+    # column names are upper case in the published files
+    columns = {name.lower(): name for name in _header(path)}
+    check_header(SOURCE_SCHEMA.source, list(columns), path)
+    wanted = [
+        name for name in ["num_poste", "aaaammjjhh", *MEASURES] if name in columns
+    ]
+
+    raw = pl.read_csv(
+        path,
+        separator=";",
+        columns=[columns[name] for name in wanted],
+        infer_schema=False,
+    ).rename(str.lower)
+
+    return raw.select(
+        pl.col("num_poste"),
+        # polars needs the minutes to parse an hour
+        (pl.col("aaaammjjhh") + "00")
+        .str.to_datetime("%Y%m%d%H%M", time_zone="UTC")
+        .alias("date_heure"),
+        *[
+            pl.col(name).str.strip_chars().cast(dtype, strict=False)
+            if name in raw.columns
+            else pl.lit(None, dtype=dtype).alias(name)
+            for name, dtype in MEASURES.items()
+        ],
+    )
+
+
+def _previous_outputs(source: Path, departement: str, output_dir: Path) -> list[Path]:
+    """
+    Partitions written from earlier versions of a source file.
+
+    A rolling file (`latest-...`, `previous-...`) is renamed when its period moves,
+    its earlier versions are the files of the same rolling series.
+    """
+    stem = source.name.removesuffix(".csv.gz")
+    pattern = stem
+    match = FILE_PATTERN.match(source.name)
+    if match is not None and not match["periode"][0].isdigit():
+        series = match["periode"].split("-")[0]
+        pattern = f"{stem[: match.start('periode')]}{series}-*"
+    return sorted(
+        (output_dir / f"departement={departement}").glob(f"annee=*/{pattern}.parquet")
+    )
+
+
+@span("climatology.convert", dataset="meteo_horaire")
+def convert_file(source: Path, departement: str, output_dir: Path) -> int:
+    """
+    Converts one source file into its yearly parquet partitions.
+
+    Runs in a worker process, the partitions of a source file are always replaced
+    as a whole so that a conversion can be retried: those of its earlier versions
+    are deleted first, a file that shrank or was renamed leaves no stale year.
+
+    Args:
+        source (Path): Gzipped CSV of a département and period.
+        departement (str): Code of the département of the file.
+        output_dir (Path): Root of the partitioned dataset.
+
+    Returns:
+        int: Number of rows written.
+    """
+    hourly = read_hourly(source).with_columns(
+        pl.col("date_heure").dt.year().alias("annee")
+    )
+    stem = source.name.removesuffix(".csv.gz")
+    for path in _previous_outputs(source, departement, output_dir):
+        path.unlink(missing_ok=True)
+
+    for (annee,), year in hourly.partition_by(
+        "annee", as_dict=True, include_key=False
+    ).items():
+        path = output_dir / f"departement={departement}" / f"annee={annee}"
+        path.mkdir(parents=True, exist_ok=True)
+        tmp_path = path / f"{stem}.tmp"
+        year.sort("num_poste", "date_heure").write_parquet(tmp_path)
+        os.replace(tmp_path, path / f"{stem}.parquet")
+        record(bytes_out=(path / f"{stem}.parquet").stat().st_size)
+
+    record(bytes_in=source.stat().st_size, rows_out=len(hourly))
+    return len(hourly)
+
+
+def _departement(obj: RemoteObject) -> str:
+    match = FILE_PATTERN.match(obj.name)
+    if match is None:
+        raise ValueError(f"Not an hourly climatology file: {obj.key}")
+    return match["departement"]
+
+
+def _done_path(obj: RemoteObject, output_dir: Path) -> Path:
+    return output_dir / DONE_DIR / f"{obj.name}.json"
+
+
+def is_done(obj: RemoteObject, output_dir: Path = METEO_HORAIRE_SILVER) -> bool:
+    """
+    Whether this exact version (size and etag) of a source file was converted.
+    """
+    path = _done_path(obj, output_dir)
+    if not path.exists():
+        return False
+    with path.open(mode="rt", encoding="utf-8") as f:
+        done = json.load(f)
+    return done["size"] == obj.size and done["etag"] == obj.etag
+
+
+def _mark_done(obj: RemoteObject, rows: int, output_dir: Path) -> None:
+    path = _done_path(obj, output_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open(mode="wt", encoding="utf-8") as f:
+        json.dump({"size": obj.size, "etag": obj.etag, "rows": rows}, f)
+
+
+def _convert_in_worker(
+    source: Path, departement: str, output_dir: Path
+) -> tuple[int, dict[tuple[str, str], dict[str, float]]]:
+    """
+    Converts a file in a worker process, returning the metrics of its spans so
+    that they reach the metrics file of the parent.
+    """
+    rows = convert_file(source, departement, output_dir)
+    return rows, take_metrics()
+
+
+@contextmanager
+def _single_threaded_polars() -> Iterator[None]:
+    """
+    Spawned workers inherit the environment: one polars thread per process avoids
+    oversubscribing the cores.
+    """
+    previous = os.environ.get("POLARS_MAX_THREADS")
+    os.environ["POLARS_MAX_THREADS"] = "1"
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["POLARS_MAX_THREADS"]
+        else:
+            os.environ["POLARS_MAX_THREADS"] = previous
+
+
+async def discover(departements: Sequence[str] | None = None) -> list[RemoteObject]:
+    """
+    Lists the hourly files, optionally restricted to some départements.
+    """
+    return [
+        obj
+        for obj in await list_objects(HOURLY_PREFIX)
+        if FILE_PATTERN.match(obj.name)
+        and (departements is None or _departement(obj) in departements)
+    ]
+
+
+async def backfill(
+    departements: Sequence[str] | None = None,
+    workers: int | None = None,
+    downloads: int = 4,
+    bronze_dir: Path = METEO_BRONZE,
+    output_dir: Path = METEO_HORAIRE_SILVER,
+) -> dict[str, int]:
+    """
+    Downloads and converts the hourly files not converted yet.
+
+    Downloads are bounded by a semaphore and feed the process pool as soon as they
+    complete, so network and parsing overlap. A file already downloaded with the
+    remote size is not downloaded again.
+
+    Args:
+        departements (Sequence[str] | None): Codes of the départements, all when None.
+        workers (int | None): Size of the process pool, one per core when None.
+        downloads (int): Maximum number of concurrent downloads.
+        bronze_dir (Path): Local mirror of the bucket.
+        output_dir (Path): Root of the partitioned dataset.
+
+    Returns:
+        dict[str, int]: Number of rows written per converted file.
+    """
+    objects = await discover(departements)
+    todo = [obj for obj in objects if not is_done(obj, output_dir)]
+    logger.info(
+        "Hourly climatology backfill started",
+        extra={"files": len(objects), "todo": len(todo), "workers": workers},
+    )
+
+    semaphore = asyncio.Semaphore(downloads)
+    loop = asyncio.get_running_loop()
+    # the workers inherit the profiling run directory of this process
+    configure_profiling(None)
+
+    with (
+        _single_threaded_polars(),
+        ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool,
+    ):
+
+        async def process(obj: RemoteObject) -> int:
+            path = bronze_dir / obj.key
+            async with semaphore:
+                if not path.exists() or path.stat().st_size != obj.size:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    await save_file(url=obj.url, path=path, dataset="meteo_horaire")
+
+            rows, metrics = await loop.run_in_executor(
+                pool, _convert_in_worker, path, _departement(obj), output_dir
+            )
+            merge_metrics(metrics)
+            _mark_done(obj, rows, output_dir)
+            return rows
+
+        async with LoopMonitor("climatology.backfill"):
+            results = await asyncio.gather(
+                *[process(obj) for obj in todo], return_exceptions=True
+            )
+
+    converted = {}
+    for obj, result in zip(todo, results):
+        if isinstance(result, BaseException):
+            logger.error(
+                "Hourly climatology file failed",
+                extra={"key": obj.key, "error": str(result)},
+            )
+        else:
+            converted[obj.name] = result
+
+    logger.info(
+        "Hourly climatology backfill done",
+        extra={"files": len(converted), "rows": sum(converted.values())},
+    )
+
+    return converted
+
+
+def scan_hourly(output_dir: Path = METEO_HORAIRE_SILVER) -> pl.LazyFrame:
+    """
+    Scans the partitioned hourly data, filters on `departement` and `annee` prune
+    the files.
+    """
+    return pl.scan_parquet(
+        output_dir / "departement=*/**/*.parquet",
+        hive_partitioning=True,
+        hive_schema=PARTITION_SCHEMA,
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Backfill the Météo-France hourly climatological data."
+    )
+    parser.add_argument(
+        "--departements", nargs="+", help="codes of the départements (all by default)"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="size of the process pool (one per core)"
+    )
+    parser.add_argument(
+        "--downloads", type=int, default=4, help="maximum concurrent downloads"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args.profile, args.profile_dir)
+
+    # exports the stage, worker and event loop metrics when the backfill ends
+    with span("climatology.backfill", dataset="meteo_horaire", export=True):
+        asyncio.run(
+            backfill(args.departements, workers=args.workers, downloads=args.downloads)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Weather features for the correlation with electricity production and consumption.
+
+Degree-days, rolling means and extremes over 24 hours and 7 days, and wind and
+solar power proxies, computed as polars window expressions over series sorted by
+station (or region) and time. Rolling windows are time based, so a gap in a series
+shortens its windows instead of shifting them.
+
+Features are materialized in the gold layer per year; an update only computes the
+periods after the last materialized hour, reading a week of history before it so
+that the rolling windows of the new rows are complete.
+"""
+
+import os
+from datetime import timedelta
+from pathlib import Path
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import METEO_FEATURES_GOLD
+from de_electricity_meteo.instrumentation import span
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.profiling import collect
+
+# base temperatures of the French degree-days (DJU)
+HEATING_BASE_C = 18.0
+COOLING_BASE_C = 18.0
+
+# generic wind turbine: cut-in, rated and cut-out speeds at hub height (m/s)
+WIND_CUT_IN = 3.0
+WIND_RATED = 12.0
+WIND_CUT_OUT = 25.0
+
+# global radiation is published in J/cm² over the hour
+J_CM2_PER_HOUR_TO_W_M2 = 10_000 / 3_600
+
+# longest rolling window, history read before the recomputed period
+LOOKBACK = timedelta(days=7)
+
+# suffix of the feature names and polars duration of the rolling windows
+WINDOWS = {"24h": "24h", "7j": "7d"}
+
+
+def _rolling(column: str, stat: str, window: str, time_column: str) -> pl.Expr:
+    """
+    Time based rolling `stat` of a column, named `<column>_<stat>_<window>`.
+    """
+    rolling = getattr(pl.col(column), f"rolling_{stat}_by")
+    return rolling(time_column, window_size=WINDOWS[window]).alias(
+        f"{column}_{stat}_{window}"
+    )
+
+
+def feature_expressions(
+    columns: list[str], time_column: str = "date_heure"
+) -> tuple[list[pl.Expr], list[pl.Expr]]:
+    """
+    Feature expressions for the measures available in a series.
+
+    Args:
+        columns (list[str]): Columns of the series.
+        time_column (str): Timestamp column of the series.
+
+    Returns:
+        tuple[list[pl.Expr], list[pl.Expr]]: Row-wise features, then rolling ones
+            (which may use the former and still have to be evaluated over the key
+            of the series).
+    """
+    derived, rolling = [], []
+
+    if "t" in columns:
+        # each hour contributes 1/24 of a degree-day
+        derived += [
+            ((HEATING_BASE_C - pl.col("t")).clip(lower_bound=0) / 24).alias(
+                "dju_chauffage"
+            ),
+            ((pl.col("t") - COOLING_BASE_C).clip(lower_bound=0) / 24).alias(
+                "dju_climatisation"
+            ),
+        ]
+        rolling += [
+            _rolling(column, stat, window, time_column)
+            for column, stats in (
+                ("t", ("mean", "min", "max")),
+                ("dju_chauffage", ("sum",)),
+                ("dju_climatisation", ("sum",)),
+            )
+            for stat in stats
+            for window in WINDOWS
+        ]
+
+    if "ff" in columns:
+        speed = pl.col("ff")
+        derived += [
+            speed.pow(3).alias("ff_cube"),
+            # share of the rated power of a generic turbine
+            pl.when(speed.is_between(WIND_CUT_IN, WIND_CUT_OUT))
+            .then(
+                (speed.clip(upper_bound=WIND_RATED).pow(3) - WIND_CUT_IN**3)
+                / (WIND_RATED**3 - WIND_CUT_IN**3)
+            )
+            .otherwise(0.0)
+            .alias("eolien_facteur"),
+        ]
+        rolling += [
+            _rolling(column, stat, window, time_column)
+            for column, stat in (
+                ("ff_cube", "mean"),
+                ("eolien_facteur", "mean"),
+                ("ff", "max"),
+            )
+            for window in WINDOWS
+        ]
+
+    if "glo" in columns:
+        derived.append((pl.col("glo") * J_CM2_PER_HOUR_TO_W_M2).alias("rayonnement"))
+        rolling += [
+            _rolling("rayonnement", "mean", window, time_column) for window in WINDOWS
+        ]
+
+    if "rr1" in columns:
+        rolling += [_rolling("rr1", "sum", window, time_column) for window in WINDOWS]
+
+    return derived, rolling
+
+
+def compute_features(
+    lf: pl.LazyFrame, key: str, time_column: str = "date_heure"
+) -> pl.LazyFrame:
+    """
+    Adds the weather features to a series of several stations or regions.
+
+    Args:
+        lf (pl.LazyFrame): Hourly weather (`t`, `ff`, `glo`, `rr1` when available).
+        key (str): Column identifying a series (`num_poste`, `code_region`).
+        time_column (str): Timestamp column of the series.
+
+    Returns:
+        pl.LazyFrame: The series with the features, sorted on key and time.
+    """
+    derived, rolling = feature_expressions(
+        lf.collect_schema().names(), time_column=time_column
+    )
+
+    lf = lf.sort(key, time_column)
+    if derived:
+        lf = lf.with_columns(derived)
+    if rolling:
+        lf = lf.with_columns(expression.over(key) for expression in rolling)
+
+    return lf
+
+
+def _feature_dir(name: str, root: Path) -> Path:
+    return root / name
+
+
+def scan_features(name: str, root: Path = METEO_FEATURES_GOLD) -> pl.LazyFrame:
+    return pl.scan_parquet(
+        _feature_dir(name, root) / "**/*.parquet",
+        hive_partitioning=True,
+        hive_schema={"annee": pl.Int32},
+    )
+
+
+def materialized_until(
+    name: str,
+    key: str,
+    time_column: str = "date_heure",
+    root: Path = METEO_FEATURES_GOLD,
+) -> pl.DataFrame:
+    """
+    Last materialized timestamp of every series (`key`, `_since`).
+    """
+    if not any(_feature_dir(name, root).glob("annee=*/*.parquet")):
+        return pl.DataFrame(schema={key: pl.String, "_since": pl.Datetime("us", "UTC")})
+    return (
+        scan_features(name, root)
+        .group_by(key)
+        .agg(pl.col(time_column).max().alias("_since"))
+        .collect()
+    )
+
+
+def update_features(
+    source: pl.LazyFrame,
+    name: str,
+    key: str,
+    time_column: str = "date_heure",
+    root: Path = METEO_FEATURES_GOLD,
+) -> int:
+    """
+    Materializes the features of the periods not materialized yet.
+
+    Each series is computed after its last materialized timestamp only, with
+    `LOOKBACK` of history before it for the rolling windows; new series are
+    computed entirely. Delete the feature directory to rebuild it.
+
+    Args:
+        source (pl.LazyFrame): Hourly weather, see `compute_features`.
+        name (str): Name of the feature set, used as storage directory.
+        key (str): Column identifying a series.
+        time_column (str): Timestamp column of the source.
+        root (Path): Root directory of the feature sets.
+
+    Returns:
+        int: Number of rows materialized.
+    """
+    with span("features.update", dataset=name) as stats:
+        marks = materialized_until(name, key, time_column=time_column, root=root)
+        since = pl.col("_since")
+        time = pl.col(time_column)
+
+        source = source.join(marks.lazy(), on=key, how="left").filter(
+            since.is_null() | (time > since - LOOKBACK)
+        )
+        features = (
+            compute_features(source, key=key, time_column=time_column)
+            .filter(since.is_null() | (time > since))
+            .drop("_since")
+        )
+
+        fresh = collect(
+            features.with_columns(pl.col(time_column).dt.year().alias("annee")),
+            stage="features.update",
+        )
+
+        directory = _feature_dir(name, root)
+        for (annee,), fresh_year in fresh.partition_by(
+            "annee", as_dict=True, include_key=False
+        ).items():
+            path = directory / f"annee={annee}" / "0.parquet"
+            year = fresh_year
+            if path.exists():
+                year = pl.concat(
+                    [pl.read_parquet(path), fresh_year], how="diagonal_relaxed"
+                )
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            year.sort(key, time_column).write_parquet(tmp_path)
+            os.replace(tmp_path, path)
+            stats.record(bytes_out=path.stat().st_size)
+
+        logger.info(
+            "Weather features materialized",
+            extra={
+                "dataset": name,
+                "series": fresh[key].n_unique(),
+                "rows": len(fresh),
+            },
+        )
+
+        stats.record(rows_out=len(fresh))
+        return len(fresh)
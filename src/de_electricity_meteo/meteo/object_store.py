@@ -0,0 +1,316 @@
+"""
+Listing and delta-sync mirror of the Météo-France open data object store
+(`object.files.data.gouv.fr`).
+
+The bucket is S3 compatible: `ListObjectsV2` returns the keys under a prefix with
+their size, last modification and etag, 1000 per page. The local mirror keeps the
+keys as relative paths and a manifest of the version of every object downloaded,
+so a sync only downloads the new or changed objects and prunes the removed ones.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+from de_electricity_meteo._lazy import lazy_import
+from de_electricity_meteo.config.paths import METEO_BRONZE
+from de_electricity_meteo.downloader import save_file
+from de_electricity_meteo.instrumentation import span
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.loop_monitor import LoopMonitor
+from de_electricity_meteo.profiling import add_profile_arguments, configure_profiling
+
+if TYPE_CHECKING:
+    import aiohttp
+else:
+    aiohttp = lazy_import("aiohttp")
+
+BUCKET_URL = "https://object.files.data.gouv.fr/meteofrance"
+SYNCHRO_FTP_PREFIX = "data/synchro_ftp/"
+
+S3_NAMESPACE = {"s3": "http://s3.amazonaws.com/doc/2006-03-01/"}
+
+MANIFEST_NAME = "_manifest.json"
+
+
+@dataclass(frozen=True)
+class RemoteObject:
+    """
+    Object of the bucket.
+
+    Attributes:
+        key (str): Full key, relative to the bucket.
+        size (int): Size in bytes.
+        last_modified (datetime): Last modification (UTC).
+        etag (str): Entity tag, a content hash for non multipart uploads.
+    """
+
+    key: str
+    size: int
+    last_modified: datetime
+    etag: str
+
+    @property
+    def url(self) -> str:
+        return f"{BUCKET_URL}/{self.key}"
+
+    @property
+    def name(self) -> str:
+        return self.key.rsplit("/", maxsplit=1)[-1]
+
+
+def parse_list_objects(document: str) -> tuple[list[RemoteObject], str | None]:
+    """
+    Parses one page of a `ListObjectsV2` response.
+
+    Args:
+        document (str): XML body of the response.
+
+    Returns:
+        tuple[list[RemoteObject], str | None]: The objects of the page and the
+            continuation token of the next one (None on the last page).
+    """
+    root = ET.fromstring(document)
+
+    objects = [
+        RemoteObject(
+            key=content.findtext("s3:Key", "", S3_NAMESPACE),
+            size=int(content.findtext("s3:Size", "0", S3_NAMESPACE)),
+            last_modified=datetime.fromisoformat(
+                content.findtext("s3:LastModified", "", S3_NAMESPACE)
+            ),
+            etag=content.findtext("s3:ETag", "", S3_NAMESPACE).strip('"'),
+        )
+        for content in root.iterfind("s3:Contents", S3_NAMESPACE)
+    ]
+
+    truncated = root.findtext("s3:IsTruncated", "false", S3_NAMESPACE) == "true"
+    token = root.findtext("s3:NextContinuationToken", None, S3_NAMESPACE)
+
+    return objects, token if truncated else None
+
+
+async def list_objects(
+    prefix: str = SYNCHRO_FTP_PREFIX, bucket_url: str = BUCKET_URL
+) -> list[RemoteObject]:
+    """
+    Lists every object under a prefix, following the pagination.
+
+    Args:
+        prefix (str): Key prefix, relative to the bucket.
+        bucket_url (str): URL of the bucket.
+
+    Returns:
+        list[RemoteObject]: The objects, sorted by key.
+    """
+    objects = []
+    params = {"list-type": "2", "prefix": prefix}
+
+    async with aiohttp.ClientSession() as session:
+        while True:
+            async with session.get(bucket_url, params=params) as response:
+                response.raise_for_status()
+                page, token = parse_list_objects(await response.text())
+
+            objects.extend(page)
+            if token is None:
+                break
+            params["continuation-token"] = token
+
+    logger.info(
+        "Object store listed",
+        extra={
+            "prefix": prefix,
+            "objects": len(objects),
+            "size_mb": round(sum(obj.size for obj in objects) / (1024 * 1024), 2),
+        },
+    )
+
+    return sorted(objects, key=lambda obj: obj.key)
+
+
+@dataclass(frozen=True)
+class SyncReport:
+    """
+    Outcome of a mirror synchronisation.
+
+    Attributes:
+        downloaded (list[str]): Keys downloaded (new or changed).
+        unchanged (int): Number of objects already up to date.
+        pruned (list[str]): Keys removed upstream and deleted locally.
+        failed (list[str]): Keys whose download failed, retried on the next sync.
+    """
+
+    downloaded: list[str]
+    unchanged: int
+    pruned: list[str]
+    failed: list[str]
+
+
+def load_manifest(path: Path) -> dict[str, dict]:
+    """
+    Reads the manifest of a mirror, empty when it was never synchronised.
+
+    Args:
+        path (Path): Location of the manifest.
+
+    Returns:
+        dict[str, dict]: `size`, `etag` and `last_modified` of every mirrored key.
+    """
+    if not path.exists():
+        return {}
+    with path.open(mode="rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict[str, dict], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open(mode="wt", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _manifest_entry(obj: RemoteObject) -> dict:
+    return {
+        "size": obj.size,
+        "etag": obj.etag,
+        "last_modified": obj.last_modified.isoformat(),
+    }
+
+
+def is_up_to_date(
+    obj: RemoteObject, manifest: dict[str, dict], local_dir: Path
+) -> bool:
+    """
+    Whether the mirrored copy of an object matches its remote version.
+    """
+    path = local_dir / obj.key
+    return (
+        manifest.get(obj.key) == _manifest_entry(obj)
+        and path.exists()
+        and path.stat().st_size == obj.size
+    )
+
+
+async def sync(
+    prefix: str = SYNCHRO_FTP_PREFIX,
+    local_dir: Path = METEO_BRONZE,
+    concurrency: int = 8,
+    prune: bool = True,
+) -> SyncReport:
+    """
+    Mirrors a prefix of the bucket, downloading only new or changed objects.
+
+    Objects are compared to the manifest on their size, etag and last
+    modification. Downloads go to a temporary file replaced once complete, and the
+    manifest only records the downloads that succeeded.
+
+    Args:
+        prefix (str): Key prefix to mirror.
+        local_dir (Path): Root of the local mirror.
+        concurrency (int): Maximum number of concurrent downloads.
+        prune (bool): Whether to delete the local objects removed upstream.
+
+    Returns:
+        SyncReport: What was downloaded, kept and pruned.
+    """
+    manifest_path = local_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    remote = await list_objects(prefix)
+
+    changed = [obj for obj in remote if not is_up_to_date(obj, manifest, local_dir)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def download(obj: RemoteObject) -> None:
+        path = local_dir / obj.key
+        tmp_path = path.with_name(f"{path.name}.part")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        async with semaphore:
+            await save_file(url=obj.url, path=tmp_path, dataset="meteofrance")
+        os.replace(tmp_path, path)
+        manifest[obj.key] = _manifest_entry(obj)
+
+    async with LoopMonitor("object_store.sync"):
+        results = await asyncio.gather(
+            *[download(obj) for obj in changed], return_exceptions=True
+        )
+
+    downloaded, failed = [], []
+    for obj, result in zip(changed, results):
+        if isinstance(result, BaseException):
+            logger.error(
+                "Object sync failed", extra={"key": obj.key, "error": str(result)}
+            )
+            failed.append(obj.key)
+        else:
+            downloaded.append(obj.key)
+
+    pruned = []
+    if prune:
+        remote_keys = {obj.key for obj in remote}
+        for key in sorted(manifest):
+            if key.startswith(prefix) and key not in remote_keys:
+                (local_dir / key).unlink(missing_ok=True)
+                del manifest[key]
+                pruned.append(key)
+
+    save_manifest(manifest, manifest_path)
+
+    report = SyncReport(
+        downloaded=downloaded,
+        unchanged=len(remote) - len(changed),
+        pruned=pruned,
+        failed=failed,
+    )
+    logger.info(
+        "Object store synchronised",
+        extra={
+            "prefix": prefix,
+            "downloaded": len(report.downloaded),
+            "size_mb": round(
+                sum(obj.size for obj in changed if obj.key in downloaded)
+                / (1024 * 1024),
+                2,
+            ),
+            "unchanged": report.unchanged,
+            "pruned": len(report.pruned),
+            "failed": len(report.failed),
+        },
+    )
+
+    return report
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Mirror a prefix of the Météo-France object store."
+    )
+    parser.add_argument("--prefix", default=SYNCHRO_FTP_PREFIX, help="key prefix")
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="maximum concurrent downloads"
+    )
+    parser.add_argument(
+        "--no-prune", action="store_true", help="keep objects removed upstream"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args.profile, args.profile_dir)
+
+    # exports the stage and event loop metrics when the sync ends
+    with span("object_store.sync", dataset="meteofrance", export=True):
+        asyncio.run(
+            sync(args.prefix, concurrency=args.concurrency, prune=not args.no_prune)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Météo-France station metadata (`fiches.json`).
+
+The JSON array is decoded object by object while it is downloaded, so it is never
+held (nor written) as a whole: each station is mapped onto a typed record and the
+table is persisted as parquet in the silver layer. The activity periods of the
+stations (`date_debut`, `date_fin`) are then served by an interval index.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+import os
+from datetime import date, datetime
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator
+
+from de_electricity_meteo._lazy import lazy_import
+from de_electricity_meteo.config.paths import METEO_STATIONS_SILVER
+from de_electricity_meteo.downloader import stream_retry
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.schemas import detect_drift
+
+if TYPE_CHECKING:
+    import aiohttp
+    import polars as pl
+else:
+    pl = lazy_import("polars")
+
+DOWNLOAD_URL = (
+    "https://object.files.data.gouv.fr/meteofrance/data/synchro_ftp/BASE/"
+    "METADONNEES_STATION/fiches.json"
+)
+
+
+# upstream keys, see `schemas`
+SOURCE = "meteo_stations"
+
+
+@cache
+def station_schema() -> pl.Schema:
+    return pl.Schema(
+        {
+            "id": pl.String,
+            "nom": pl.String,
+            "lieu_dit": pl.String,
+            "code_departement": pl.String,
+            "latitude": pl.Float64,
+            "longitude": pl.Float64,
+            "altitude": pl.Float64,
+            "date_debut": pl.Date,
+            "date_fin": pl.Date,
+        }
+    )
+
+
+# overseas départements have 3-digit codes (971...) prefixing the station id
+OVERSEAS_PREFIX = "97"
+
+
+def code_departement(station_id: pl.Expr) -> pl.Expr:
+    """
+    Département of a station, the prefix of its id.
+    """
+    return (
+        pl.when(station_id.str.starts_with(OVERSEAS_PREFIX))
+        .then(station_id.str.slice(0, 3))
+        .otherwise(station_id.str.slice(0, 2))
+    )
+
+
+def _decode_date(value: str | None) -> date | None:
+    """
+    Parses `YYYY-MM-DD` or an ISO timestamp, open periods are empty strings.
+    """
+    if not value:
+        return None
+    return date.fromisoformat(value[:10])
+
+
+def station_record(station: dict[str, Any]) -> dict[str, Any]:
+    """
+    Maps one station of `fiches.json` onto `station_schema()`, but for
+    `code_departement` which `stations_frame` derives from the ids.
+
+    Coordinates are read at the top level or, when the station moved, from its
+    latest position.
+
+    Args:
+        station (dict[str, Any]): Decoded JSON object of a station.
+
+    Returns:
+        dict[str, Any]: The typed record.
+    """
+    position = station
+    if station.get("positions"):
+        position = station["positions"][-1]
+
+    return {
+        "id": str(station["id"]),
+        "nom": station.get("nom"),
+        "lieu_dit": station.get("lieuDit") or None,
+        "latitude": position.get("lat", position.get("latitude")),
+        "longitude": position.get("lon", position.get("longitude")),
+        "altitude": position.get("alt", position.get("altitude")),
+        "date_debut": _decode_date(station.get("dateDebut")),
+        "date_fin": _decode_date(station.get("dateFin")),
+    }
+
+
+def stations_frame(records: list[dict[str, Any]]) -> pl.DataFrame:
+    """
+    Typed stations table of records of `station_record`.
+    """
+    schema = station_schema()
+    return (
+        pl.DataFrame(
+            records,
+            schema={
+                name: dtype
+                for name, dtype in schema.items()
+                if name != "code_departement"
+            },
+            orient="row",
+        )
+        .with_columns(code_departement(pl.col("id")).alias("code_departement"))
+        .select(schema.names())
+    )
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Decodes the items of a JSON array as its bytes arrive.
+
+    Only the bytes of the item being decoded are buffered.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Raw chunks of a UTF-8 JSON array.
+
+    Yields:
+        Any: Every item of the array, in order.
+
+    Raises:
+        ValueError: If the document is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+
+    async for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        position = 0
+        while True:
+            # skip the separators between items
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the item is cut by the end of the chunk
+                break
+            yield item
+
+        buffer = buffer[position:]
+
+    raise ValueError("Truncated JSON array")
+
+
+def _write_stations(records: list[dict[str, Any]], path: Path) -> pl.DataFrame:
+    stations = stations_frame(records).sort("id")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    stations.write_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    return stations
+
+
+@stream_retry(max_retries=3)
+async def stream_stations(
+    response: aiohttp.ClientResponse, path: Path, buffer_size: int
+) -> pl.DataFrame:
+    """
+    Streams `fiches.json` into the typed stations table.
+
+    Args:
+        response (aiohttp.ClientResponse): Opened response (see `stream_retry`).
+        path (Path): Destination of the parquet table.
+        buffer_size (int): Size of the chunks read from the network.
+
+    Returns:
+        pl.DataFrame: The stations, see `station_schema()`.
+    """
+    records: list[dict[str, Any]] = []
+    async for station in iter_json_array(response.content.iter_chunked(buffer_size)):
+        if not records:
+            # the keys of the first object, before they are renamed
+            detect_drift(SOURCE, dict.fromkeys(station), path)
+        records.append(station_record(station))
+    stations = _write_stations(records, path)
+
+    logger.info(
+        "Météo-France stations ingested",
+        extra={
+            "path": path,
+            "stations": len(stations),
+            "en_service": stations["date_fin"].null_count(),
+        },
+    )
+
+    return stations
+
+
+async def download(
+    url: str = DOWNLOAD_URL, path: Path = METEO_STATIONS_SILVER
+) -> pl.DataFrame | None:
+    try:
+        return await stream_stations(url=url, path=path)
+    except Exception as e:
+        logger.error(f"Failed to download {url}. Error: {e}")
+        return None
+
+
+class StationIntervalIndex:
+    """
+    Interval index over the activity periods of the stations.
+
+    The periods are kept sorted twice, on their start and on their end. The
+    stations started before a date form a prefix of the first order and those still
+    active after it a suffix of the second: both are found by binary search and
+    only the smaller of the two is filtered. An open period (`date_fin` null) is
+    active forever, an unknown start is active since always.
+    """
+
+    def __init__(self, stations: pl.DataFrame):
+        periods = stations.select(
+            "id",
+            pl.col("date_debut").fill_null(date.min),
+            pl.col("date_fin").fill_null(date.max),
+        )
+        self._by_start = periods.sort("date_debut")
+        self._by_end = periods.sort("date_fin")
+
+    def __len__(self) -> int:
+        return len(self._by_start)
+
+    def _overlapping(self, start: date, end: date) -> pl.Series:
+        """
+        Stations whose period overlaps [start, end], both bounds included.
+        """
+        started = int(self._by_start["date_debut"].search_sorted(end, side="right"))
+        ended = int(self._by_end["date_fin"].search_sorted(start, side="left"))
+
+        if started <= len(self._by_end) - ended:
+            candidates = self._by_start.head(started).filter(
+                pl.col("date_fin") >= start
+            )
+        else:
+            candidates = self._by_end.slice(ended).filter(pl.col("date_debut") <= end)
+
+        return candidates["id"].sort()
+
+    def active_at(self, moment: date | datetime) -> pl.Series:
+        """
+        Ids of the stations in service at a date.
+
+        Args:
+            moment (date | datetime): Date (a datetime is truncated to its day).
+
+        Returns:
+            pl.Series: Sorted ids.
+        """
+        day = moment.date() if isinstance(moment, datetime) else moment
+        return self._overlapping(day, day)
+
+    def active_between(self, start: date | datetime, end: date | datetime) -> pl.Series:
+        """
+        Ids of the stations in service at some point of a range.
+
+        Args:
+            start (date | datetime): First day of the range (included).
+            end (date | datetime): Last day of the range (included).
+
+        Returns:
+            pl.Series: Sorted ids.
+        """
+        first, last = (
+            bound.date() if isinstance(bound, datetime) else bound
+            for bound in (start, end)
+        )
+        return self._overlapping(first, last)
+
+
+def load_interval_index(path: Path = METEO_STATIONS_SILVER) -> StationIntervalIndex:
+    return StationIntervalIndex(pl.read_parquet(path, columns=station_schema().names()))
+
+
+if __name__ == "__main__":
+    asyncio.run(download())
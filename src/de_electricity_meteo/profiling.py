@@ -0,0 +1,224 @@
+"""
+Opt-in profiling of the pipeline stages.
+
+The stages to profile are chosen without editing code, by shell-style patterns of
+stage names in the `DE_ELECTRICITY_METEO_PROFILE` environment variable or the
+`--profile` option of the command lines (`download,eco2mix.*`, `*` for all). Each
+span of a selected stage (see `instrumentation.span`) runs under cProfile and
+tracemalloc, and the lazy queries of a selected stage collected with `collect` save
+their optimized plan and the per-node timings of `LazyFrame.profile()`.
+
+The artifacts of a run go to one directory, `data/profiles/<start>-<pid>` unless
+`DE_ELECTRICITY_METEO_PROFILE_DIR` is set. Both variables are inherited by
+subprocesses (the climatology workers), which write to the same directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from de_electricity_meteo._lazy import lazy_import
+from de_electricity_meteo.config.paths import PROFILES
+from de_electricity_meteo.logger import logger
+
+if TYPE_CHECKING:
+    import polars as pl
+else:
+    pl = lazy_import("polars")
+
+PROFILE_ENV = "DE_ELECTRICITY_METEO_PROFILE"
+PROFILE_DIR_ENV = "DE_ELECTRICITY_METEO_PROFILE_DIR"
+
+# lines of the text reports
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+_artifacts = itertools.count()
+
+
+def selected_stages() -> list[str]:
+    patterns = os.environ.get(PROFILE_ENV, "")
+    return [pattern.strip() for pattern in patterns.split(",") if pattern.strip()]
+
+
+def is_profiled(stage: str) -> bool:
+    return any(fnmatchcase(stage, pattern) for pattern in selected_stages())
+
+
+def run_directory() -> Path:
+    """
+    Directory of the profiling artifacts of the run, shared with subprocesses.
+    """
+    directory = os.environ.get(PROFILE_DIR_ENV)
+    if directory is None:
+        directory = str(PROFILES / f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}")
+        os.environ[PROFILE_DIR_ENV] = directory
+    return Path(directory)
+
+
+def _artifact_prefix(stage: str) -> Path:
+    directory = run_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{stage}-{os.getpid()}-{next(_artifacts)}"
+
+
+def _suffixed(prefix: Path, suffix: str) -> Path:
+    return prefix.with_name(prefix.name + suffix)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        metavar="STAGES",
+        help="profile the stages matching these comma-separated patterns",
+    )
+    parser.add_argument(
+        "--profile-dir", type=Path, help="directory of the profiling artifacts"
+    )
+
+
+def configure_profiling(stages: str | None, directory: Path | None = None) -> None:
+    """
+    Selects the stages to profile (in the environment, for the subprocesses too).
+
+    The run directory is resolved here when stages are selected, so processes
+    spawned afterwards (the climatology workers) write to the same one.
+
+    Args:
+        stages (str | None): Comma-separated patterns of stage names, keeps the
+            environment selection when None.
+        directory (Path | None): Directory of the artifacts of the run.
+    """
+    if stages is not None:
+        os.environ[PROFILE_ENV] = stages
+    if directory is not None:
+        os.environ[PROFILE_DIR_ENV] = str(directory)
+    if selected_stages():
+        run_directory()
+
+
+class StageProfiler:
+    """
+    cProfile and tracemalloc over one execution of a stage.
+
+    A stage nested in a profiled stage is already covered by its profiles: only
+    one cProfile can be active and tracemalloc is owned by the outermost stage.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._profile: cProfile.Profile | None = None
+        self._traces = False
+
+    def start(self) -> None:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            self._profile = profile
+        except ValueError:
+            # another profiler is active
+            self._profile = None
+
+        self._traces = not tracemalloc.is_tracing()
+        if self._traces:
+            tracemalloc.start()
+
+    def stop(self) -> list[Path]:
+        """
+        Stops profiling and writes the artifacts.
+
+        Returns:
+            list[Path]: `.prof` (pstats, for snakeviz...), `.pstats.txt` (top
+                functions by cumulative time) and `.tracemalloc.txt` (top allocation
+                sites and peak), for the profilers this stage owned.
+        """
+        written = []
+        prefix = _artifact_prefix(self.stage)
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(_suffixed(prefix, ".prof"))
+            report = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=report)
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            _suffixed(prefix, ".pstats.txt").write_text(
+                report.getvalue(), encoding="utf-8"
+            )
+            written += [_suffixed(prefix, ".prof"), _suffixed(prefix, ".pstats.txt")]
+
+        if self._traces:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [f"current {current} B, peak {peak} B", ""] + [
+                str(statistic)
+                for statistic in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            ]
+            _suffixed(prefix, ".tracemalloc.txt").write_text(
+                "\n".join(lines) + "\n", encoding="utf-8"
+            )
+            written.append(_suffixed(prefix, ".tracemalloc.txt"))
+
+        if written:
+            logger.info(
+                "Stage profiled",
+                extra={"stage": self.stage, "artifacts": [str(p) for p in written]},
+            )
+        return written
+
+
+def start_profiling(stage: str) -> StageProfiler | None:
+    """
+    Starts profiling a stage if it is selected.
+    """
+    if not is_profiled(stage):
+        return None
+    profiler = StageProfiler(stage)
+    profiler.start()
+    return profiler
+
+
+def collect(lf: pl.LazyFrame, stage: str) -> pl.DataFrame:
+    """
+    Collects a lazy query, profiling it if its stage is selected.
+
+    The optimized plan is written to `<stage>-...plan.txt` and the start and end
+    (microseconds) of every node to `<stage>-...nodes.csv`.
+
+    Args:
+        lf (pl.LazyFrame): The query.
+        stage (str): Stage collecting it.
+
+    Returns:
+        pl.DataFrame: The result of the query.
+    """
+    if not is_profiled(stage):
+        return lf.collect()
+
+    prefix = _artifact_prefix(stage)
+    plan = _suffixed(prefix, ".plan.txt")
+    plan.write_text(lf.explain(optimized=True), encoding="utf-8")
+
+    df, timings = lf.profile()
+    nodes = _suffixed(prefix, ".nodes.csv")
+    timings.write_csv(nodes)
+
+    logger.info(
+        "Query profiled",
+        extra={
+            "stage": stage,
+            "artifacts": [str(plan), str(nodes)],
+            "duration_us": timings["end"].max(),
+        },
+    )
+    return df
@@ -0,0 +1,215 @@
+"""
+Cache of the results of lazy queries, for notebook cells and dashboards.
+
+A result is keyed on the serialized plan of the query (`LazyFrame.serialize`, exact
+where the text of `explain` abbreviates long literals such as `is_in` lists) and on
+the version of the data it scans, the fingerprint of its source files (see
+`table_cache.fingerprint`). Rewriting a silver or gold file changes the key, the
+results of the previous version are then never read again. Queries that cannot be
+serialized (Python functions without cloudpickle) are collected without caching.
+
+Results are kept in memory in an LRU bounded by their estimated size, and on disk
+as parquet files so that they survive a notebook restart and are shared between
+processes. A file is named after the plan and the data version of its result: the
+results of the older versions of a plan are deleted when a new one is written, and
+the least recently used files are evicted beyond a bound of the disk usage.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Sequence
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import DATA_CACHE
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.table_cache import fingerprint
+
+QUERY_CACHE = DATA_CACHE / "queries"
+
+# bound of the results kept in memory
+MAX_BYTES = 256 * 1024 * 1024
+
+# bound of the results kept on disk
+MAX_DISK_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def query_key(lf: pl.LazyFrame, sources: Path | Sequence[Path]) -> str:
+    """
+    Hash of the plan of a query and hash of the version of its sources, as
+    `<plan>-<version>`.
+
+    Raises:
+        FileNotFoundError: If a source file does not exist.
+        pl.exceptions.ComputeError: If the plan cannot be serialized.
+    """
+    plan = hashlib.blake2b(lf.serialize(), digest_size=16).hexdigest()
+    version = hashlib.blake2b(fingerprint(sources).encode(), digest_size=8).hexdigest()
+    return f"{plan}-{version}"
+
+
+class QueryCache:
+    """
+    Results of lazy queries, in memory (LRU) and on disk.
+
+    Args:
+        max_bytes (int): Bound of the estimated size of the results in memory, the
+            least recently used are evicted beyond it (they stay on disk).
+        directory (Path | None): Directory of the parquet results, memory only when
+            None.
+        max_disk_bytes (int): Bound of the size of the files on disk, the least
+            recently used are deleted beyond it.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_BYTES,
+        directory: Path | None = QUERY_CACHE,
+        max_disk_bytes: int = MAX_DISK_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[str, pl.DataFrame] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """
+        Estimated size (bytes) of the results in memory.
+        """
+        return self._size
+
+    def _remember(self, key: str, df: pl.DataFrame) -> None:
+        size = int(df.estimated_size())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._results:
+                return
+            self._results[key] = df
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._results.popitem(last=False)
+                self._size -= int(evicted.estimated_size())
+
+    def _recall(self, key: str) -> pl.DataFrame | None:
+        with self._lock:
+            df = self._results.get(key)
+            if df is not None:
+                self._results.move_to_end(key)
+            return df
+
+    def _path(self, key: str) -> Path | None:
+        if self.directory is None:
+            return None
+        return self.directory / f"{key}.parquet"
+
+    def _store(self, key: str, df: pl.DataFrame, path: Path) -> None:
+        """
+        Writes a result on disk, deletes the results of the other versions of its
+        plan, then evicts the least recently used files beyond the bound.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # unique per process, concurrent writers replace each other
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        df.write_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+        plan = key.split("-")[0]
+        for stale in path.parent.glob(f"{plan}-*.parquet"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+        files = []
+        for file in path.parent.glob("*.parquet"):
+            try:
+                files.append((file.stat(), file))
+            except FileNotFoundError:
+                # deleted by another process
+                continue
+        usage = sum(stat.st_size for stat, _ in files)
+        for stat, file in sorted(files, key=lambda entry: entry[0].st_mtime_ns):
+            if usage <= self.max_disk_bytes:
+                break
+            if file == path:
+                continue
+            file.unlink(missing_ok=True)
+            usage -= stat.st_size
+
+    def collect(self, lf: pl.LazyFrame, sources: Path | Sequence[Path]) -> pl.DataFrame:
+        """
+        Returns the result of a query, from the cache when its plan and sources did
+        not change.
+
+        Args:
+            lf (pl.LazyFrame): The query.
+            sources (Path | Sequence[Path]): Files or dataset directories it scans,
+                their version invalidates the result.
+
+        Returns:
+            pl.DataFrame: The result, a copy that can be modified.
+        """
+        try:
+            key = query_key(lf, sources)
+        except pl.exceptions.ComputeError:
+            self.misses += 1
+            return lf.collect()
+
+        df = self._recall(key)
+        if df is not None:
+            self.hits += 1
+            return df.clone()
+
+        path = self._path(key)
+        if path is not None and path.exists():
+            df = pl.read_parquet(path)
+            # recently used, kept by the eviction
+            path.touch()
+            self.hits += 1
+        else:
+            df = lf.collect()
+            self.misses += 1
+            if path is not None:
+                self._store(key, df, path)
+            logger.debug(
+                "Query result cached", extra={"key": key, "rows": len(df), "path": path}
+            )
+
+        self._remember(key, df)
+        return df.clone()
+
+    def clear(self) -> int:
+        """
+        Empties the memory and disk tiers.
+
+        Returns:
+            int: Number of results deleted from disk.
+        """
+        with self._lock:
+            self._results.clear()
+            self._size = 0
+
+        if self.directory is None or not self.directory.exists():
+            return 0
+        paths = list(self.directory.glob("*.parquet"))
+        for path in paths:
+            path.unlink(missing_ok=True)
+        return len(paths)
+
+
+# shared by the notebook cells of a process
+query_cache = QueryCache()
+
+
+def cached_collect(lf: pl.LazyFrame, sources: Path | Sequence[Path]) -> pl.DataFrame:
+    """
+    Collects a query through the shared cache (see `QueryCache.collect`).
+    """
+    return query_cache.collect(lf, sources)
@@ -0,0 +1,310 @@
+"""
+Precomputed multi-resolution rollups (hourly, daily, weekly, monthly) of time series,
+the eco2mix series per region and the hourly weather per station.
+
+Rollups are stored in long format, one row per (keys, variable, periode), with the
+sum, min, max and count of the measure so that any coarser aggregation can be
+derived exactly from them. Periods are computed in local time (Europe/Paris) and
+stored per year in the gold layer (`<dataset>/<resolution>/annee=YYYY/`).
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import ROLLUPS_GOLD
+from de_electricity_meteo.electricity import eco2mix
+from de_electricity_meteo.enums import Resolution
+from de_electricity_meteo.logger import logger
+from de_electricity_meteo.meteo import climatology
+
+# resolutions a granularity unit can be derived from, coarsest last
+COMPATIBLE_RESOLUTIONS = {
+    "h": [Resolution.HOUR],
+    "d": [Resolution.HOUR, Resolution.DAY],
+    "w": [Resolution.HOUR, Resolution.DAY, Resolution.WEEK],
+    "mo": [Resolution.HOUR, Resolution.DAY, Resolution.MONTH],
+    "q": [Resolution.HOUR, Resolution.DAY, Resolution.MONTH],
+    "y": [Resolution.HOUR, Resolution.DAY, Resolution.MONTH],
+}
+GRANULARITY_PATTERN = re.compile(r"^(\d+)(h|d|w|mo|q|y)$")
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    """
+    Description of a time series to roll up.
+
+    Attributes:
+        name (str): Name of the dataset, used as storage directory.
+        keys (tuple[str, ...]): Columns identifying a series (region, station...).
+        measures (tuple[str, ...]): Columns aggregated, one `variable` each.
+        time_column (str): Timestamp column of the source.
+        time_zone (str): Time zone the periods are computed in.
+    """
+
+    name: str
+    keys: tuple[str, ...]
+    measures: tuple[str, ...]
+    time_column: str = "date_heure"
+    time_zone: str = eco2mix.LOCAL_TIME_ZONE
+
+
+ECO2MIX_ROLLUP = RollupSpec(
+    name="eco2mix", keys=("code_region",), measures=tuple(eco2mix.MEASURES)
+)
+
+# per station, the département rollups are derived by summing sums and counts; the
+# wind direction (`dd`) is an angle, its sums and means are meaningless
+WEATHER_ROLLUP = RollupSpec(
+    name="meteo_horaire",
+    keys=("departement", "num_poste"),
+    measures=tuple(measure for measure in climatology.MEASURES if measure != "dd"),
+)
+
+
+def _truncate(value: datetime, every: str, time_zone: str) -> datetime:
+    return (
+        pl.Series([value.astimezone(UTC)])
+        .dt.convert_time_zone(time_zone)
+        .dt.truncate(every)
+        .item()
+    )
+
+
+def _aggregate(
+    lf: pl.LazyFrame, keys: list[str], every: str, stats: list[pl.Expr]
+) -> pl.LazyFrame:
+    """
+    Aggregates a long frame on periods of `every`, weeks start on Monday.
+    """
+    return (
+        lf.sort(*keys, "periode")
+        .group_by_dynamic(
+            "periode",
+            every=every,
+            group_by=keys,
+            start_by="monday" if every.endswith("w") else "window",
+        )
+        .agg(stats)
+        .with_columns(
+            pl.when(pl.col("nb") > 0)
+            .then(pl.col("somme") / pl.col("nb"))
+            .alias("moyenne")
+        )
+    )
+
+
+def compute_rollup(
+    lf: pl.LazyFrame, spec: RollupSpec, resolution: Resolution
+) -> pl.LazyFrame:
+    """
+    Aggregates a source time series at one resolution.
+
+    Args:
+        lf (pl.LazyFrame): Source time series.
+        spec (RollupSpec): Description of the source.
+        resolution (Resolution): Target resolution.
+
+    Returns:
+        pl.LazyFrame: keys, `variable`, `periode`, `somme`, `min`, `max`, `nb`,
+            `moyenne` and `annee`.
+    """
+    long = lf.select(
+        *spec.keys,
+        pl.col(spec.time_column).dt.convert_time_zone(spec.time_zone).alias("periode"),
+        *spec.measures,
+    ).unpivot(
+        index=[*spec.keys, "periode"],
+        on=list(spec.measures),
+        variable_name="variable",
+        value_name="valeur",
+    )
+
+    return _aggregate(
+        long,
+        keys=[*spec.keys, "variable"],
+        every=resolution.value,
+        stats=[
+            pl.col("valeur").sum().alias("somme"),
+            pl.col("valeur").min().alias("min"),
+            pl.col("valeur").max().alias("max"),
+            pl.col("valeur").count().alias("nb"),
+        ],
+    ).with_columns(pl.col("periode").dt.year().alias("annee"))
+
+
+def rollup_dir(
+    spec: RollupSpec, resolution: Resolution, root: Path = ROLLUPS_GOLD
+) -> Path:
+    return root / spec.name / resolution.name.lower()
+
+
+def scan_rollup(
+    spec: RollupSpec, resolution: Resolution, root: Path = ROLLUPS_GOLD
+) -> pl.LazyFrame:
+    """
+    Scans a persisted rollup, filters on `annee` and `periode` prune the files.
+    """
+    return pl.scan_parquet(
+        rollup_dir(spec, resolution, root) / "**/*.parquet",
+        hive_partitioning=True,
+        hive_schema={"annee": pl.Int32},
+    )
+
+
+def update_rollups(
+    source: pl.LazyFrame,
+    spec: RollupSpec,
+    since: datetime | None = None,
+    root: Path = ROLLUPS_GOLD,
+) -> dict[Resolution, int]:
+    """
+    Recomputes the rollup periods affected by new data, at every resolution.
+
+    The periods containing `since` and all the following ones are recomputed from
+    the source, older periods are kept as is.
+
+    Args:
+        source (pl.LazyFrame): Source time series.
+        spec (RollupSpec): Description of the source.
+        since (datetime | None): Oldest modified timestamp, full rebuild when None.
+        root (Path): Root directory of the rollups.
+
+    Returns:
+        dict[Resolution, int]: Number of rollup rows recomputed per resolution.
+    """
+    recomputed = {}
+    for resolution in Resolution:
+        lf = source
+        if since is not None:
+            period_start = _truncate(since, resolution.value, spec.time_zone)
+            lf = lf.filter(pl.col(spec.time_column) >= period_start.astimezone(UTC))
+
+        fresh = compute_rollup(lf, spec, resolution).collect()
+        directory = rollup_dir(spec, resolution, root)
+
+        for (annee,), fresh_year in fresh.partition_by(
+            "annee", as_dict=True, include_key=False
+        ).items():
+            path = directory / f"annee={annee}" / "0.parquet"
+            year = fresh_year
+            if path.exists():
+                # periods before the recomputed ones are still valid
+                kept = pl.read_parquet(path).filter(
+                    pl.col("periode") < fresh_year["periode"].min()
+                )
+                year = pl.concat([kept, fresh_year], how="diagonal_relaxed")
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            year.sort(*spec.keys, "variable", "periode").write_parquet(tmp_path)
+            os.replace(tmp_path, path)
+
+        recomputed[resolution] = len(fresh)
+
+    logger.info(
+        "Rollups updated",
+        extra={
+            "dataset": spec.name,
+            "since": since.isoformat() if since else None,
+            "rows": {
+                resolution.name.lower(): n for resolution, n in recomputed.items()
+            },
+        },
+    )
+
+    return recomputed
+
+
+def choose_resolution(
+    start: datetime, end: datetime, granularity: str, time_zone: str
+) -> Resolution:
+    """
+    Picks the coarsest stored resolution answering a query exactly.
+
+    The resolution must divide the requested granularity and both bounds of the
+    range must fall on its period boundaries.
+
+    Args:
+        start (datetime): Start of the range (included).
+        end (datetime): End of the range (excluded).
+        granularity (str): Requested granularity (`1h`, `6h`, `1d`, `1w`, `1mo`,
+            `1q`, `1y`...).
+        time_zone (str): Time zone of the rollup periods.
+
+    Returns:
+        Resolution: The resolution to read.
+
+    Raises:
+        ValueError: If no stored resolution can answer the query.
+    """
+    match = GRANULARITY_PATTERN.match(granularity)
+    if match is None:
+        raise ValueError(
+            f"Unsupported granularity {granularity}, "
+            f"use <n>{{{','.join(COMPATIBLE_RESOLUTIONS)}}}"
+        )
+
+    for resolution in reversed(COMPATIBLE_RESOLUTIONS[match.group(2)]):
+        aligned = all(
+            _truncate(bound, resolution.value, time_zone) == bound
+            for bound in (start, end)
+        )
+        if aligned:
+            return resolution
+
+    raise ValueError(f"Range {start} - {end} is not aligned on any stored rollup")
+
+
+def query_rollup(
+    spec: RollupSpec,
+    start: datetime,
+    end: datetime,
+    granularity: str,
+    root: Path = ROLLUPS_GOLD,
+) -> pl.DataFrame:
+    """
+    Answers an aggregation query from the coarsest suitable rollup.
+
+    Args:
+        spec (RollupSpec): Description of the rolled up dataset.
+        start (datetime): Start of the range (included).
+        end (datetime): End of the range (excluded).
+        granularity (str): Requested granularity, see `choose_resolution`.
+        root (Path): Root directory of the rollups.
+
+    Returns:
+        pl.DataFrame: keys, `variable`, `periode`, `somme`, `min`, `max`, `nb` and
+            `moyenne` at the requested granularity.
+    """
+    resolution = choose_resolution(start, end, granularity, spec.time_zone)
+    start, end = (bound.astimezone(ZoneInfo(spec.time_zone)) for bound in (start, end))
+    lf = (
+        scan_rollup(spec, resolution, root)
+        .filter(
+            pl.col("annee").is_between(start.year - 1, end.year),
+            pl.col("periode").is_between(start, end, closed="left"),
+        )
+        .drop("annee")
+    )
+
+    if granularity != resolution.value:
+        lf = _aggregate(
+            lf,
+            keys=[*spec.keys, "variable"],
+            every=granularity,
+            stats=[
+                pl.col("somme").sum(),
+                pl.col("min").min(),
+                pl.col("max").max(),
+                pl.col("nb").sum(),
+            ],
+        )
+
+    return lf.sort(*spec.keys, "variable", "periode").collect()
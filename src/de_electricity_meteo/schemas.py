@@ -0,0 +1,389 @@
+"""
+Versioned schemas of the upstream sources.
+
+Every source (ODRE registry, eco2mix exports, station metadata, hourly climatology,
+geo.api communes) declares the columns its readers rely on, with their dtype when
+the file format does not carry one (CSV, JSON) so that they are parsed typed in a
+single pass, without inference. When upstream changes a file, a new version is
+appended to the source; older files keep matching the previous versions.
+
+Drift is detected from what is cheap to read, the header line of a CSV, the footer
+of a parquet file or the keys of a JSON object: a missing required column or a
+dtype the readers cannot cast (an integer export of a float column can) is drift
+and is logged as a warning, new columns are only reported.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Mapping, Sequence
+
+from de_electricity_meteo._lazy import lazy_import
+from de_electricity_meteo.logger import logger
+
+if TYPE_CHECKING:
+    import polars as pl
+    from polars._typing import PolarsDataType
+else:
+    pl = lazy_import("polars")
+
+
+@dataclass(frozen=True)
+class SchemaDrift:
+    """
+    Differences between the columns of a file and a source schema.
+
+    Attributes:
+        source (str): Name of the source.
+        version (int): Version of the schema compared.
+        missing (tuple[str, ...]): Required columns absent from the file.
+        retyped (dict[str, str]): Columns whose dtype changed, with the found dtype.
+        unexpected (tuple[str, ...]): Columns of the file the schema does not know.
+    """
+
+    source: str
+    version: int
+    missing: tuple[str, ...] = ()
+    retyped: dict[str, str] = field(default_factory=dict)
+    unexpected: tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.missing or self.retyped)
+
+
+@dataclass(frozen=True)
+class SourceSchema:
+    """
+    Columns of one version of an upstream source.
+
+    Attributes:
+        source (str): Name of the source.
+        version (int): Version, increasing with the upstream changes.
+        columns (dict[str, PolarsDataType | None]): Known columns and their dtype, None
+            when it varies between exports and the reader handles every variant.
+        required (frozenset[str]): Columns the readers need, the others may be
+            missing from old files.
+    """
+
+    source: str
+    version: int
+    columns: dict[str, PolarsDataType | None]
+    required: frozenset[str]
+
+    def dtypes(self) -> dict[str, PolarsDataType]:
+        """
+        Declared dtypes, for the `schema`/`schema_overrides` of the readers.
+        """
+        return {
+            name: dtype for name, dtype in self.columns.items() if dtype is not None
+        }
+
+    def json_dtypes(self) -> dict[str, PolarsDataType]:
+        """
+        Declared dtypes as parsed from JSON, where dates are strings (see `cast`).
+        """
+        return {
+            name: pl.String if dtype.is_temporal() else dtype
+            for name, dtype in self.dtypes().items()
+        }
+
+    def cast(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        """
+        Casts the columns of a frame to their declared dtype, those it has.
+        """
+        names = set(lf.collect_schema().names())
+        return lf.cast(
+            {name: dtype for name, dtype in self.dtypes().items() if name in names}
+        )
+
+    def compare(self, found: Mapping[str, PolarsDataType | None]) -> SchemaDrift:
+        """
+        Compares the columns of a file (dtype None when unknown, as in a CSV
+        header) with the schema.
+        """
+        return SchemaDrift(
+            source=self.source,
+            version=self.version,
+            missing=tuple(sorted(self.required - set(found))),
+            retyped={
+                name: str(found[name])
+                for name, dtype in self.columns.items()
+                if dtype is not None
+                and (found_dtype := found.get(name)) is not None
+                and not _castable(found_dtype, dtype)
+            },
+            unexpected=tuple(name for name in found if name not in self.columns),
+        )
+
+
+def _castable(found: PolarsDataType, declared: PolarsDataType) -> bool:
+    return found == declared or (found.is_numeric() and declared.is_numeric())
+
+
+# hourly climatology measures, quality codes (q*) are dropped
+def _hourly_measures() -> dict[str, PolarsDataType | None]:
+    return {
+        "rr1": pl.Float64,  # precipitation (mm)
+        "t": pl.Float64,  # temperature (°C)
+        "tn": pl.Float64,  # hourly minimum temperature (°C)
+        "tx": pl.Float64,  # hourly maximum temperature (°C)
+        "td": pl.Float64,  # dew point (°C)
+        "u": pl.Float64,  # relative humidity (%)
+        "ff": pl.Float64,  # mean wind speed at 10 m (m/s)
+        "dd": pl.Float64,  # mean wind direction (°)
+        "fxi": pl.Float64,  # instantaneous maximum wind speed (m/s)
+        "glo": pl.Float64,  # global radiation (J/cm²)
+        "ins": pl.Float64,  # sunshine duration (min)
+        "n": pl.Float64,  # total cloud cover (octas)
+        "pmer": pl.Float64,  # sea level pressure (hPa)
+    }
+
+
+def _eco2mix_measures() -> dict[str, PolarsDataType | None]:
+    # MW except taux_co2 (g/kWh), integer in some exports
+    return dict.fromkeys(
+        [
+            "consommation",
+            "thermique",
+            "nucleaire",
+            "eolien",
+            "solaire",
+            "hydraulique",
+            "pompage",
+            "bioenergies",
+            "ech_physiques",
+            "stockage_batterie",
+            "destockage_batterie",
+            "taux_co2",
+        ],
+        pl.Float64,
+    )
+
+
+def _registry_columns() -> dict[str, PolarsDataType | None]:
+    codes = [
+        "idpeps",
+        "nominstallation",
+        "codeeicresourceobject",
+        "codeiris",
+        "codeinseecommune",
+        "codeepci",
+        "codedepartement",
+        "coderegion",
+        "filiere",
+        "codefiliere",
+        "codecombustible",
+        "codescombustiblessecondaires",
+        "technologie",
+        "codetechnologie",
+        "typestockage",
+        "regime",
+        "gestionnaire",
+    ]
+    measures = [
+        # capacity (kW)
+        "maxpuis",
+        "puismaxinstallee",
+        "puismaxcharge",
+        "puismaxraccharge",
+        "puismaxrac",
+        "puismaxinstalleedischarge",
+        # energy (MWh)
+        "energiestockable",
+        "energieannuelleglissanteinjectee",
+        "energieannuelleglissanteproduite",
+        "energieannuelleglissantesoutiree",
+        "energieannuelleglissantestockee",
+    ]
+    return {
+        **dict.fromkeys(codes, pl.String),
+        **dict.fromkeys(measures, pl.Float64),
+        "nbinstallations": pl.Int64,
+        "datemiseenservice_date": pl.Date,
+    }
+
+
+@cache
+def _registry() -> dict[str, tuple[SourceSchema, ...]]:
+    """
+    Versions of every source, oldest first.
+    """
+    schemas = [
+        SourceSchema(
+            source="odre_registre",
+            version=1,
+            # parquet export and JSON dump of the records API
+            columns=_registry_columns(),
+            required=frozenset(
+                [
+                    "idpeps",
+                    "codeeicresourceobject",
+                    "codeiris",
+                    "codeinseecommune",
+                    "codeepci",
+                    "codedepartement",
+                    "coderegion",
+                ]
+            ),
+        ),
+        SourceSchema(
+            source="eco2mix_regional",
+            version=1,
+            # `date_heure` is a string or a datetime, see `eco2mix.normalize`
+            columns={
+                "code_insee_region": pl.String,
+                "libelle_region": pl.String,
+                "nature": pl.String,
+                "date_heure": None,
+                **_eco2mix_measures(),
+            },
+            required=frozenset(
+                ["code_insee_region", "libelle_region", "nature", "date_heure"]
+            ),
+        ),
+        SourceSchema(
+            source="eco2mix_national",
+            version=1,
+            columns={
+                "perimetre": pl.String,
+                "nature": pl.String,
+                "date_heure": None,
+                **_eco2mix_measures(),
+                "fioul": pl.Float64,
+                "charbon": pl.Float64,
+                "gaz": pl.Float64,
+                "eolien_terrestre": pl.Float64,
+                "eolien_offshore": pl.Float64,
+            },
+            required=frozenset(["perimetre", "nature", "date_heure"]),
+        ),
+        SourceSchema(
+            source="meteo_stations",
+            version=1,
+            # keys of the objects of `fiches.json`, decoded by `stations.station_record`
+            columns={
+                "id": pl.String,
+                "nom": pl.String,
+                "lieuDit": pl.String,
+                # `YYYY-MM-DD` or ISO timestamps, empty when open
+                "dateDebut": pl.String,
+                "dateFin": pl.String,
+                # coordinates, under either name, or the history of the positions
+                "lat": pl.Float64,
+                "lon": pl.Float64,
+                "alt": pl.Float64,
+                "latitude": pl.Float64,
+                "longitude": pl.Float64,
+                "altitude": pl.Float64,
+                "positions": None,
+            },
+            required=frozenset(["id", "nom"]),
+        ),
+        SourceSchema(
+            source="meteo_horaire",
+            version=1,
+            # header names, lower-cased; station ids have leading zeros
+            columns={
+                "num_poste": pl.String,
+                "aaaammjjhh": pl.String,
+                **_hourly_measures(),
+            },
+            required=frozenset(["num_poste", "aaaammjjhh"]),
+        ),
+        SourceSchema(
+            source="geo_api_communes",
+            version=1,
+            columns={
+                "code": pl.String,
+                "codeEpci": pl.String,
+                "codeDepartement": pl.String,
+                "codeRegion": pl.String,
+                # GeoJSON point
+                "centre": pl.Struct(
+                    {"type": pl.String, "coordinates": pl.List(pl.Float64)}
+                ),
+            },
+            required=frozenset(["code", "codeDepartement", "codeRegion", "centre"]),
+        ),
+    ]
+
+    registry: dict[str, tuple[SourceSchema, ...]] = {}
+    for schema in schemas:
+        registry[schema.source] = (*registry.get(schema.source, ()), schema)
+    return registry
+
+
+def get_schema(source: str, version: int | None = None) -> SourceSchema:
+    """
+    Schema of a source, its latest version when None.
+
+    Raises:
+        ValueError: If the source or the version is unknown.
+    """
+    versions = _registry().get(source)
+    if versions is None:
+        raise ValueError(f"Unknown source {source}, use one of {list(_registry())}")
+    if version is None:
+        return versions[-1]
+    for schema in versions:
+        if schema.version == version:
+            return schema
+    raise ValueError(f"Unknown version {version} of {source}")
+
+
+def detect_drift(
+    source: str, found: Mapping[str, PolarsDataType | None], path: Path | None = None
+) -> SchemaDrift:
+    """
+    Compares the columns of a file with the versions of its source.
+
+    Args:
+        source (str): Name of the source.
+        found (Mapping[str, PolarsDataType | None]): Columns of the file, dtype None
+            when unknown.
+        path (Path | None): File compared, for the log record.
+
+    Returns:
+        SchemaDrift: No drift against the most recent version the file matches,
+            else the drift against the latest version (logged as a warning).
+
+    Raises:
+        ValueError: If the source is unknown.
+    """
+    latest = get_schema(source)
+    for schema in reversed(_registry()[source]):
+        drift = schema.compare(found)
+        if not drift:
+            return drift
+
+    drift = latest.compare(found)
+    logger.warning(
+        "Schema drift",
+        extra={
+            "source": source,
+            "version": drift.version,
+            "path": path,
+            "missing": list(drift.missing),
+            "retyped": drift.retyped,
+            "unexpected": list(drift.unexpected),
+        },
+    )
+    return drift
+
+
+def check_header(
+    source: str, header: Sequence[str], path: Path | None = None
+) -> SchemaDrift:
+    """
+    Detects the drift of a CSV from its header (see `detect_drift`).
+    """
+    return detect_drift(source, dict.fromkeys(header), path)
+
+
+def check_parquet(source: str, path: Path) -> SchemaDrift:
+    """
+    Detects the drift of a parquet file from its footer (see `detect_drift`).
+    """
+    return detect_drift(source, dict(pl.read_parquet_schema(path)), path)
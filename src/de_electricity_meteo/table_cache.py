@@ -0,0 +1,145 @@
+"""
+Memory-mapped Arrow IPC cache of the silver and gold tables.
+
+Parquet is compact but every read decompresses and decodes the whole table, and
+each notebook or worker holds its own copy. A cached table is materialized once as
+an uncompressed Arrow IPC file and opened memory-mapped: loading is near instant
+and the processes reading it share the same page cache pages.
+
+A cache entry is named after the fingerprint of its sources (path, size and
+modification time of every file), so rewriting a source, which the pipelines
+do atomically, invalidates it; the stale entries of a table are removed when a new
+one is built.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Callable, Sequence
+
+import polars as pl
+
+from de_electricity_meteo.config.paths import DATA_CACHE
+from de_electricity_meteo.logger import logger
+
+SUFFIX = ".arrow"
+
+# characters of the fingerprint kept in the file name
+FINGERPRINT_LENGTH = 16
+
+
+def source_files(sources: Path | Sequence[Path]) -> list[Path]:
+    """
+    Files of the sources, the parquet files under the directories (partitioned
+    datasets), sorted.
+    """
+    if isinstance(sources, Path):
+        sources = [sources]
+
+    files = []
+    for source in sources:
+        if source.is_dir():
+            files += source.rglob("*.parquet")
+        else:
+            files.append(source)
+    return sorted(files)
+
+
+def fingerprint(sources: Path | Sequence[Path]) -> str:
+    """
+    Hash of the path, size and modification time of the source files.
+
+    Raises:
+        FileNotFoundError: If a source file does not exist.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in source_files(sources):
+        stat = path.stat()
+        digest.update(
+            f"{path.as_posix()}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode()
+        )
+    return digest.hexdigest()
+
+
+def entry_path(name: str, key: str, cache_dir: Path = DATA_CACHE) -> Path:
+    return cache_dir / f"{name}-{key[:FINGERPRINT_LENGTH]}{SUFFIX}"
+
+
+def _entries(name: str, cache_dir: Path) -> list[Path]:
+    # exactly a fingerprint after the name: `eco2mix` does not match `eco2mix-meteo`
+    return list(cache_dir.glob(f"{name}-{'?' * FINGERPRINT_LENGTH}{SUFFIX}"))
+
+
+def _read(path: Path) -> pl.DataFrame:
+    # one chunk was written, rechunking would copy the mapped buffers
+    return pl.read_ipc(path, memory_map=True, rechunk=False)
+
+
+def cached_table(
+    name: str,
+    sources: Path | Sequence[Path],
+    build: Callable[[], pl.LazyFrame] | None = None,
+    cache_dir: Path = DATA_CACHE,
+) -> pl.DataFrame:
+    """
+    Loads a table from the cache, materializing it first if its sources changed.
+
+    Args:
+        name (str): Name of the table in the cache.
+        sources (Path | Sequence[Path]): Files or dataset directories the table is
+            built from, fingerprinted to invalidate the cache.
+        build (Callable[[], pl.LazyFrame] | None): Query building the table (such
+            as `eco2mix.scan_silver` for a partitioned dataset), the scan of the
+            parquet sources when None.
+        cache_dir (Path): Directory of the cache.
+
+    Returns:
+        pl.DataFrame: The table, backed by the memory-mapped cache file.
+    """
+    key = fingerprint(sources)
+    path = entry_path(name, key, cache_dir)
+    if path.exists():
+        return _read(path)
+
+    if build is None:
+        lf = pl.scan_parquet(source_files(sources))
+    else:
+        lf = build()
+    df = lf.collect().rechunk()
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # unique per process, concurrent builds replace each other atomically
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    df.write_ipc(tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+    stale = [entry for entry in _entries(name, cache_dir) if entry != path]
+    for entry in stale:
+        # readers mapping it keep their pages until they close it
+        entry.unlink(missing_ok=True)
+
+    logger.info(
+        "Table cached",
+        extra={
+            "dataset": name,
+            "path": path,
+            "rows": len(df),
+            "size_mb": round(path.stat().st_size / (1024 * 1024), 2),
+            "stale": len(stale),
+        },
+    )
+
+    return _read(path)
+
+
+def clear_cache(name: str | None = None, cache_dir: Path = DATA_CACHE) -> int:
+    """
+    Deletes the cache entries of a table, of every table when None.
+
+    Returns:
+        int: Number of entries deleted.
+    """
+    entries = _entries(name or "*", cache_dir)
+    for entry in entries:
+        entry.unlink(missing_ok=True)
+    return len(entries)
@@ -0,0 +1,160 @@
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from de_electricity_meteo.alignment import (
+    AlignSpec,
+    align,
+    align_partitions,
+    regional_weather,
+    station_weights,
+)
+from de_electricity_meteo.electricity.eco2mix import write_partitions
+from de_electricity_meteo.enums import AlignMethod
+from de_electricity_meteo.geo.nearest_station import build_station_index
+
+START = datetime(2024, 6, 1, tzinfo=UTC)
+
+STATIONS = pl.DataFrame(
+    {
+        "id": ["13054001", "13028001", "29075001"],
+        "latitude": [43.44, 43.21, 48.44],
+        "longitude": [5.22, 5.55, -4.41],
+    }
+)
+
+
+def hourly(hours: int, missing: tuple[int, ...] = ()) -> pl.DataFrame:
+    """
+    Two stations of region 93 with temperatures 10 and 20 + hour.
+    """
+    return pl.DataFrame(
+        [
+            {
+                "num_poste": num_poste,
+                "date_heure": START + timedelta(hours=hour),
+                "t": base + hour,
+            }
+            for num_poste, base in (("13054001", 10.0), ("13028001", 20.0))
+            for hour in range(hours)
+            if hour not in missing or num_poste == "13028001"
+        ]
+    )
+
+
+def eco2mix(half_hours: int) -> pl.LazyFrame:
+    return pl.LazyFrame(
+        {
+            "code_region": "93",
+            "date_heure": pl.datetime_range(
+                START,
+                START + timedelta(minutes=30 * (half_hours - 1)),
+                "30m",
+                eager=True,
+            ),
+            "consommation": 1.0,
+        }
+    )
+
+
+class TestAlignment:
+    def test_station_weights(self) -> None:
+        """
+        Check that capacity is split by inverse distance and normalized by region.
+        """
+        installations = pl.DataFrame(
+            {
+                "code_region": ["93", "93", "53"],
+                "latitude": [43.44, 43.21, 48.4],
+                "longitude": [5.22, 5.55, -4.4],
+                "puismaxinstallee": [100.0, 300.0, 50.0],
+            }
+        )
+        weights = station_weights(installations, build_station_index(STATIONS), k=1)
+
+        assert weights.rows() == [
+            ("53", "29075001", 1.0),
+            ("93", "13028001", 0.75),
+            ("93", "13054001", 0.25),
+        ]
+
+    def test_regional_weather_renormalizes_missing(self) -> None:
+        """
+        Verify the weighted mean and the weights of a station missing an hour.
+        """
+        weights = pl.DataFrame(
+            {
+                "code_region": ["93", "93"],
+                "id_station": ["13054001", "13028001"],
+                "poids": [0.25, 0.75],
+            }
+        )
+        weather = regional_weather(hourly(3, missing=(1,)).lazy(), weights, ["t"])
+
+        assert weather.collect()["t"].to_list() == [17.5, 21.0, 19.5]
+
+    @pytest.mark.parametrize(
+        ("method", "expected"),
+        [
+            (AlignMethod.ASOF, [10.0, 10.0, 11.0, 11.0, 11.0, None, None, None, 14.0]),
+            (
+                AlignMethod.INTERPOLATE,
+                [10.0, 10.5, 11.0, None, None, None, None, None, 14.0],
+            ),
+        ],
+    )
+    def test_align_methods(
+        self, method: AlignMethod, expected: list[float | None]
+    ) -> None:
+        """
+        Compare as-of and interpolation around a two-hour hole in the weather.
+        """
+        weather = (
+            hourly(5)
+            .filter(
+                pl.col("num_poste") == "13054001",
+                ~pl.col("date_heure").dt.hour().is_in([2, 3]),
+            )
+            .select(pl.lit("93").alias("code_region"), "date_heure", "t")
+            .lazy()
+        )
+        aligned = align(
+            eco2mix(9), weather, AlignSpec(measures=("t",), method=method)
+        ).collect()
+
+        assert aligned["t"].to_list() == expected
+        assert aligned["consommation"].to_list() == [1.0] * 9
+
+    def test_align_partitions(self, tmp_path: Path) -> None:
+        """
+        Check the partitions written from the eco2mix and hourly weather layout.
+        """
+        write_partitions(
+            eco2mix(4).with_columns(pl.lit(2024).alias("annee")).collect(),
+            output_dir=tmp_path / "eco2mix",
+        )
+        weather_dir = tmp_path / "meteo" / "departement=13" / "annee=2024"
+        weather_dir.mkdir(parents=True)
+        hourly(3).write_parquet(weather_dir / "H_13_latest-2024-2025.parquet")
+        weights = pl.DataFrame(
+            {
+                "code_region": ["93", "93"],
+                "id_station": ["13054001", "13028001"],
+                "poids": [0.5, 0.5],
+            }
+        )
+
+        spec = AlignSpec(
+            measures=("t",),
+            eco2mix_dir=tmp_path / "eco2mix",
+            hourly_dir=tmp_path / "meteo",
+        )
+        written = align_partitions([2024], weights, spec, output_dir=tmp_path / "gold")
+        aligned = pl.read_parquet(
+            tmp_path / "gold" / "annee=2024" / "code_region=93" / "0.parquet"
+        )
+
+        assert written == 1
+        assert aligned["t"].to_list() == [15.0, 15.0, 16.0, 16.0]
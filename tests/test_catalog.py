@@ -0,0 +1,85 @@
+from datetime import UTC, datetime
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from de_electricity_meteo import catalog
+
+
+def write(path: Path, df: pl.DataFrame) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.write_parquet(path)
+
+
+def corrupt(path: Path) -> None:
+    # fails if it is ever opened
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"not a parquet file")
+
+
+@pytest.fixture
+def eco2mix_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """
+    eco2mix silver with two readable partitions, the others unreadable (the first
+    file is readable, the schema is taken from it).
+    """
+    monkeypatch.setattr(catalog, "ECO2MIX_SILVER", tmp_path)
+    for annee in (2023, 2024):
+        write(
+            tmp_path / f"annee={annee}" / "code_region=84" / "0.parquet",
+            pl.DataFrame(
+                {
+                    "date_heure": pl.datetime_range(
+                        datetime(annee, 6, 1, tzinfo=UTC),
+                        datetime(annee, 6, 1, 2, tzinfo=UTC),
+                        interval="30m",
+                        eager=True,
+                    ),
+                    "consommation": [1.0, 2.0, 3.0, 4.0, 5.0],
+                }
+            ),
+        )
+    corrupt(tmp_path / "annee=2024" / "code_region=11" / "0.parquet")
+    corrupt(tmp_path / "annee=2025" / "code_region=84" / "0.parquet")
+    return tmp_path
+
+
+class TestCatalog:
+    def test_partition_pruning(self, eco2mix_dir: Path) -> None:
+        """
+        Check that the selected regions and years only open their partitions.
+        """
+        df = catalog.eco2mix(
+            regions=["84"], years=[2024], columns=["consommation"]
+        ).collect()
+
+        assert df.columns == ["consommation"]
+        assert df.height == 5  # noqa: PLR2004
+
+    def test_time_range(self, eco2mix_dir: Path) -> None:
+        """
+        Verify that a time range bounds the year partitions and keeps [start, end).
+        """
+        df = catalog.eco2mix(
+            regions=["84"],
+            start=datetime(2023, 6, 1, 0, 30),
+            end=datetime(2024, 6, 1, 1, tzinfo=UTC),
+        ).collect()
+
+        assert df["consommation"].to_list() == [2.0, 3.0, 4.0, 5.0, 1.0, 2.0]
+
+    def test_stations(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Check the selection of the stations of some départements.
+        """
+        path = tmp_path / "stations.parquet"
+        write(
+            path,
+            pl.DataFrame({"id": ["01001", "75001"], "code_departement": ["01", "75"]}),
+        )
+        monkeypatch.setattr(catalog, "METEO_STATIONS_SILVER", path)
+
+        df = catalog.stations(departements=["75"], columns=["id"]).collect()
+
+        assert df.to_dict(as_series=False) == {"id": ["75001"]}
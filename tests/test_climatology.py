@@ -0,0 +1,137 @@
+import asyncio
+import gzip
+import shutil
+from datetime import UTC, datetime
+from pathlib import Path
+
+import polars as pl
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo.instrumentation import take_metrics
+from de_electricity_meteo.meteo.climatology import (
+    HOURLY_PREFIX,
+    SCHEMA,
+    backfill,
+    convert_file,
+    read_hourly,
+    scan_hourly,
+)
+from de_electricity_meteo.meteo.object_store import RemoteObject
+
+CSV = (
+    "NUM_POSTE;NOM_USUEL;LAT;LON;ALTI;AAAAMMJJHH;RR1;QRR1;T;QT;FF;QFF\n"
+    "13054001;MARIGNANE;43.44;5.22;9;2020123122;0.2;1;8.5;1;3.1;1\n"
+    "13054001;MARIGNANE;43.44;5.22;9;2020123123;;1; 7.9;1;;1\n"
+    "13054001;MARIGNANE;43.44;5.22;9;2021010100;0;1;7.1;1;2.4;1\n"
+    "01014002;ARBENT;46.27;5.66;534;2021010100;0;1;-2.5;1;0.5;1\n"
+)
+
+
+def write_csv(path: Path, content: str = CSV) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, mode="wt", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+class TestClimatology:
+    def test_read_hourly_fixed_schema(self, tmp_path: Path) -> None:
+        """
+        Check the vectorized timestamp decoding, lowercasing and missing columns.
+        """
+        hourly = read_hourly(write_csv(tmp_path / "H_13_2020-2021.csv.gz"))
+
+        assert hourly.schema == pl.Schema(SCHEMA)
+        assert hourly["date_heure"][0] == datetime(2020, 12, 31, 22, tzinfo=UTC)
+        assert hourly["num_poste"][3] == "01014002"
+        assert hourly["t"][1] == 7.9  # noqa: PLR2004
+        assert hourly["rr1"][1] is None
+        assert hourly["glo"].null_count() == len(hourly)
+
+    def test_backfill_is_restartable(
+        self, tmp_path: Path, mocker: MockerFixture
+    ) -> None:
+        """
+        Verify the partitions written and that converted files are not redone.
+        """
+        source = write_csv(tmp_path / "source.csv.gz")
+        objects = [
+            RemoteObject(
+                key=f"{HOURLY_PREFIX}H_13_2020-2021.csv.gz",
+                size=source.stat().st_size,
+                last_modified=datetime(2025, 1, 1, tzinfo=UTC),
+                etag="v1",
+            ),
+            RemoteObject(
+                key=f"{HOURLY_PREFIX}H_29_2020-2021.csv.gz",
+                size=source.stat().st_size,
+                last_modified=datetime(2025, 1, 1, tzinfo=UTC),
+                etag="v1",
+            ),
+        ]
+
+        async def fake_save_file(url: str, path: Path, dataset: str) -> None:
+            shutil.copy(source, path)
+
+        mocker.patch(
+            "de_electricity_meteo.meteo.climatology.list_objects",
+            return_value=objects,
+        )
+        save_file = mocker.patch(
+            "de_electricity_meteo.meteo.climatology.save_file",
+            side_effect=fake_save_file,
+        )
+        bronze_dir, output_dir = tmp_path / "bronze", tmp_path / "silver"
+
+        converted = asyncio.run(backfill(["13"], 1, 1, bronze_dir, output_dir))
+        assert converted == {"H_13_2020-2021.csv.gz": 4}
+        assert save_file.call_count == 1
+
+        hourly = scan_hourly(output_dir)
+        assert hourly.filter(pl.col("annee") == 2021).collect().height == 2  # noqa: PLR2004
+        assert hourly.select("departement").unique().collect().item() == "13"
+
+        assert asyncio.run(backfill(["13"], 1, 1, bronze_dir, output_dir)) == {}
+        assert save_file.call_count == 1
+
+    def test_previous_outputs_replaced(self, tmp_path: Path) -> None:
+        """
+        Verify that the years of a rolled over `latest-` file are not left stale.
+        """
+        output_dir = tmp_path / "silver"
+        first = write_csv(tmp_path / "H_13_latest-2020-2021.csv.gz")
+        convert_file(first, "13", output_dir)
+
+        rolled = write_csv(
+            tmp_path / "H_13_latest-2021-2022.csv.gz",
+            "\n".join(line for line in CSV.splitlines() if "2020123" not in line),
+        )
+        convert_file(rolled, "13", output_dir)
+        # other series of the département are kept
+        write_csv(tmp_path / "H_13_previous-1950-2019.csv.gz")
+        convert_file(tmp_path / "H_13_previous-1950-2019.csv.gz", "13", output_dir)
+        convert_file(rolled, "13", output_dir)
+
+        files = sorted(
+            path.relative_to(output_dir).as_posix()
+            for path in output_dir.rglob("H_13_latest-*.parquet")
+        )
+        assert files == ["departement=13/annee=2021/H_13_latest-2021-2022.parquet"]
+        assert len(list(output_dir.rglob("H_13_previous-*.parquet"))) == 2  # noqa: PLR2004
+
+    def test_convert_span(self, tmp_path: Path) -> None:
+        """
+        Check the volumes recorded by the span of a conversion.
+        """
+        source = write_csv(tmp_path / "H_13_1950-1959.csv.gz")
+        output_dir = tmp_path / "silver"
+        take_metrics()
+
+        rows = convert_file(source, "13", output_dir)
+
+        metrics = take_metrics()[("climatology.convert", "meteo_horaire")]
+        written = sum(path.stat().st_size for path in output_dir.rglob("*.parquet"))
+        assert metrics["runs_total"] == 1
+        assert metrics["rows_out_total"] == rows == 4  # noqa: PLR2004
+        assert metrics["bytes_in_total"] == source.stat().st_size
+        assert metrics["bytes_out_total"] == written
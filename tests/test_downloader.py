@@ -0,0 +1,41 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator
+
+import pytest
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo import downloader
+from de_electricity_meteo.downloader import save_file
+
+
+class FakeContent:
+    def __init__(self, chunks: list[bytes]):
+        self.chunks = chunks
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        for chunk in self.chunks:
+            yield chunk
+
+
+class FakeResponse:
+    def __init__(self, chunks: list[bytes]):
+        self.content = FakeContent(chunks)
+
+
+class TestDownloader:
+    @pytest.mark.parametrize("debug", [False, True])
+    def test_chunk_logs_only_when_debugging(
+        self, tmp_path: Path, mocker: MockerFixture, debug: bool
+    ) -> None:
+        """
+        Verify that no record is built per chunk unless debug logging is enabled.
+        """
+        logger = mocker.patch.object(downloader, "logger")
+        logger.isEnabledFor.return_value = debug
+        path = tmp_path / "file.bin"
+
+        asyncio.run(save_file.__wrapped__(FakeResponse([b"ab", b"cd", b"e"]), path, 2))
+
+        assert path.read_bytes() == b"abcde"
+        assert logger.debug.call_count == (3 if debug else 0)
@@ -0,0 +1,88 @@
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import polars as pl
+
+from de_electricity_meteo.electricity.eco2mix import (
+    NATIONAL_CODE_REGION,
+    build,
+    normalize,
+    unify,
+)
+
+UTC = ZoneInfo("UTC")
+
+
+def regional_export(nature: str, hours: list[int], consommation: float) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "code_insee_region": [93] * len(hours),
+            "libelle_region": ["Provence-Alpes-Côte d'Azur"] * len(hours),
+            "nature": [nature] * len(hours),
+            "date_heure": [datetime(2024, 12, 31, hour, tzinfo=UTC) for hour in hours],
+            "consommation": [consommation] * len(hours),
+            "column_30": [None] * len(hours),
+        }
+    )
+
+
+class TestEco2mix:
+    def test_normalize_national_export(self) -> None:
+        """
+        Check the typed schema of a national export (no thermique column).
+        """
+        national = pl.LazyFrame(
+            {
+                "perimetre": ["France"],
+                "nature": ["Données temps réel"],
+                "date_heure": ["2025-01-01T00:00:00+01:00"],
+                "fioul": [1],
+                "charbon": [2],
+                "gaz": [3],
+            }
+        )
+
+        row = normalize(national).collect().row(0, named=True)
+
+        assert row["code_region"] == NATIONAL_CODE_REGION
+        assert row["date_heure"] == datetime(2024, 12, 31, 23, tzinfo=UTC)
+        # the local year, not the UTC one
+        assert row["annee"] == 2025  # noqa: PLR2004
+        assert row["thermique"] == 6.0  # noqa: PLR2004
+        assert row["nucleaire"] is None
+
+    def test_unify_source_precedence(self) -> None:
+        """
+        Verify that the most final publication wins on overlapping periods.
+        """
+        temps_reel = regional_export("Données temps réel", [0, 1, 2], 3.0)
+        consolidees = regional_export("Données consolidées", [0, 1], 2.0)
+        definitives = regional_export("Données définitives", [0], 1.0)
+
+        unified = unify(
+            normalize(df.lazy()) for df in (temps_reel, consolidees, definitives)
+        ).collect()
+
+        assert unified["consommation"].to_list() == [1.0, 2.0, 3.0]
+        assert unified["date_heure"].is_sorted()
+        assert "column_30" not in unified.columns
+
+    def test_build_rewrites_only_requested_years(self, tmp_path: Path) -> None:
+        """
+        Check the year/region partitions and the refresh of a single year.
+        """
+        export = tmp_path / "export.parquet"
+        regional_export("Données consolidées", [0, 23], 1.0).write_parquet(export)
+
+        assert build([export], output_dir=tmp_path / "silver") == 2  # noqa: PLR2004
+        partitions = sorted(
+            path.relative_to(tmp_path / "silver").parent.as_posix()
+            for path in (tmp_path / "silver").rglob("*.parquet")
+        )
+        assert partitions == [
+            "annee=2024/code_region=93",
+            "annee=2025/code_region=93",
+        ]
+
+        assert build([export], output_dir=tmp_path / "silver", years=[2025]) == 1
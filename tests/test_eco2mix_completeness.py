@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import polars as pl
+
+from de_electricity_meteo.electricity.eco2mix import write_partitions
+from de_electricity_meteo.electricity.eco2mix_completeness import (
+    check_completeness,
+    load_gap_index,
+    update_gap_index,
+)
+
+UTC = ZoneInfo("UTC")
+START = datetime(2024, 10, 26, 20, tzinfo=UTC)
+
+
+def half_hours(indexes: list[int]) -> list[datetime]:
+    return [START + timedelta(minutes=30 * index) for index in indexes]
+
+
+SERIES = pl.LazyFrame(
+    {
+        "code_region": ["93"] * 10 + ["53"] * 4,
+        # 93: two gaps (2 then 1 half-hours), a duplicate and an off-grid timestamp
+        "date_heure": [
+            *half_hours([0, 1, 4, 5, 5, 7, 8, 9]),
+            START + timedelta(minutes=50),
+            START + timedelta(minutes=30 * 9),
+            *half_hours([0, 1, 2, 3]),
+        ],
+    },
+    schema={"code_region": pl.String, "date_heure": pl.Datetime("us", "UTC")},
+)
+
+
+class TestEco2mixCompleteness:
+    def test_check_completeness(self) -> None:
+        """
+        Check gaps, duplicates and off-grid detection on a small series.
+        """
+        report = check_completeness(SERIES)
+
+        assert report.gaps.select(
+            "code_region", "debut", "fin", "nb_manquants"
+        ).rows() == [
+            ("93", *half_hours([2, 3]), 2),
+            ("93", *half_hours([6, 6]), 1),
+        ]
+        assert report.duplicates["date_heure"].to_list() == half_hours([5, 9])
+        assert report.off_grid["date_heure"].to_list() == [
+            START + timedelta(minutes=50)
+        ]
+
+    def test_grid_across_dst_change(self) -> None:
+        """
+        Verify that the night of the DST change (50 local half-hours) is complete.
+        """
+        paris = ZoneInfo("Europe/Paris")
+        day = pl.datetime_range(
+            datetime(2024, 10, 27, tzinfo=paris),
+            datetime(2024, 10, 27, 23, 30, tzinfo=paris),
+            interval="30m",
+            eager=True,
+        ).dt.convert_time_zone("UTC")
+        series = pl.LazyFrame({"code_region": "93", "date_heure": day})
+
+        report = check_completeness(series)
+
+        assert len(day) == 50  # noqa: PLR2004
+        assert report.gaps.is_empty()
+        assert report.duplicates.is_empty()
+
+    def test_gap_index_round_trip(self, tmp_path: Path) -> None:
+        """
+        Check that the gap index is persisted from the partitioned series.
+        """
+        assert load_gap_index(tmp_path / "gaps.parquet").is_empty()
+
+        df = SERIES.with_columns(pl.lit(2024, dtype=pl.Int32).alias("annee")).collect()
+        write_partitions(df, output_dir=tmp_path / "eco2mix")
+        update_gap_index(tmp_path / "eco2mix", path=tmp_path / "gaps.parquet")
+
+        assert len(load_gap_index(tmp_path / "gaps.parquet")) == 2  # noqa: PLR2004
@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+import polars as pl
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo.electricity.eco2mix import scan_silver
+from de_electricity_meteo.electricity.eco2mix_poller import (
+    compact,
+    export_url,
+    load_watermarks,
+    poll,
+)
+
+UTC = ZoneInfo("UTC")
+WATERMARK = datetime(2025, 6, 1, tzinfo=UTC)
+
+
+def records(nature: str, hours: list[int], consommation: float) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "code_insee_region": ["93"] * len(hours),
+            "libelle_region": ["Provence-Alpes-Côte d'Azur"] * len(hours),
+            "nature": [nature] * len(hours),
+            "date_heure": [WATERMARK + timedelta(hours=hour) for hour in hours],
+            "consommation": [consommation] * len(hours),
+        }
+    )
+
+
+class TestEco2mixPoller:
+    def test_export_url_where_clause(self) -> None:
+        """
+        Check the ODSQL filter of a regional real-time export.
+        """
+        url = export_url("93", "date_heure > date'2025-06-01T00:00:00+00:00'")
+        query = parse_qs(urlparse(url).query)
+
+        assert "eco2mix-regional-tr" in url
+        assert query["where"] == [
+            'code_insee_region = "93" and '
+            "date_heure > date'2025-06-01T00:00:00+00:00' and "
+            "consommation is not null"
+        ]
+
+    def test_poll_then_compact(self, tmp_path: Path, mocker: MockerFixture) -> None:
+        """
+        Verify that polling moves the watermark and compaction keeps precedence.
+        """
+        silver = tmp_path / "silver"
+        watermarks = tmp_path / "watermarks.json"
+        fragments = tmp_path / "fragments"
+
+        async def fake_save_file(url: str, path: Path, dataset: str) -> None:
+            # unsorted on purpose, the fragment must be sorted once written
+            records("Données temps réel", [2, 1], 3.0).write_parquet(path)
+
+        mocker.patch(
+            "de_electricity_meteo.electricity.eco2mix_poller.save_file",
+            side_effect=fake_save_file,
+        )
+        mocker.patch(
+            "de_electricity_meteo.electricity.eco2mix_poller.initial_watermark",
+            return_value=WATERMARK,
+        )
+
+        new_records = asyncio.run(
+            poll(["93"], watermarks_path=watermarks, fragments_dir=fragments)
+        )
+
+        assert new_records == {"93": 2}
+        assert load_watermarks(watermarks) == {"93": WATERMARK + timedelta(hours=2)}
+        fragment = pl.read_parquet(next(fragments.rglob("*.parquet")))
+        assert fragment["date_heure"].is_sorted()
+
+        # an already consolidated hour must not be replaced by the real-time one
+        consolidated = records("Données consolidées", [1], 2.0).select(
+            pl.col("code_insee_region").alias("code_region"),
+            pl.lit(2025, dtype=pl.Int32).alias("annee"),
+            "date_heure",
+            "nature",
+            "consommation",
+        )
+        (silver / "annee=2025" / "code_region=93").mkdir(parents=True)
+        consolidated.drop("annee", "code_region").write_parquet(
+            silver / "annee=2025" / "code_region=93" / "0.parquet"
+        )
+
+        assert compact(fragments_dir=fragments, output_dir=silver) == 1
+        assert not any(fragments.rglob("*.parquet"))
+        assert scan_silver(silver).select("consommation").collect()[
+            "consommation"
+        ].to_list() == [2.0, 3.0]
+
+    def test_string_timestamps_and_silver_watermark(
+        self, tmp_path: Path, mocker: MockerFixture
+    ) -> None:
+        """
+        Check that the first watermark is the end of the given silver series and
+        that string timestamps give a UTC datetime watermark.
+        """
+        silver = tmp_path / "silver"
+        watermarks = tmp_path / "watermarks.json"
+        fragments = tmp_path / "fragments"
+        (silver / "annee=2025" / "code_region=93").mkdir(parents=True)
+        records("Données consolidées", [0], 2.0).select(
+            "date_heure", "nature", "consommation"
+        ).write_parquet(silver / "annee=2025" / "code_region=93" / "0.parquet")
+
+        async def fake_save_file(url: str, path: Path, dataset: str) -> None:
+            # the offset of the first record sorts it last as a string
+            records("Données temps réel", [1, 2], 3.0).with_columns(
+                pl.Series(
+                    "date_heure", ["2025-06-01T03:00:00+02:00", "2025-06-01T02:00:00Z"]
+                )
+            ).write_parquet(path)
+
+        mocker.patch(
+            "de_electricity_meteo.electricity.eco2mix_poller.save_file",
+            side_effect=fake_save_file,
+        )
+
+        asyncio.run(
+            poll(
+                ["93"],
+                watermarks_path=watermarks,
+                fragments_dir=fragments,
+                silver_dir=silver,
+            )
+        )
+
+        assert next(fragments.rglob("*.parquet")).name == "20250601T000000.parquet"
+        assert load_watermarks(watermarks) == {"93": WATERMARK + timedelta(hours=2)}
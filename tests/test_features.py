@@ -0,0 +1,89 @@
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from de_electricity_meteo.meteo.features import (
+    compute_features,
+    scan_features,
+    update_features,
+)
+
+START = datetime(2024, 12, 20, tzinfo=UTC)
+HOURS = 24 * 20
+
+
+def hourly(hours: int) -> pl.LazyFrame:
+    """
+    Two stations, the second one missing every fifth hour.
+    """
+    date_heure = [START + timedelta(hours=hour) for hour in range(hours)]
+    return pl.LazyFrame(
+        {
+            "num_poste": ["A"] * hours + ["B"] * hours,
+            "date_heure": date_heure * 2,
+            "t": [float(hour % 24) for hour in range(hours)] * 2,
+            "ff": [float(hour % 15) for hour in range(hours)] * 2,
+            "rr1": [1.0] * hours * 2,
+        }
+    ).filter((pl.col("num_poste") == "A") | (pl.col("date_heure").dt.hour() % 5 != 0))
+
+
+class TestFeatures:
+    def test_compute_features(self) -> None:
+        """
+        Check degree-days, time based windows and the wind proxy.
+        """
+        features = compute_features(hourly(48), key="num_poste").collect()
+        a = features.filter(pl.col("num_poste") == "A")
+
+        # a full day of temperatures 0..23 under the 18°C base
+        day = a.filter(pl.col("date_heure") == START + timedelta(hours=23))
+        assert (
+            day["dju_chauffage_sum_24h"].item()
+            == sum(max(18 - t, 0) for t in range(24)) / 24
+        )
+        assert day["t_max_24h"].item() == 23  # noqa: PLR2004
+        assert day["rr1_sum_24h"].item() == 24  # noqa: PLR2004
+
+        # the window is time based: the missing hours of B are not replaced
+        b = features.filter(pl.col("num_poste") == "B")
+        assert b["rr1_sum_24h"].max() < 24  # noqa: PLR2004
+
+        assert a["eolien_facteur"].min() == 0
+        assert a.filter(pl.col("ff") == 14)["eolien_facteur"].unique().item() == 1  # noqa: PLR2004
+
+    def test_incremental_update_matches_rebuild(self, tmp_path: Path) -> None:
+        """
+        Verify that materializing in two steps equals a single materialization.
+        """
+        cutoff = START + timedelta(days=12, hours=5)
+        first = update_features(
+            hourly(HOURS).filter(pl.col("date_heure") < cutoff),
+            name="stations",
+            key="num_poste",
+            root=tmp_path / "inc",
+        )
+        second = update_features(
+            hourly(HOURS), name="stations", key="num_poste", root=tmp_path / "inc"
+        )
+        full = update_features(
+            hourly(HOURS), name="stations", key="num_poste", root=tmp_path / "full"
+        )
+        assert first + second == full
+
+        assert_frame_equal(
+            scan_features("stations", tmp_path / "inc")
+            .sort("num_poste", "date_heure")
+            .collect(),
+            scan_features("stations", tmp_path / "full")
+            .sort("num_poste", "date_heure")
+            .collect(),
+        )
+        assert (
+            update_features(
+                hourly(HOURS), name="stations", key="num_poste", root=tmp_path / "inc"
+            )
+            == 0
+        )
@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# cumulative import time of a module of the package, dependencies included: about
+# 0.1 s. An eager import of a heavy dependency is caught by the check of
+# `sys.modules`, whatever the timing; the budget catches slow imports of the package.
+IMPORT_BUDGET_S = 0.4
+
+HEAVY_DEPENDENCIES = ["polars", "aiohttp", "aiofiles", "psycopg", "sqlalchemy", "yaml"]
+
+LIGHT_MODULES = [
+    "de_electricity_meteo.logger",
+    "de_electricity_meteo.downloader",
+    "de_electricity_meteo.database.connection",
+    "de_electricity_meteo.electricity.odre_registre_national",
+    "de_electricity_meteo.meteo.object_store",
+    "de_electricity_meteo.meteo.stations",
+]
+
+
+def run_python(script: str) -> subprocess.CompletedProcess:
+    """
+    Runs a script in a fresh interpreter, with the import paths of the tests.
+    """
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+
+class TestImportTime:
+    @pytest.mark.parametrize("module", LIGHT_MODULES)
+    def test_import_is_light(self, module: str) -> None:
+        """
+        Check that importing a module loads no heavy dependency and fits the budget.
+        """
+        # a lazily imported package is in sys.modules but not executed, neither
+        # are its submodules imported
+        result = run_python(
+            f"import json, sys, {module}\n"
+            "loaded = {name.split('.')[0] for name in sys.modules if '.' in name}\n"
+            "loaded |= {name for name, module in sys.modules.items()\n"
+            "           if type(module).__name__ != '_LazyModule'}\n"
+            f"print(json.dumps(sorted(loaded & set({HEAVY_DEPENDENCIES!r}))))"
+        )
+        # import time: self [us] | cumulative | imported package
+        cumulative_us = next(
+            int(line.split("|")[1])
+            for line in result.stderr.splitlines()
+            if line.split("|")[-1].strip() == module
+        )
+
+        assert json.loads(result.stdout) == []
+        assert cumulative_us / 1e6 < IMPORT_BUDGET_S
+
+    def test_logger_is_configured_on_first_use(self) -> None:
+        """
+        Verify that the logging configuration is loaded by the first log call only.
+        """
+        result = run_python(
+            "import logging, sys\n"
+            "from de_electricity_meteo.logger import logger\n"
+            "before = len(logging.getHandlerNames())\n"
+            "logger.debug('first use')\n"
+            "after = len(logging.getHandlerNames())\n"
+            "sys.stderr.write(f'handlers {before} {after}')"
+        )
+        handlers = result.stderr.rsplit("handlers ", 1)[-1].split()
+
+        assert handlers[0] == "0"
+        assert int(handlers[1]) > 0
@@ -0,0 +1,152 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo.instrumentation import (
+    current_span,
+    format_metrics,
+    merge_metrics,
+    record,
+    span,
+    take_metrics,
+    write_metrics,
+)
+
+
+def metric_lines(stage: str) -> dict[str, float]:
+    """
+    Metrics of a stage, by metric name.
+    """
+    return {
+        line.split("{")[0]: float(line.rsplit(" ", 1)[1])
+        for line in format_metrics().splitlines()
+        if f'stage="{stage}"' in line
+    }
+
+
+class TestInstrumentation:
+    def test_context_manager_records_volumes(self) -> None:
+        """
+        Check the measures and volumes of a span, and the nesting of spans.
+        """
+        with span("test.outer", dataset="a") as outer:
+            record(rows_in=10)
+            with span("test.inner", dataset="a") as inner:
+                record(rows_out=3, bytes_out=100)
+                assert current_span() is inner
+            assert current_span() is outer
+            sum(range(100_000))
+
+        assert current_span() is None
+        assert (outer.rows_in, outer.rows_out) == (10, 0)
+        assert (inner.rows_out, inner.bytes_out) == (3, 100)
+        assert outer.wall_s >= inner.wall_s > 0
+        assert outer.process_peak_rss_bytes > 0
+        assert 0 <= outer.peak_rss_growth_bytes <= outer.process_peak_rss_bytes
+        assert outer.error is None
+
+    def test_unknown_volume(self) -> None:
+        """
+        Check that a typo in a volume name is reported.
+        """
+        with span("test.typo") as stats, pytest.raises(ValueError, match="Unknown"):
+            stats.record(row_out=1)
+
+    def test_decorators_and_errors(self) -> None:
+        """
+        Verify one span per call of decorated sync and async functions, and that
+        the spans finished by an exception are counted as errors.
+        """
+
+        @span("test.sync", dataset="d")
+        def transform(rows: int) -> int:
+            record(rows_out=rows)
+            return rows
+
+        @span("test.async", dataset="d")
+        async def download(size: int) -> int:
+            await asyncio.sleep(0)
+            record(bytes_in=size)
+            if size > 10:  # noqa: PLR2004
+                raise ValueError("too big")
+            return size
+
+        assert transform(2) + transform(3) == 5  # noqa: PLR2004
+        assert asyncio.run(download(4)) == 4  # noqa: PLR2004
+        with pytest.raises(ValueError, match="too big"):
+            asyncio.run(download(20))
+
+        sync, asynchronous = metric_lines("test.sync"), metric_lines("test.async")
+        assert sync["de_electricity_meteo_stage_runs_total"] == 2  # noqa: PLR2004
+        assert sync["de_electricity_meteo_stage_rows_out_total"] == 5  # noqa: PLR2004
+        assert asynchronous["de_electricity_meteo_stage_errors_total"] == 1
+        assert asynchronous["de_electricity_meteo_stage_bytes_in_total"] == 24  # noqa: PLR2004
+
+    def test_concurrent_tasks_have_their_own_span(self) -> None:
+        """
+        Check that the volumes of concurrent tasks go to their own span.
+        """
+
+        async def task(rows: int) -> int:
+            async with span("test.task") as stats:
+                for _ in range(rows):
+                    await asyncio.sleep(0)
+                    record(rows_out=1)
+                return stats.rows_out
+
+        async def main() -> list[int]:
+            return list(await asyncio.gather(task(3), task(5)))
+
+        assert asyncio.run(main()) == [3, 5]
+
+    def test_write_metrics(self, tmp_path: Path) -> None:
+        """
+        Verify the Prometheus text file.
+        """
+        with span("test.export", dataset='quote"d'):
+            record(bytes_out=7)
+        path = tmp_path / "metrics" / "pipeline.prom"
+        write_metrics(path)
+
+        text = path.read_text()
+        assert "# TYPE de_electricity_meteo_stage_runs_total counter" in text
+        assert (
+            'de_electricity_meteo_stage_bytes_out_total{stage="test.export",'
+            'dataset="quote\\"d"} 7'
+        ) in text
+        assert not path.with_suffix(".tmp").exists()
+
+    def test_metrics_of_worker_processes(self) -> None:
+        """
+        Check that the metrics taken in a worker are summed in the parent.
+        """
+        with span("test.worker", dataset="a"):
+            record(rows_out=5)
+        snapshot = take_metrics()
+        assert metric_lines("test.worker") == {}
+
+        merge_metrics(snapshot)
+        merge_metrics(snapshot)
+
+        metrics = metric_lines("test.worker")
+        assert metrics["de_electricity_meteo_stage_runs_total"] == 2  # noqa: PLR2004
+        assert metrics["de_electricity_meteo_stage_rows_out_total"] == 10  # noqa: PLR2004
+
+    def test_failing_exit_restores_parent(self, mocker: MockerFixture) -> None:
+        """
+        Verify that the parent span is current again when finishing a span fails.
+        """
+        profiler = mocker.Mock()
+        profiler.stop.side_effect = OSError("disk full")
+        mocker.patch(
+            "de_electricity_meteo.instrumentation.start_profiling",
+            side_effect=[None, profiler],
+        )
+
+        with span("test.parent") as parent:
+            with pytest.raises(OSError, match="disk full"):
+                with span("test.child"):
+                    pass
+            assert current_span() is parent
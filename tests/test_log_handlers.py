@@ -0,0 +1,157 @@
+import logging
+import threading
+from queue import Queue
+
+import pytest
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo.config.paths import LOGGER_CONFIG
+from de_electricity_meteo.enums import LoggerChoice
+from de_electricity_meteo.log_handlers import (
+    BoundedQueueHandler,
+    DrainingQueueListener,
+    SamplingFilter,
+)
+from de_electricity_meteo.logger import get_safe_logger, load_config
+
+QUEUE_SIZE = 3
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+        self.threads: set[str] = set()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+        self.threads.add(threading.current_thread().name)
+
+
+def record(message: str) -> logging.LogRecord:
+    return logging.makeLogRecord({"name": "test", "msg": message})
+
+
+def keyed(size: int, key: str = "chunk") -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {
+            "name": "test",
+            "levelno": logging.DEBUG,
+            "msg": "Chunk written",
+            "log_key": key,
+            "bytes": size,
+        }
+    )
+
+
+def messages(queue: Queue) -> list[str]:
+    queued = []
+    while not queue.empty():
+        queued.append(queue.get_nowait().getMessage())
+    return queued
+
+
+class TestLogHandlers:
+    @pytest.mark.parametrize(
+        ("overflow", "expected"),
+        [
+            ("drop_new", ["0", "1", "2"]),
+            ("drop_oldest", ["2", "3", "4"]),
+            ("block", ["0", "1", "2"]),
+        ],
+    )
+    def test_overflow_policies(self, overflow: str, expected: list[str]) -> None:
+        """
+        Check which records are kept when nothing consumes the queue.
+        """
+        queue = Queue(maxsize=QUEUE_SIZE)
+        handler = BoundedQueueHandler(queue, overflow=overflow, block_timeout=0.01)
+        for i in range(5):
+            handler.handle(record(str(i)))
+
+        assert handler.dropped == 2  # noqa: PLR2004
+        assert messages(queue) == expected
+
+        # the next record accepted is preceded by the count of dropped records
+        handler.handle(record("5"))
+        warning, last = queue.get_nowait(), queue.get_nowait()
+        assert warning.dropped == 2  # noqa: PLR2004
+        assert warning.levelno == logging.WARNING
+        assert last.getMessage() == "5"
+
+    def test_unknown_overflow_policy(self) -> None:
+        """
+        Check that a typo in the configuration is reported.
+        """
+        with pytest.raises(ValueError, match="Unknown overflow policy"):
+            BoundedQueueHandler(Queue(), overflow="drop")
+
+    def test_listener_formats_in_thread_and_drains_on_close(self) -> None:
+        """
+        Verify that records are emitted by the listener thread, all of them.
+        """
+        target = ListHandler()
+        queue = Queue(maxsize=1000)
+        handler = BoundedQueueHandler(queue)
+        handler.listener = DrainingQueueListener(queue, target)
+        handler.start()
+        for i in range(100):
+            handler.handle(record(str(i)))
+        handler.close()
+
+        assert len(target.records) == 100  # noqa: PLR2004
+        assert threading.current_thread().name not in target.threads
+        assert not handler.listener.is_alive
+
+    def test_logger_yaml_uses_queue(self) -> None:
+        """
+        Check that the configured console logger goes through a started queue.
+        """
+        load_config.cache_clear()
+        logger = get_safe_logger(LOGGER_CONFIG, LoggerChoice.CONSOLE)
+        (handler,) = logger.handlers
+
+        assert isinstance(handler, BoundedQueueHandler)
+        assert handler.listener is not None
+        assert handler.listener.is_alive
+
+    def test_sampling_and_rate_limiting(self, mocker: MockerFixture) -> None:
+        """
+        Check the 1 in N sampling, then the token bucket, of a log key.
+        """
+        clock = mocker.patch("de_electricity_meteo.log_handlers.time.monotonic")
+        clock.return_value = 0.0
+        sampling = SamplingFilter(
+            {"chunk": {"sample": 2, "rate": 1, "burst": 2}}, summary_interval=3600
+        )
+
+        kept = [sampling.filter(keyed(i)) for i in range(8)]
+        # 0, 2 and 4 sampled, the bucket only holds 2 tokens
+        assert kept == [True, False, True, False, False, False, False, False]
+
+        clock.return_value = 1.0
+        assert sampling.filter(keyed(8)) is True
+        # records without a key or rule pass
+        assert sampling.filter(record("other")) is True
+        assert sampling.filter(keyed(9, key="other")) is True
+
+    def test_summaries_aggregate_suppressed_records(self) -> None:
+        """
+        Verify the summary of the suppressed records, flushed on close.
+        """
+        queue = Queue()
+        handler = BoundedQueueHandler(queue)
+        handler.addFilter(
+            SamplingFilter({"chunk": {"sample": 10, "aggregate": ["bytes"]}})
+        )
+        for i in range(1, 21):
+            handler.handle(keyed(i))
+        handler.close()
+
+        first, eleventh, summary = (queue.get_nowait() for _ in range(3))
+        assert [first.bytes, eleventh.bytes] == [1, 11]
+        assert summary.summary_of == "chunk"
+        assert summary.suppressed == 18  # noqa: PLR2004
+        assert summary.bytes_sum == 210 - 12  # noqa: PLR2004
+        assert (summary.bytes_min, summary.bytes_max) == (2, 20)
+        assert queue.empty()
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo.instrumentation import format_metrics
+from de_electricity_meteo.loop_monitor import MAX_SAMPLES, LoopMonitor, percentile
+
+
+class TestLoopMonitor:
+    def test_percentile(self) -> None:
+        """
+        Check the nearest-rank percentiles.
+        """
+        values = [float(i) for i in range(1, 101)]
+
+        assert percentile(values, 0.5) == 50  # noqa: PLR2004
+        assert percentile(values, 0.99) == 99  # noqa: PLR2004
+        assert percentile([3.0], 0.9) == 3  # noqa: PLR2004
+        assert percentile([], 0.5) == 0
+
+    def test_blocking_call_is_reported(self, mocker: MockerFixture) -> None:
+        """
+        Verify that a callback blocking the loop is reported once, with its task
+        and stack, and shows in the lag percentiles.
+        """
+
+        async def parse() -> None:
+            await asyncio.sleep(0.05)
+            time.sleep(0.3)  # blocks the loop
+
+        async def main() -> LoopMonitor:
+            async with LoopMonitor(
+                "test.blocking", interval=0.01, threshold=0.1
+            ) as monitor:
+                await asyncio.create_task(parse(), name="parser")
+            return monitor
+
+        logger = mocker.patch("de_electricity_meteo.loop_monitor.logger")
+        monitor = asyncio.run(main())
+
+        logger.warning.assert_called_once()
+        blocked = logger.warning.call_args.kwargs["extra"]
+        assert monitor.blocked == 1
+        assert blocked["task"] == "parser"
+        assert blocked["coroutine"].endswith("parse")
+        assert "time.sleep(0.3)" in blocked["stack"]
+        assert max(monitor.lags) > 0.2  # noqa: PLR2004
+        assert (
+            'de_electricity_meteo_loop_blocked{monitor="test.blocking"} 1'
+            in format_metrics()
+        )
+
+    def test_idle_loop(self) -> None:
+        """
+        Check that an idle loop has a small lag and no blocking report.
+        """
+
+        async def main() -> LoopMonitor:
+            async with LoopMonitor("test.idle", interval=0.01) as monitor:
+                await asyncio.sleep(0.2)
+            return monitor
+
+        monitor = asyncio.run(main())
+        summary = monitor.report()
+
+        assert monitor.blocked == 0
+        assert len(monitor.lags) > 5  # noqa: PLR2004
+        assert summary["p50"] < 0.05  # noqa: PLR2004
+
+    def test_samples_are_bounded(self, mocker: MockerFixture) -> None:
+        """
+        Check that only the latest lag samples are kept and reported.
+        """
+        mocker.patch("de_electricity_meteo.loop_monitor.logger")
+        monitor = LoopMonitor("test.bounded")
+        monitor.lags.extend([1.0] * MAX_SAMPLES + [0.0] * MAX_SAMPLES)
+
+        assert len(monitor.lags) == MAX_SAMPLES
+        assert monitor.report()["max"] == 0
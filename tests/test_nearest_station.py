@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from de_electricity_meteo.geo.nearest_station import (
+    build_station_index,
+    haversine_km,
+    load_station_index,
+    nearest_stations,
+    save_station_index,
+)
+
+K = 3
+
+
+def grid_points(n: int, seed: int) -> pl.DataFrame:
+    """
+    Pseudo-random points over metropolitan France.
+    """
+    i = pl.int_range(n, eager=True)
+    return pl.DataFrame(
+        {
+            "latitude": 42.0 + ((i * 7919 + seed) % 1000) / 1000 * 9.0,
+            "longitude": -4.5 + ((i * 104729 + seed * 31) % 1000) / 1000 * 12.5,
+        }
+    )
+
+
+def brute_force(points: pl.DataFrame, stations: pl.DataFrame, k: int) -> pl.DataFrame:
+    return (
+        points.join(stations.rename({"id": "id_station"}), how="cross", suffix="_s")
+        .with_columns(
+            haversine_km(
+                pl.col("latitude"),
+                pl.col("longitude"),
+                pl.col("latitude_s"),
+                pl.col("longitude_s"),
+            ).alias("distance_km")
+        )
+        .sort("distance_km", "id_station")
+        .group_by("latitude", "longitude", maintain_order=True)
+        .head(k)
+        .select("latitude", "longitude", "id_station", "distance_km")
+    )
+
+
+class TestNearestStation:
+    def test_matches_brute_force(self, tmp_path: Path) -> None:
+        """
+        Compare the batch kNN with a full cross join, after a persistence round.
+        """
+        stations = grid_points(150, seed=1).with_columns(
+            pl.format("S{}", pl.int_range(pl.len())).alias("id")
+        )
+        # installations share centroids, and one has no coordinates
+        installations = pl.concat(
+            [grid_points(400, seed=2), grid_points(400, seed=2).head(50)]
+        ).with_row_index("id_installation")
+        installations = pl.concat(
+            [
+                installations,
+                pl.DataFrame(
+                    {"id_installation": [9999], "latitude": [None], "longitude": [0.0]},
+                    schema=installations.schema,
+                ),
+            ]
+        )
+
+        save_station_index(build_station_index(stations), tmp_path / "grid.parquet")
+        index = load_station_index(tmp_path / "grid.parquet")
+        links = nearest_stations(installations, index, k=K)
+
+        assert len(links) == (len(installations) - 1) * K + 1
+        assert links.filter(pl.col("latitude").is_null())["id_station"][0] is None
+
+        expected = brute_force(
+            installations.drop_nulls().select("latitude", "longitude").unique(),
+            stations,
+            k=K,
+        )
+        assert_frame_equal(
+            links.drop_nulls()
+            .select("latitude", "longitude", "id_station", "distance_km")
+            .unique()
+            .sort("latitude", "longitude", "distance_km"),
+            expected.sort("latitude", "longitude", "distance_km"),
+        )
+
+    def test_max_distance_and_subset(self) -> None:
+        """
+        Check that far stations are ignored and only the given ids are indexed.
+        """
+        stations = pl.DataFrame(
+            {
+                "id": ["marignane", "cassis", "brest"],
+                "latitude": [43.44, 43.21, 48.44],
+                "longitude": [5.22, 5.55, -4.41],
+            }
+        )
+        marseille = pl.DataFrame({"latitude": [43.30], "longitude": [5.37]})
+
+        links = nearest_stations(
+            marseille, build_station_index(stations), k=K, max_distance_km=100
+        )
+        assert links["id_station"].to_list() == ["cassis", "marignane"]
+        assert links["rang"].to_list() == [1, 2]
+
+        links = nearest_stations(
+            marseille, build_station_index(stations, ids=["brest"]), k=K
+        )
+        assert links["id_station"].to_list() == ["brest"]
+        assert links["distance_km"][0] > 800  # noqa: PLR2004
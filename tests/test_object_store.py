@@ -0,0 +1,118 @@
+import asyncio
+from datetime import UTC, datetime
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo.meteo.object_store import (
+    BUCKET_URL,
+    RemoteObject,
+    parse_list_objects,
+    sync,
+)
+
+PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">
+  <Name>meteofrance</Name>
+  <Prefix>data/synchro_ftp/BASE/HOR/</Prefix>
+  <KeyCount>2</KeyCount>
+  <IsTruncated>{truncated}</IsTruncated>
+  {token}
+  <Contents>
+    <Key>data/synchro_ftp/BASE/HOR/H_13_1990-1999.csv.gz</Key>
+    <LastModified>2025-01-10T08:00:00.000Z</LastModified>
+    <ETag>"a1b2"</ETag>
+    <Size>1024</Size>
+  </Contents>
+  <Contents>
+    <Key>data/synchro_ftp/BASE/HOR/H_13_latest-2024-2025.csv.gz</Key>
+    <LastModified>2025-06-01T08:00:00.000Z</LastModified>
+    <ETag>"c3d4"</ETag>
+    <Size>2048</Size>
+  </Contents>
+</ListBucketResult>
+"""
+
+
+def remote_object(key: str, etag: str) -> RemoteObject:
+    return RemoteObject(
+        key=f"data/synchro_ftp/{key}",
+        size=len(etag),
+        last_modified=datetime(2025, 1, 1, tzinfo=UTC),
+        etag=etag,
+    )
+
+
+class TestObjectStore:
+    def test_parse_list_objects(self) -> None:
+        """
+        Check the objects of a page and the continuation token.
+        """
+        objects, token = parse_list_objects(
+            PAGE.format(
+                truncated="true",
+                token="<NextContinuationToken>next</NextContinuationToken>",
+            )
+        )
+
+        assert token == "next"
+        assert [obj.name for obj in objects] == [
+            "H_13_1990-1999.csv.gz",
+            "H_13_latest-2024-2025.csv.gz",
+        ]
+        assert objects[0].etag == "a1b2"
+        assert objects[0].size == 1024  # noqa: PLR2004
+        assert objects[0].last_modified == datetime(2025, 1, 10, 8, tzinfo=UTC)
+        assert objects[0].url == f"{BUCKET_URL}/{objects[0].key}"
+
+        _, token = parse_list_objects(PAGE.format(truncated="false", token=""))
+        assert token is None
+
+    def test_sync_downloads_only_changes(
+        self, tmp_path: Path, mocker: MockerFixture
+    ) -> None:
+        """
+        Verify the delta between two syncs: changed objects, unchanged and pruned.
+        """
+        remote = {
+            "fiches.json": "v1",
+            "BASE/HOR/H_13_latest-2024-2025.csv.gz": "v1",
+            "BASE/HOR/H_13_1990-1999.csv.gz": "v1",
+        }
+
+        async def fake_list_objects(prefix: str) -> list[RemoteObject]:
+            return [remote_object(key, etag) for key, etag in remote.items()]
+
+        async def fake_save_file(url: str, path: Path, dataset: str) -> None:
+            # the content is the etag, so the size matches the listing
+            path.write_text(remote[url.split("data/synchro_ftp/")[1]])
+
+        mocker.patch(
+            "de_electricity_meteo.meteo.object_store.list_objects",
+            side_effect=fake_list_objects,
+        )
+        save_file = mocker.patch(
+            "de_electricity_meteo.meteo.object_store.save_file",
+            side_effect=fake_save_file,
+        )
+
+        report = asyncio.run(sync(local_dir=tmp_path))
+        assert len(report.downloaded) == len(remote)
+
+        remote["BASE/HOR/H_13_latest-2024-2025.csv.gz"] = "v22"
+        del remote["BASE/HOR/H_13_1990-1999.csv.gz"]
+        save_file.reset_mock()
+
+        report = asyncio.run(sync(local_dir=tmp_path))
+        assert report.downloaded == [
+            "data/synchro_ftp/BASE/HOR/H_13_latest-2024-2025.csv.gz"
+        ]
+        assert report.unchanged == 1
+        assert report.pruned == ["data/synchro_ftp/BASE/HOR/H_13_1990-1999.csv.gz"]
+        assert save_file.call_count == 1
+
+        hourly = tmp_path / "data/synchro_ftp/BASE/HOR"
+        assert [path.name for path in hourly.iterdir()] == [
+            "H_13_latest-2024-2025.csv.gz"
+        ]
+        assert (hourly / "H_13_latest-2024-2025.csv.gz").read_text() == "v22"
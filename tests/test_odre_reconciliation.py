@@ -0,0 +1,96 @@
+from datetime import date
+
+import polars as pl
+import pytest
+
+from de_electricity_meteo.electricity.odre_reconciliation import (
+    Metric,
+    compile_metrics,
+    reconcile,
+    rte_parc_metrics,
+    rte_parc_references,
+)
+
+REGISTRY = pl.LazyFrame(
+    {
+        "region": ["Occitanie", "Occitanie", "Guyane", "Bretagne"],
+        "filiere": ["Solaire", "Solaire", "Solaire", "Eolien"],
+        "regime": ["En service", "En service", "En service", "En retrait provisoire"],
+        "codeeicresourceobject": ["EIC1", None, "EIC2", "EIC3"],
+        "datemiseenservice_date": [
+            date(2025, 1, 2),
+            date(2020, 1, 1),
+            date(2025, 6, 1),
+            date(2010, 1, 1),
+        ],
+        "puismaxinstallee": [10.0, 5.0, 3.0, 7.0],
+        "puismaxcharge": [1.0, 0.0, 0.0, 0.0],
+        "puismaxraccharge": [0.0, 0.0, 0.0, 2.0],
+    }
+)
+
+
+class TestOdreReconciliation:
+    def test_reconcile_scalar_and_grouped_metrics(self) -> None:
+        """
+        Check computed values and deltas for scalar and grouped metrics.
+        """
+        metrics = [
+            Metric("total", "puismaxinstallee"),
+            Metric("solaire", "puismaxinstallee", pl.col("filiere") == "Solaire"),
+            Metric("par_region", "puismaxinstallee", by="region"),
+        ]
+        report = reconcile(
+            REGISTRY,
+            metrics,
+            references={"total": 20.0, "par_region": {"Occitanie": 15.0}},
+        )
+
+        figures = {
+            (metric, group): (value, delta)
+            for metric, group, value, delta in report.figures.select(
+                "metric", "group", "value", "delta"
+            ).iter_rows()
+        }
+        assert figures[("total", None)] == (25.0, 5.0)
+        assert figures[("solaire", None)] == (18.0, None)
+        assert figures[("par_region", "Occitanie")] == (15.0, 0.0)
+        assert figures[("par_region", "Bretagne")] == (7.0, None)
+        assert report.runtime_s >= 0
+
+    def test_compile_metrics_one_query_per_grouping(self) -> None:
+        """
+        Verify that metrics sharing a grouping are fused into the same query.
+        """
+        queries = compile_metrics(REGISTRY, rte_parc_metrics())
+
+        assert len(queries) == len({metric.by for metric in rte_parc_metrics()})
+
+    def test_rte_parc_metrics(self) -> None:
+        """
+        Check the default RTE metrics on a small registry.
+        """
+        report = reconcile(REGISTRY, rte_parc_metrics(), rte_parc_references())
+        values = dict(
+            report.figures.filter(pl.col("group").is_null())
+            .select("metric", "value")
+            .iter_rows()
+        )
+
+        expected = {
+            "puismaxinstallee_hors_dom": 22.0,
+            "puismaxinstallee_hors_dom_mise_en_service_annee": 10.0,
+            "puismaxinstallee_hors_dom_en_retrait_provisoire": 7.0,
+            "puismaxinstallee_hors_dom_aggregations": 5.0,
+        }
+        assert {metric: values[metric] for metric in expected} == expected
+
+    def test_duplicated_metric_names(self) -> None:
+        """
+        Check that ValueError is raised when two metrics share a name.
+        """
+        with pytest.raises(ValueError, match="Metric names must be unique"):
+            compile_metrics(
+                REGISTRY,
+                [Metric("m", "puismaxinstallee"), Metric("m", "puismaxcharge")],
+            )
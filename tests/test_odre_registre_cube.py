@@ -0,0 +1,166 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from de_electricity_meteo.electricity.odre_registre_cube import (
+    CUBE_KEYS,
+    CUBE_MEASURES,
+    build_cube,
+    load_cube,
+    query_cube,
+    update_cube,
+)
+from de_electricity_meteo.electricity.odre_registre_versions import (
+    ingest_snapshot,
+    snapshot_changes,
+)
+
+
+def make_registry(rows: list[tuple]) -> pl.LazyFrame:
+    """
+    Builds a minimal registry snapshot from (region, filiere, eic, puissance) tuples.
+    """
+    return pl.LazyFrame(
+        {
+            "region": [row[0] for row in rows],
+            "filiere": [row[1] for row in rows],
+            "technologie": ["Photovoltaïque"] * len(rows),
+            "regime": ["En service"] * len(rows),
+            "datemiseenservice_date": [date(2024, 3, 12)] * len(rows),
+            "codeeicresourceobject": [row[2] for row in rows],
+            "nbinstallations": [1] * len(rows),
+            **{
+                measure: [None] * len(rows)
+                for measure in CUBE_MEASURES
+                if measure != "puismaxinstallee"
+            },
+            "puismaxinstallee": [row[3] for row in rows],
+        },
+        schema_overrides={measure: pl.Float64 for measure in CUBE_MEASURES},
+    )
+
+
+PREVIOUS = [
+    ("Occitanie", "Solaire", "EIC1", 10.0),
+    ("Occitanie", "Solaire", None, 5.0),
+    ("Guyane", "Solaire", "EIC2", 3.0),
+    ("Bretagne", "Eolien", "EIC3", 7.0),
+]
+
+CURRENT = [
+    ("Occitanie", "Solaire", "EIC1", 12.0),  # changed
+    ("Occitanie", "Solaire", None, 5.0),
+    ("Guyane", "Solaire", "EIC2", 3.0),
+    # Bretagne removed
+    ("Corse", "Eolien", "EIC4", 1.0),  # added
+]
+
+
+# several rows per cell, some of them removed
+MULTI_ROW_PREVIOUS = [
+    ("Occitanie", "Solaire", "EIC1", 1.0),
+    ("Occitanie", "Solaire", "EIC2", 2.0),
+    ("Occitanie", "Solaire", "EIC3", 3.0),
+    ("Occitanie", "Solaire", None, 4.0),
+    ("Occitanie", "Solaire", None, 4.0),
+]
+
+MULTI_ROW_CURRENT = [
+    ("Occitanie", "Solaire", "EIC1", 1.0),
+    ("Occitanie", "Solaire", "EIC3", 3.0),
+    ("Occitanie", "Solaire", None, 4.0),
+]
+
+AGGREGATED_CAPACITY = 5.0
+CURRENT_TOTAL_CAPACITY = 21.0
+
+
+class TestOdreRegistreCube:
+    def test_build_cube_flags_aggregates(self) -> None:
+        """
+        Check that rows without EIC code are flagged and months are truncated.
+        """
+        cube = build_cube(make_registry(PREVIOUS)).collect()
+
+        assert cube.columns[: len(CUBE_KEYS)] == CUBE_KEYS
+        assert cube["mois_mise_en_service"].unique().to_list() == [date(2024, 3, 1)]
+        assert (
+            cube.filter(pl.col("is_aggregate"))["puismaxinstallee"].item()
+            == AGGREGATED_CAPACITY
+        )
+
+    def test_incremental_update_matches_rebuild(self, tmp_path: Path) -> None:
+        """
+        Verify that applying the registry delta gives the same cube as a rebuild.
+        """
+        incremental, rebuilt = self.update(tmp_path, PREVIOUS, CURRENT)
+
+        assert_frame_equal(incremental, rebuilt, check_dtypes=False)
+        assert_frame_equal(load_cube(tmp_path / "cube.parquet"), incremental)
+        assert "Bretagne" not in incremental["region"].to_list()
+
+    def test_partial_removal_keeps_cells(self, tmp_path: Path) -> None:
+        """
+        Check that removing some of the rows of a cell updates it without deleting
+        it.
+        """
+        incremental, rebuilt = self.update(
+            tmp_path, MULTI_ROW_PREVIOUS, MULTI_ROW_CURRENT
+        )
+
+        assert_frame_equal(incremental, rebuilt, check_dtypes=False)
+        assert incremental.select("is_aggregate", "nb_lignes").rows() == [
+            (False, 2),
+            (True, 1),
+        ]
+
+    @staticmethod
+    def update(
+        tmp_path: Path, previous: list[tuple], current: list[tuple]
+    ) -> tuple[pl.DataFrame, pl.DataFrame]:
+        """
+        Ingests two snapshots and updates the cube with the changes of the second.
+
+        Returns the incremental cube and the cube rebuilt from the second snapshot.
+        """
+        path, store = tmp_path / "cube.parquet", tmp_path / "versions"
+        first, second = date(2024, 1, 1), date(2024, 1, 1) + timedelta(days=1)
+        ingest_snapshot(make_registry(previous), first, store=store)
+        update_cube(make_registry(previous), path=path)
+
+        ingest_snapshot(make_registry(current), second, store=store)
+        incremental = update_cube(
+            make_registry(current),
+            changes=snapshot_changes(second, store=store),
+            path=path,
+        )
+        return incremental, build_cube(make_registry(current)).collect()
+
+    def test_query_cube_rollups(self) -> None:
+        """
+        Check the DOM and aggregate switches of the rollup query.
+        """
+        cube = build_cube(make_registry(CURRENT)).collect()
+
+        total = query_cube(cube)
+        assert total["puismaxinstallee"].item() == CURRENT_TOTAL_CAPACITY
+
+        metropole = query_cube(
+            cube, by=["region"], include_dom=False, include_aggregates=False
+        )
+        assert dict(metropole.select("region", "puismaxinstallee").iter_rows()) == {
+            "Occitanie": 12.0,
+            "Corse": 1.0,
+        }
+
+    def test_query_cube_unknown_key(self) -> None:
+        """
+        Check that ValueError is raised when grouping on a column outside the cube.
+        """
+        cube = build_cube(make_registry(CURRENT)).collect()
+
+        with pytest.raises(ValueError, match="Cannot group the cube"):
+            query_cube(cube, by=["commune"])
@@ -0,0 +1,69 @@
+import os
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from de_electricity_meteo.electricity.odre_registre_lookup import (
+    RegistryIndex,
+    lookup,
+    write_registry,
+)
+
+
+def registry(n: int) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "idpeps": [f"P{i:06d}" for i in reversed(range(n))],
+            "codeeicresourceobject": [
+                f"17W{i % 7}" if i % 3 else None for i in range(n)
+            ],
+            "nominstallation": [f"INSTALLATION {i // 2}" for i in range(n)],
+            "maxpuis": [float(i) for i in range(n)],
+        }
+    )
+
+
+class TestRegistryLookup:
+    def test_lookup(self, tmp_path: Path) -> None:
+        """
+        Check the rows found for each key, and the registry sorted on `idpeps`.
+        """
+        path, index_path = tmp_path / "registre.parquet", tmp_path / "index.parquet"
+        write_registry(registry(20_000), path, index_path)
+        index = RegistryIndex.load(path, index_path)
+
+        assert pl.read_parquet(path)["idpeps"].is_sorted()
+        row = index.lookup("idpeps", "P012345")
+        # identifiers are in reverse order of the rows
+        assert row["maxpuis"].to_list() == [7654.0]
+
+        for key, value in [
+            ("codeeicresourceobject", "17W3"),
+            ("nominstallation", "INSTALLATION 42"),
+        ]:
+            expected = pl.read_parquet(path).filter(pl.col(key) == value)
+            assert index.lookup(key, value).equals(expected)
+
+        assert index.lookup("nominstallation", "ABSENTE").is_empty()
+        # searched on disk, its row group statistics prune on the sorted values
+        entries = pl.read_parquet(index_path)
+        assert entries.equals(entries.sort("key", "value", "_row"))
+        assert index.rows("idpeps", "P012345") == [12345]  # noqa: PLR2004
+        with pytest.raises(ValueError, match="Unknown lookup key"):
+            index.lookup("maxpuis", "1.0")
+
+    def test_rebuilt_when_registry_changes(self, tmp_path: Path) -> None:
+        """
+        Verify that the index follows a rewrite of the registry.
+        """
+        path, index_path = tmp_path / "registre.parquet", tmp_path / "index.parquet"
+        write_registry(registry(10), path, index_path)
+        assert len(lookup("idpeps", "P000003", path, index_path)) == 1
+
+        # rewritten without its index
+        registry(3).with_columns(pl.col("maxpuis") * 10).write_parquet(path)
+        os.utime(path, ns=(1, 1))
+
+        assert lookup("idpeps", "P000000", path, index_path)["maxpuis"].item() == 20.0  # noqa: PLR2004
+        assert lookup("idpeps", "P000003", path, index_path).is_empty()
@@ -0,0 +1,97 @@
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from de_electricity_meteo.electricity.odre_registre_versions import (
+    as_of,
+    history,
+    ingest_snapshot,
+    snapshot_dates,
+)
+
+SNAPSHOT_2024 = pl.LazyFrame(
+    {
+        "nominstallation": ["A", "B", "C", "C"],
+        "region": ["Occitanie", "Bretagne", "Corse", "Corse"],
+        "puismaxinstallee": [10.0, 7.0, 1.0, 1.0],
+    }
+)
+
+SNAPSHOT_2025 = pl.LazyFrame(
+    {
+        "nominstallation": ["A", "B", "C", "D"],
+        "region": ["Occitanie", "Bretagne", "Corse", "Occitanie"],
+        "puismaxinstallee": [12.0, 7.0, 1.0, 3.0],
+    }
+)
+
+
+def sorted_registry(lf: pl.LazyFrame) -> pl.DataFrame:
+    return (
+        lf.select("nominstallation", "region", "puismaxinstallee")
+        .collect()
+        .sort(pl.all())
+    )
+
+
+class TestOdreRegistreVersions:
+    def test_as_of_reconstructs_each_snapshot(self, tmp_path: Path) -> None:
+        """
+        Check that every ingested snapshot can be rebuilt from the deltas.
+        """
+        ingest_snapshot(SNAPSHOT_2024, date(2024, 12, 31), store=tmp_path)
+        opened, closed = ingest_snapshot(
+            SNAPSHOT_2025, date(2025, 12, 1), store=tmp_path
+        )
+
+        # A changed, one C duplicate removed, D added
+        assert (opened, closed) == (2, 2)
+        assert snapshot_dates(tmp_path) == [date(2024, 12, 31), date(2025, 12, 1)]
+        assert_frame_equal(
+            sorted_registry(as_of(date(2025, 6, 1), store=tmp_path)),
+            sorted_registry(SNAPSHOT_2024),
+        )
+        assert_frame_equal(
+            sorted_registry(as_of(date(2025, 12, 1), store=tmp_path)),
+            sorted_registry(SNAPSHOT_2025),
+        )
+
+    def test_history_validity_intervals(self, tmp_path: Path) -> None:
+        """
+        Verify the valid_from / valid_to columns of a changed installation.
+        """
+        ingest_snapshot(SNAPSHOT_2024, date(2024, 12, 31), store=tmp_path)
+        ingest_snapshot(SNAPSHOT_2025, date(2025, 12, 1), store=tmp_path)
+
+        versions_of_a = (
+            history(store=tmp_path)
+            .filter(pl.col("nominstallation") == "A")
+            .sort("valid_from")
+            .select("puismaxinstallee", "valid_from", "valid_to")
+            .collect()
+            .rows()
+        )
+
+        assert versions_of_a == [
+            (10.0, date(2024, 12, 31), date(2025, 12, 1)),
+            (12.0, date(2025, 12, 1), None),
+        ]
+
+    def test_ingest_out_of_order(self, tmp_path: Path) -> None:
+        """
+        Check that ValueError is raised when a snapshot is older than the store.
+        """
+        ingest_snapshot(SNAPSHOT_2025, date(2025, 12, 1), store=tmp_path)
+
+        with pytest.raises(ValueError, match="must be ingested in order"):
+            ingest_snapshot(SNAPSHOT_2024, date(2024, 12, 31), store=tmp_path)
+
+    def test_as_of_empty_store(self, tmp_path: Path) -> None:
+        """
+        Check that ValueError is raised when nothing was ingested.
+        """
+        with pytest.raises(ValueError, match="No registry snapshot"):
+            as_of(date(2025, 1, 1), store=tmp_path)
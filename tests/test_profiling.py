@@ -0,0 +1,116 @@
+import argparse
+import os
+import pstats
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from de_electricity_meteo.config.paths import PROFILES
+from de_electricity_meteo.instrumentation import span
+from de_electricity_meteo.profiling import (
+    PROFILE_DIR_ENV,
+    PROFILE_ENV,
+    add_profile_arguments,
+    collect,
+    configure_profiling,
+    is_profiled,
+)
+
+
+@pytest.fixture
+def profile_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """
+    Profiles the `test.*` stages into a temporary run directory.
+    """
+    monkeypatch.setenv(PROFILE_ENV, "test.*, other")
+    monkeypatch.setenv(PROFILE_DIR_ENV, str(tmp_path))
+    return tmp_path
+
+
+class TestProfiling:
+    def test_selection(self, profile_dir: Path) -> None:
+        """
+        Check the matching of the stage names on the selected patterns.
+        """
+        assert is_profiled("test.stage")
+        assert is_profiled("other")
+        assert not is_profiled("download")
+
+    def test_span_profiles(self, profile_dir: Path) -> None:
+        """
+        Verify the cProfile and tracemalloc artifacts of a profiled span, nested
+        profiled spans being covered by the outer ones.
+        """
+        with span("test.outer"):
+            with span("test.inner"):
+                data = [str(i) for i in range(10_000)]
+            sorted(data)
+        with span("download"):
+            pass
+
+        artifacts = sorted(path.name for path in profile_dir.iterdir())
+        assert [name.split("-")[0] for name in artifacts] == ["test.outer"] * 3
+        assert [name.split(".", 2)[-1] for name in artifacts] == [
+            "prof",
+            "pstats.txt",
+            "tracemalloc.txt",
+        ]
+
+        (prof,) = profile_dir.glob("*.prof")
+        functions = pstats.Stats(str(prof)).get_stats_profile().func_profiles
+        assert "<built-in method builtins.sorted>" in functions
+        assert "peak" in next(profile_dir.glob("*.tracemalloc.txt")).read_text()
+
+    def test_collect(self, profile_dir: Path) -> None:
+        """
+        Check that a profiled query writes its plan and node timings, and returns
+        the same result as a plain collect.
+        """
+        lf = pl.LazyFrame({"a": [1, 2, 3, 3]}).filter(pl.col("a") > 1).unique()
+
+        profiled = collect(lf, stage="test.query")
+        plain = collect(lf, stage="download")
+
+        assert profiled.sort("a").equals(plain.sort("a"))
+        (plan,) = profile_dir.glob("test.query-*.plan.txt")
+        assert "FILTER" in plan.read_text()
+        nodes = pl.read_csv(next(profile_dir.glob("test.query-*.nodes.csv")))
+        assert nodes.columns == ["node", "start", "end"]
+        assert len(list(profile_dir.iterdir())) == 2  # noqa: PLR2004
+
+    def test_command_line(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Check that the command line options select the stages for the subprocesses.
+        """
+        # restored after the test
+        monkeypatch.setenv(PROFILE_ENV, "")
+        monkeypatch.setenv(PROFILE_DIR_ENV, "")
+        parser = argparse.ArgumentParser()
+        add_profile_arguments(parser)
+        args = parser.parse_args(
+            ["--profile", "eco2mix.*", "--profile-dir", str(tmp_path)]
+        )
+
+        configure_profiling(args.profile, args.profile_dir)
+
+        assert os.environ[PROFILE_DIR_ENV] == str(tmp_path)
+        assert is_profiled("eco2mix.build")
+        assert not is_profiled("download")
+
+    def test_run_directory_resolved_before_workers(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Verify that selecting stages exports the run directory for the workers.
+        """
+        # restored after the test
+        monkeypatch.setenv(PROFILE_ENV, "")
+        monkeypatch.setenv(PROFILE_DIR_ENV, "")
+        monkeypatch.delenv(PROFILE_DIR_ENV)
+
+        configure_profiling("climatology.convert")
+
+        assert os.environ[PROFILE_DIR_ENV].startswith(str(PROFILES))
@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+
+import polars as pl
+
+from de_electricity_meteo.query_cache import QueryCache, query_key
+
+
+def write(path: Path, filieres: list[str], capacities: list[float]) -> None:
+    pl.DataFrame({"filiere": filieres, "puissance": capacities}).write_parquet(path)
+
+
+def capacity_by_filiere(path: Path) -> pl.LazyFrame:
+    return (
+        pl.scan_parquet(path)
+        .group_by("filiere")
+        .agg(pl.col("puissance").sum())
+        .sort("filiere")
+    )
+
+
+class TestQueryCache:
+    def test_memory_and_disk_tiers(self, tmp_path: Path) -> None:
+        """
+        Check that a repeated query is served from memory, then from disk by
+        another cache, without being collected again.
+        """
+        source = tmp_path / "registre.parquet"
+        write(source, ["eolien", "solaire", "eolien"], [1.0, 2.0, 3.0])
+        cache = QueryCache(directory=tmp_path / "queries")
+
+        first = cache.collect(capacity_by_filiere(source), source)
+        second = cache.collect(capacity_by_filiere(source), source)
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert first.equals(second)
+        assert first["puissance"].to_list() == [4.0, 2.0]
+
+        restarted = QueryCache(directory=tmp_path / "queries")
+        assert restarted.collect(capacity_by_filiere(source), source).equals(first)
+        assert (restarted.hits, restarted.misses) == (1, 0)
+
+    def test_invalidation(self, tmp_path: Path) -> None:
+        """
+        Verify that a new version of the source or another query misses.
+        """
+        source = tmp_path / "registre.parquet"
+        write(source, ["eolien"], [1.0])
+        cache = QueryCache(directory=None)
+        cache.collect(capacity_by_filiere(source), source)
+
+        write(source, ["eolien", "solaire"], [1.0, 5.0])
+        os.utime(source, ns=(1, 1))
+        df = cache.collect(capacity_by_filiere(source), source)
+        cache.collect(pl.scan_parquet(source).select(pl.len()), source)
+
+        # long literals are abbreviated in the text of the plan, not serialized
+        for excluded in (["a", "b", "c", "d", "e"], ["a", "b", "x", "d", "e"]):
+            cache.collect(
+                capacity_by_filiere(source).filter(~pl.col("filiere").is_in(excluded)),
+                source,
+            )
+
+        assert df["puissance"].to_list() == [1.0, 5.0]
+        assert (cache.hits, cache.misses) == (0, 5)  # noqa: PLR2004
+
+    def test_lru_bound(self, tmp_path: Path) -> None:
+        """
+        Check that the least recently used results are evicted beyond the bound.
+        """
+        source = tmp_path / "registre.parquet"
+        write(source, ["eolien"], [1.0])
+        queries = [
+            pl.scan_parquet(source).select(pl.repeat(i, 1000, dtype=pl.Int64))
+            for i in range(3)
+        ]
+        cache = QueryCache(max_bytes=20_000, directory=None)
+
+        for lf in [*queries, queries[0]]:
+            cache.collect(lf, source)
+
+        assert cache.size <= 20_000  # noqa: PLR2004
+        # the first query was evicted by the third one
+        assert (cache.hits, cache.misses) == (0, 4)
+        cache.collect(queries[2], source)
+        assert cache.hits == 1
+
+    def test_stale_versions_pruned(self, tmp_path: Path) -> None:
+        """
+        Verify that writing a new version of a result deletes the older ones.
+        """
+        source, directory = tmp_path / "registre.parquet", tmp_path / "queries"
+        write(source, ["eolien"], [1.0])
+        cache = QueryCache(directory=directory)
+        cache.collect(capacity_by_filiere(source), source)
+        cache.collect(pl.scan_parquet(source).select(pl.len()), source)
+
+        write(source, ["eolien", "solaire"], [1.0, 5.0])
+        os.utime(source, ns=(1, 1))
+        cache.collect(capacity_by_filiere(source), source)
+
+        plans = [path.name.split("-")[0] for path in directory.glob("*.parquet")]
+        assert len(plans) == 2  # noqa: PLR2004
+        assert len(set(plans)) == 2  # noqa: PLR2004
+
+    def test_disk_bound(self, tmp_path: Path) -> None:
+        """
+        Check that the least recently used files are deleted beyond the bound.
+        """
+        source, directory = tmp_path / "registre.parquet", tmp_path / "queries"
+        write(source, ["eolien"], [1.0])
+        queries = [
+            pl.scan_parquet(source).select(pl.repeat(i, 1000, dtype=pl.Int64))
+            for i in range(3)
+        ]
+        paths = [directory / f"{query_key(lf, source)}.parquet" for lf in queries]
+        cache = QueryCache(directory=directory)
+
+        for i, lf in enumerate(queries[:2], start=1):
+            cache.collect(lf, source)
+            os.utime(paths[i - 1], ns=(i, i))
+        cache.max_disk_bytes = paths[0].stat().st_size + paths[1].stat().st_size
+        cache.collect(queries[2], source)
+
+        assert [path.exists() for path in paths] == [False, True, True]
@@ -0,0 +1,134 @@
+import gzip
+from datetime import UTC, datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from de_electricity_meteo.enums import Resolution
+from de_electricity_meteo.meteo.climatology import convert_file, scan_hourly
+from de_electricity_meteo.rollups import (
+    WEATHER_ROLLUP,
+    RollupSpec,
+    choose_resolution,
+    query_rollup,
+    scan_rollup,
+    update_rollups,
+)
+
+PARIS = ZoneInfo("Europe/Paris")
+SPEC = RollupSpec(name="test", keys=("code_region",), measures=("consommation",))
+
+
+def series(start: datetime, end: datetime) -> pl.LazyFrame:
+    date_heure = pl.datetime_range(
+        start, end, "30m", closed="left", eager=True, time_zone="UTC"
+    )
+    return pl.LazyFrame(
+        {
+            "code_region": "93",
+            "date_heure": date_heure,
+            "consommation": pl.int_range(len(date_heure), eager=True).cast(pl.Float64),
+        }
+    )
+
+
+SOURCE = series(datetime(2024, 12, 1, tzinfo=PARIS), datetime(2025, 3, 1, tzinfo=PARIS))
+
+
+def read_rollup(root: Path, resolution: Resolution) -> pl.DataFrame:
+    return scan_rollup(SPEC, resolution, root).collect().sort("periode")
+
+
+class TestRollups:
+    def test_incremental_update_matches_rebuild(self, tmp_path: Path) -> None:
+        """
+        Verify that recomputing the periods since a date gives the full rollups.
+        """
+        cutoff = datetime(2025, 2, 12, 13, tzinfo=PARIS)
+        update_rollups(
+            SOURCE.filter(pl.col("date_heure") < cutoff.astimezone(UTC)),
+            SPEC,
+            root=tmp_path / "inc",
+        )
+        update_rollups(SOURCE, SPEC, since=cutoff, root=tmp_path / "inc")
+        update_rollups(SOURCE, SPEC, root=tmp_path / "full")
+
+        for resolution in Resolution:
+            assert_frame_equal(
+                read_rollup(tmp_path / "inc", resolution),
+                read_rollup(tmp_path / "full", resolution),
+            )
+
+        # 31 days in January, DST does not change in winter
+        january = read_rollup(tmp_path / "full", Resolution.MONTH).filter(
+            pl.col("periode") == datetime(2025, 1, 1, tzinfo=PARIS)
+        )
+        assert january["nb"].item() == 31 * 48  # noqa: PLR2004
+
+    def test_choose_resolution(self) -> None:
+        """
+        Check that the coarsest aligned resolution is picked.
+        """
+        jan = datetime(2025, 1, 1, tzinfo=PARIS)
+        feb = datetime(2025, 2, 1, tzinfo=PARIS)
+        monday = datetime(2025, 1, 6, tzinfo=PARIS)
+
+        assert choose_resolution(jan, feb, "1mo", "Europe/Paris") == Resolution.MONTH
+        assert choose_resolution(jan, feb, "1d", "Europe/Paris") == Resolution.DAY
+        assert choose_resolution(monday, feb, "1mo", "Europe/Paris") == Resolution.DAY
+        assert choose_resolution(monday, monday, "2w", "Europe/Paris") == (
+            Resolution.WEEK
+        )
+        with pytest.raises(ValueError, match="Unsupported granularity"):
+            choose_resolution(jan, feb, "30m", "Europe/Paris")
+
+    def test_query_reaggregates_coarser_granularity(self, tmp_path: Path) -> None:
+        """
+        Check that a quarterly query derived from months matches the raw data.
+        """
+        update_rollups(SOURCE, SPEC, root=tmp_path)
+        start = datetime(2024, 12, 1, tzinfo=PARIS)
+        end = datetime(2025, 3, 1, tzinfo=PARIS)
+
+        result = query_rollup(SPEC, start, end, "1q", root=tmp_path)
+        raw = SOURCE.select(
+            pl.col("consommation").sum().alias("somme"),
+            pl.col("consommation").max().alias("max"),
+        ).collect()
+
+        assert result["somme"].sum() == raw["somme"].item()
+        assert result["max"].max() == raw["max"].item()
+        assert result["nb"].sum() == SOURCE.collect().height
+
+    def test_weather_rollup(self, tmp_path: Path) -> None:
+        """
+        Check the daily weather rollup per station, on local days.
+        """
+        source = tmp_path / "H_13_2020-2029.csv.gz"
+        with gzip.open(source, mode="wt", encoding="utf-8") as f:
+            f.write(
+                "NUM_POSTE;AAAAMMJJHH;RR1;T\n"
+                "13054001;2020123122;0.2;8.5\n"
+                "13054001;2020123123;;7.9\n"
+                "13054001;2021010100;0;7.1\n"
+                "13028001;2021010100;1.5;9.0\n"
+            )
+        convert_file(source, "13", tmp_path / "silver")
+
+        update_rollups(scan_hourly(tmp_path / "silver"), WEATHER_ROLLUP, root=tmp_path)
+        daily = scan_rollup(WEATHER_ROLLUP, Resolution.DAY, tmp_path).collect()
+
+        # 23:00 UTC is midnight in Paris
+        marignane = daily.filter(
+            pl.col("num_poste") == "13054001",
+            pl.col("periode") == datetime(2021, 1, 1, tzinfo=PARIS),
+        )
+        t = marignane.filter(pl.col("variable") == "t").row(0, named=True)
+        rr1 = marignane.filter(pl.col("variable") == "rr1").row(0, named=True)
+        assert (t["somme"], t["min"], t["nb"]) == (15.0, 7.1, 2)
+        assert (rr1["somme"], rr1["nb"]) == (0.0, 1)
+        assert daily["departement"].unique().to_list() == ["13"]
+        assert "dd" not in daily["variable"].unique()
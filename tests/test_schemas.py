@@ -0,0 +1,124 @@
+import json
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+import pytest
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo import schemas
+from de_electricity_meteo.electricity.odre_registre_national import read_records
+from de_electricity_meteo.schemas import (
+    SourceSchema,
+    check_header,
+    check_parquet,
+    detect_drift,
+    get_schema,
+)
+
+
+class TestSchemas:
+    def test_registry(self) -> None:
+        """
+        Check the lookup of the latest version and of unknown sources.
+        """
+        schema = get_schema("meteo_horaire")
+        assert schema.version == 1
+        assert schema.dtypes()["t"] == pl.Float64
+        assert "date_heure" not in get_schema("eco2mix_regional").dtypes()
+
+        with pytest.raises(ValueError, match="Unknown source"):
+            get_schema("unknown")
+        with pytest.raises(ValueError, match="Unknown version"):
+            get_schema("meteo_horaire", version=99)
+
+    def test_header_drift(self, mocker: MockerFixture) -> None:
+        """
+        Verify that a missing required column is drift and is logged, new columns
+        only reported.
+        """
+        logger = mocker.patch.object(schemas, "logger")
+
+        assert not check_header("meteo_horaire", ["num_poste", "aaaammjjhh", "qt"])
+        logger.warning.assert_not_called()
+
+        drift = check_header("meteo_horaire", ["poste", "aaaammjjhh", "t"])
+        assert drift.missing == ("num_poste",)
+        assert drift.unexpected == ("poste",)
+        logger.warning.assert_called_once()
+        assert logger.warning.call_args.kwargs["extra"]["missing"] == ["num_poste"]
+
+    def test_parquet_drift(self, tmp_path: Path, mocker: MockerFixture) -> None:
+        """
+        Check the detection of a changed dtype from the footer of a parquet file.
+        """
+        mocker.patch.object(schemas, "logger")
+        path = tmp_path / "communes.parquet"
+        pl.DataFrame(
+            {
+                "code": [1001],
+                "codeDepartement": ["01"],
+                "codeRegion": ["84"],
+                "centre": [{"type": "Point", "coordinates": [5.1, 46.1]}],
+            }
+        ).write_parquet(path)
+
+        drift = check_parquet("geo_api_communes", path)
+
+        assert drift.retyped == {"code": "Int64"}
+        assert not drift.missing
+
+    def test_numeric_exports(self, mocker: MockerFixture) -> None:
+        """
+        Verify that an integer export of a float column is not drift, a string is.
+        """
+        mocker.patch.object(schemas, "logger")
+        found = {
+            "code_insee_region": pl.String,
+            "libelle_region": pl.String,
+            "nature": pl.String,
+            "date_heure": pl.String,
+        }
+
+        assert not detect_drift("eco2mix_regional", {**found, "eolien": pl.Int64})
+        drift = detect_drift("eco2mix_regional", {**found, "eolien": pl.String})
+        assert drift.retyped == {"eolien": "String"}
+
+    def test_registry_json_dump(self, tmp_path: Path) -> None:
+        """
+        Check that the JSON dump of the registry is read typed, dates included.
+        """
+        path = tmp_path / "installations.json"
+        results = [
+            {
+                "idpeps": "1",
+                "codeinseecommune": "13001",
+                "puismaxinstallee": 36,
+                "nbinstallations": 1,
+                "datemiseenservice_date": "2020-01-02",
+                "unknown": True,
+            },
+            {"idpeps": "2", "puismaxinstallee": 2.5},
+        ]
+        path.write_text(json.dumps({"total_count": 2, "results": results}))
+
+        df = read_records(path)
+
+        assert df.schema == pl.Schema(get_schema("odre_registre").dtypes())
+        assert df["puismaxinstallee"].to_list() == [36.0, 2.5]  # noqa: PLR2004
+        assert df["datemiseenservice_date"].to_list() == [date(2020, 1, 2), None]
+
+    def test_versions(self, mocker: MockerFixture) -> None:
+        """
+        Verify that a file matching an older version of its source is not drift.
+        """
+        versions = (
+            SourceSchema("source", 1, {"a": pl.Int64}, frozenset(["a"])),
+            SourceSchema("source", 2, {"b": pl.Int64}, frozenset(["b"])),
+        )
+        mocker.patch.object(schemas, "_registry", return_value={"source": versions})
+
+        drift = detect_drift("source", {"a": pl.Int64})
+        assert not drift
+        assert drift.version == 1
+        assert detect_drift("source", {"c": pl.Int64}).version == 2  # noqa: PLR2004
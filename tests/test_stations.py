@@ -0,0 +1,124 @@
+import asyncio
+import json
+from datetime import date, datetime
+from typing import AsyncIterator
+
+import polars as pl
+import pytest
+from pytest_mock import MockerFixture
+
+from de_electricity_meteo.meteo.stations import (
+    SOURCE,
+    StationIntervalIndex,
+    iter_json_array,
+    station_record,
+    station_schema,
+    stations_frame,
+)
+from de_electricity_meteo.schemas import detect_drift
+
+FICHES = [
+    {
+        "id": "13054001",
+        "nom": "MARIGNANE",
+        "lieuDit": "Aéroport",
+        "lat": 43.44,
+        "lon": 5.22,
+        "alt": 9,
+        "dateDebut": "1920-01-01",
+        "dateFin": "",
+    },
+    {
+        "id": "13028001",
+        "nom": "CASSIS",
+        "lieuDit": "",
+        "positions": [
+            {"latitude": 43.2, "longitude": 5.5, "altitude": 300},
+            {"latitude": 43.21, "longitude": 5.55, "altitude": 327},
+        ],
+        "dateDebut": "1998-04-01T00:00:00Z",
+        "dateFin": "2010-12-31",
+    },
+    {
+        "id": "97101001",
+        "nom": "BAIE-MAHAULT",
+        "dateDebut": "2012-06-01",
+        "dateFin": "2020-01-31",
+    },
+]
+
+
+async def chunked(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def decode(data: bytes, size: int) -> list:
+    return [item async for item in iter_json_array(chunked(data, size))]
+
+
+class TestStations:
+    def test_iter_json_array_across_chunks(self) -> None:
+        """
+        Check that items cut anywhere (even inside a UTF-8 character) are decoded.
+        """
+        data = json.dumps(FICHES, indent=4, ensure_ascii=False).encode()
+
+        for size in (1, 7, 64, len(data)):
+            assert asyncio.run(decode(data, size)) == FICHES
+
+        assert asyncio.run(decode(b" [ ] ", 2)) == []
+        with pytest.raises(ValueError, match="Truncated"):
+            asyncio.run(decode(data[:-10], 64))
+        with pytest.raises(ValueError, match="Expected a JSON array"):
+            asyncio.run(decode(b'{"id": 1}', 64))
+
+    def test_upstream_keys(self, mocker: MockerFixture) -> None:
+        """
+        Verify that the keys of `fiches.json` match the upstream schema.
+        """
+        logger = mocker.patch("de_electricity_meteo.schemas.logger")
+
+        for fiche in FICHES:
+            assert not detect_drift(SOURCE, dict.fromkeys(fiche))
+        logger.warning.assert_not_called()
+
+    def test_station_record(self) -> None:
+        """
+        Verify typing, open periods and the latest position of moved stations.
+        """
+        records = [station_record(station) for station in FICHES]
+        stations = stations_frame(records)
+
+        assert stations.schema == station_schema()
+        assert stations["code_departement"].to_list() == ["13", "13", "971"]
+        assert stations["date_fin"][0] is None
+        assert stations["date_debut"][1] == date(1998, 4, 1)
+        assert stations["altitude"][1] == 327  # noqa: PLR2004
+        assert stations["lieu_dit"][1] is None
+
+    def test_interval_index(self) -> None:
+        """
+        Compare the index with a full scan over many query dates.
+        """
+        stations = stations_frame([station_record(station) for station in FICHES])
+        index = StationIntervalIndex(stations)
+
+        assert index.active_at(datetime(2015, 3, 1, 12)).to_list() == [
+            "13054001",
+            "97101001",
+        ]
+        assert index.active_at(date(2020, 2, 1)).to_list() == ["13054001"]
+        assert index.active_between(date(2009, 1, 1), date(2013, 1, 1)).len() == 3  # noqa: PLR2004
+
+        for year in range(1900, 2030, 3):
+            start, end = date(year, 1, 1), date(year + 1, 6, 30)
+            expected = (
+                stations.filter(
+                    pl.col("date_debut") <= end,
+                    pl.col("date_fin").is_null() | (pl.col("date_fin") >= start),
+                )["id"]
+                .sort()
+                .to_list()
+            )
+            assert index.active_between(start, end).to_list() == expected
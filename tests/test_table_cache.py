@@ -0,0 +1,71 @@
+import os
+from pathlib import Path
+
+import polars as pl
+
+from de_electricity_meteo.table_cache import cached_table, clear_cache, fingerprint
+
+
+def write(path: Path, values: list[int]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pl.DataFrame({"valeur": values}).write_parquet(path)
+
+
+class TestTableCache:
+    def test_cache_hit_and_invalidation(self, tmp_path: Path) -> None:
+        """
+        Check that a table is built once, then rebuilt when a source changes.
+        """
+        source, cache_dir = tmp_path / "silver" / "table.parquet", tmp_path / "cache"
+        write(source, [1, 2, 3])
+        builds = []
+
+        def build() -> pl.LazyFrame:
+            builds.append(1)
+            return pl.scan_parquet(source)
+
+        first = cached_table("table", source, build=build, cache_dir=cache_dir)
+        second = cached_table("table", source, build=build, cache_dir=cache_dir)
+        assert len(builds) == 1
+        assert first.equals(second)
+        assert first["valeur"].to_list() == [1, 2, 3]
+
+        write(source, [4, 5])
+        # a rewrite within the mtime resolution still changes the size here
+        os.utime(source, ns=(1, 1))
+        third = cached_table("table", source, build=build, cache_dir=cache_dir)
+        assert len(builds) == 2  # noqa: PLR2004
+        assert third["valeur"].to_list() == [4, 5]
+        # the stale entry was removed
+        assert len(list(cache_dir.iterdir())) == 1
+
+    def test_partitioned_dataset(self, tmp_path: Path) -> None:
+        """
+        Verify the fingerprint of a dataset directory and the default build.
+        """
+        dataset, cache_dir = tmp_path / "dataset", tmp_path / "cache"
+        write(dataset / "annee=2024" / "0.parquet", [1])
+        key = fingerprint(dataset)
+
+        df = cached_table("dataset", dataset, cache_dir=cache_dir)
+        assert df["valeur"].to_list() == [1]
+
+        write(dataset / "annee=2025" / "0.parquet", [2])
+        assert fingerprint(dataset) != key
+        df = cached_table("dataset", dataset, cache_dir=cache_dir)
+        assert sorted(df["valeur"].to_list()) == [1, 2]
+
+    def test_names_do_not_collide(self, tmp_path: Path) -> None:
+        """
+        Check that a table name prefixing another one does not touch its entries.
+        """
+        source, cache_dir = tmp_path / "table.parquet", tmp_path / "cache"
+        write(source, [1])
+        cached_table("eco2mix-meteo", source, cache_dir=cache_dir)
+        cached_table("eco2mix", source, cache_dir=cache_dir)
+        write(source, [1, 2])
+        cached_table("eco2mix", source, cache_dir=cache_dir)
+
+        assert len(list(cache_dir.glob("eco2mix-meteo-*"))) == 1
+        assert clear_cache("eco2mix", cache_dir=cache_dir) == 1
+        assert clear_cache(cache_dir=cache_dir) == 1
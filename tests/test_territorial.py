@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import polars as pl
+
+from de_electricity_meteo.geo.territorial import (
+    build_territorial_index,
+    read_geo_api_communes,
+    resolve_geolocation,
+)
+
+COMMUNES = [
+    {
+        "code": "13001",
+        "nom": "Aix-en-Provence",
+        "centre": {"type": "Point", "coordinates": [5.4, 43.5]},
+        "codeEpci": "200054807",
+        "codeDepartement": "13",
+        "codeRegion": "93",
+    },
+    {
+        "code": "13055",
+        "nom": "Marseille",
+        "centre": {"type": "Point", "coordinates": [5.4, 43.3]},
+        "codeEpci": "200054807",
+        "codeDepartement": "13",
+        "codeRegion": "93",
+    },
+    {
+        "code": "29019",
+        "nom": "Brest",
+        "centre": {"type": "Point", "coordinates": [-4.5, 48.4]},
+        "codeEpci": "242900314",
+        "codeDepartement": "29",
+        "codeRegion": "53",
+    },
+]
+
+
+class TestTerritorial:
+    def test_resolve_geolocation_finest_level(self, tmp_path: Path) -> None:
+        """
+        Check the fallback hierarchy and the level tag of each installation.
+        """
+        communes_path = tmp_path / "communes.json"
+        communes_path.write_text(json.dumps(COMMUNES))
+        index = build_territorial_index(
+            read_geo_api_communes(communes_path),
+            iris=pl.LazyFrame(
+                {"code_iris": ["130550101"], "latitude": [43.31], "longitude": [5.37]}
+            ),
+        )
+
+        registry = pl.LazyFrame(
+            {
+                "nominstallation": ["iris", "from_iris", "commune", "epci", "none"],
+                "codeiris": ["130550101", "130010102", None, None, None],
+                "codeinseecommune": [None, None, "29019", None, None],
+                "codeepci": [None, None, None, "200054807", None],
+                "codedepartement": [None, None, None, None, None],
+                "coderegion": [None, None, None, None, None],
+            }
+        )
+
+        resolved = {
+            row["nominstallation"]: row
+            for row in resolve_geolocation(registry, index)
+            .collect()
+            .iter_rows(named=True)
+        }
+
+        assert resolved["iris"]["niveau_geo"] == "iris"
+        assert resolved["iris"]["latitude"] == 43.31  # noqa: PLR2004
+        # unknown IRIS code, resolved through its commune prefix
+        assert resolved["from_iris"]["niveau_geo"] == "commune"
+        assert resolved["from_iris"]["code_region"] == "93"
+        assert resolved["commune"]["code_departement"] == "29"
+        assert resolved["epci"]["niveau_geo"] == "epci"
+        assert resolved["epci"]["latitude"] == 43.4  # noqa: PLR2004
+        assert resolved["none"]["niveau_geo"] is None
+        assert not any(column.startswith("_") for column in resolved["none"])